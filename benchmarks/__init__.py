@@ -0,0 +1,5 @@
+"""
+Offline benchmarks of formatter hot paths.
+
+Run ``python -m benchmarks --help`` from repository root.
+"""
@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+
+from .suite import (
+    BENCHMARKS,
+    GRIDS,
+    PROFILES,
+    compare,
+    load,
+    run_suite,
+    save
+)
+
+
+def print_result(result) -> None:
+    print("{:<10} {:<8} {:>5} epochs {:>10.4f} s {:>12.0f} values/s "
+          "{:>8.2f} MB/s {:>10.1f} KiB peak".format(
+              result.name, result.grid, result.epochs, result.seconds,
+              result.values_per_second, result.mb_per_second,
+              result.peak_memory / 1024
+          ))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks of IONEX formatter hot paths"
+    )
+    parser.add_argument("--profile", choices=list(PROFILES),
+                        default="quick",
+                        help="predefined set of grids and epochs")
+    parser.add_argument("--grid", action="append", choices=list(GRIDS),
+                        help="grid to run, overrides profile")
+    parser.add_argument("--epochs", action="append", type=int,
+                        help="number of epochs, overrides profile")
+    parser.add_argument("--benchmark", action="append",
+                        choices=list(BENCHMARKS),
+                        help="benchmark to run, all by default")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="time is the best of repeated runs")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="do not measure peak memory")
+    parser.add_argument("--output", help="save results to JSON file")
+    parser.add_argument("--baseline",
+                        help="JSON file with results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed slowdown relative to baseline")
+    args = parser.parse_args(argv)
+
+    grids, epochs = PROFILES[args.profile]
+    results = run_suite(args.benchmark,
+                        args.grid or grids,
+                        args.epochs or epochs,
+                        args.repeat,
+                        not args.no_memory,
+                        print_result)
+    if args.output:
+        save(results, args.output)
+    if args.baseline:
+        comparison = compare(results, load(args.baseline), args.threshold)
+        json.dump(comparison, sys.stdout, indent=2)
+        print()
+        if any(item["regression"] for item in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+import io
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import GridCell, IonexMap
+from ionex_formatter.spatial import SpatialRange
+
+# IONEX writes grid coordinates as F6.1, so 0.2 degree is the finest grid
+# that could be encoded
+GRIDS = {
+    "5x2.5": ((87.5, -87.5, -2.5), (-180, 180, 5)),
+    "1x1": ((87, -87, -1), (-180, 180, 1)),
+    "0.2x0.2": ((87.4, -87.4, -0.2), (-180, 180, 0.2)),
+}
+
+PROFILES = {
+    "quick": (["5x2.5"], [1, 24]),
+    "default": (["5x2.5", "1x1"], [1, 24, 288]),
+    "full": (list(GRIDS), [1, 24, 288, 2880]),
+}
+
+START = datetime(2010, 12, 28)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    grid: str
+    epochs: int
+    seconds: float
+    values: int
+    bytes: int
+    peak_memory: int
+
+    @property
+    def key(self) -> tuple[str, str, int]:
+        return (self.name, self.grid, self.epochs)
+
+    @property
+    def values_per_second(self) -> float:
+        return self.values / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["values_per_second"] = self.values_per_second
+        result["mb_per_second"] = self.mb_per_second
+        return result
+
+
+def get_ranges(grid: str) -> tuple[SpatialRange, SpatialRange]:
+    lat, lon = GRIDS[grid]
+    return SpatialRange(*lat), SpatialRange(*lon)
+
+
+def make_cells(lat_range: SpatialRange,
+               lon_range: SpatialRange) -> list[GridCell]:
+    """
+    Deterministic smooth field on the grid with values that fit I5.
+    """
+    data = [
+        (lat, lon, (i * 7 + j * 3) % 400)
+        for i, lat in enumerate(lat_range.coordinates)
+        for j, lon in enumerate(lon_range.coordinates)
+    ]
+    return GridCell.get_list_from_csv(data)
+
+
+def make_map(grid: str) -> IonexMap:
+    lat_range, lon_range = get_ranges(grid)
+    ionex_map = IonexMap(lat_range, lon_range, 450, START)
+    ionex_map.set_data(make_cells(lat_range, lon_range))
+    return ionex_map
+
+
+class CountingSink(io.RawIOBase):
+    """
+    Binary stream that only counts written bytes, so written file is not
+    kept in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        return len(data)
+
+
+def get_interval(epochs: int) -> int:
+    return 86400 // epochs or 30
+
+
+def get_epochs(epochs: int) -> list[datetime]:
+    interval = get_interval(epochs)
+    return [START + timedelta(seconds=k * interval) for k in range(epochs)]
+
+
+def make_header(grid: str, epochs: int) -> IonexFile:
+    """
+    File with all header labels set and without maps.
+    """
+    lat_range, lon_range = get_ranges(grid)
+    times = get_epochs(epochs)
+    interval = get_interval(epochs)
+    ionex_file = IonexFile()
+    ionex_file.set_version_type_gnss()
+    ionex_file.set_label("PGM / RUN BY / DATE",
+                         ["benchmark", "ionex_formatter", "28-DEC-10 00:00"])
+    ionex_file.set_description("Benchmark of IONEX formatter. " * 4)
+    ionex_file.add_comment("Synthetic map repeated for every epoch.")
+    ionex_file.set_epoch_range(times[0], times[-1])
+    ionex_file.set_label("INTERVAL", [interval])
+    ionex_file.set_label("# OF MAPS IN FILE", [epochs])
+    ionex_file.set_label("MAPPING FUNCTION", ["COSZ"])
+    ionex_file.set_label("ELEVATION CUTOFF", [10.0])
+    ionex_file.set_label("BASE RADIUS", [6371.0])
+    ionex_file.set_map_dimension(2)
+    ionex_file.set_spatial_grid(lat_range, lon_range,
+                                SpatialRange(450, 450, 0))
+    ionex_file.set_label("EXPONENT", [-1])
+    return ionex_file
+
+
+def make_file(grid: str, epochs: int) -> IonexFile:
+    """
+    File with full header and the same map for every epoch, so memory
+    does not grow with number of epochs.
+    """
+    ionex_file = make_header(grid, epochs)
+    ionex_map = make_map(grid)
+    ionex_file.set_maps({t: ionex_map for t in get_epochs(epochs)},
+                        IonexMapType.TEC)
+    return ionex_file
+
+
+def bench_header(grid: str, epochs: int) -> tuple[Callable, int, int]:
+    lines = make_header(grid, epochs).get_header_lines()
+    size = sum(len(line) + 1 for line in lines)
+
+    def run():
+        make_header(grid, epochs).get_header_lines()
+    return run, 0, size
+
+
+def bench_ingestion(grid: str, epochs: int) -> tuple[Callable, int, int]:
+    lat_range, lon_range = get_ranges(grid)
+    cells = make_cells(lat_range, lon_range)
+
+    def run():
+        for k in range(epochs):
+            ionex_map = IonexMap(lat_range, lon_range, 450, START)
+            ionex_map.set_data(cells)
+    return run, len(cells) * epochs, 0
+
+
+def bench_chunks(grid: str, epochs: int) -> tuple[Callable, int, int]:
+    lat_range, lon_range = get_ranges(grid)
+    rows = lat_range.get_node_number() * epochs
+
+    def run():
+        for _ in range(rows):
+            lon_range.get_chunks(IonexFile.VALUES_PER_LINE)
+    return run, rows * lon_range.get_node_number(), 0
+
+
+def bench_encoding(grid: str, epochs: int) -> tuple[Callable, int, int]:
+    ionex_map = make_map(grid)
+    formatter = IonexFile()
+    interval = get_interval(epochs)
+    nodes = ionex_map.lat_range.get_node_number() * \
+        ionex_map.lon_range.get_node_number()
+    size = sum(
+        len(line) + 1
+        for line in formatter.format_map(IonexMapType.TEC, 1, START,
+                                         ionex_map)
+    )
+
+    def run():
+        for k in range(epochs):
+            formatter.format_map(IonexMapType.TEC, k + 1,
+                                 START + timedelta(seconds=interval * k),
+                                 ionex_map)
+    return run, nodes * epochs, size * epochs
+
+
+def bench_writing(grid: str, epochs: int) -> tuple[Callable, int, int]:
+    ionex_file = make_file(grid, epochs)
+    nodes = get_ranges(grid)[0].get_node_number() * \
+        get_ranges(grid)[1].get_node_number()
+
+    sink = CountingSink()
+    ionex_file.write(sink)
+
+    def run():
+        ionex_file.write(CountingSink())
+    return run, nodes * epochs, sink.size
+
+
+BENCHMARKS = {
+    "header": bench_header,
+    "ingestion": bench_ingestion,
+    "chunks": bench_chunks,
+    "encoding": bench_encoding,
+    "writing": bench_writing,
+}
+
+
+def measure(name: str,
+            grid: str,
+            epochs: int,
+            repeat: int = 3,
+            memory: bool = True) -> BenchmarkResult:
+    """
+    Runs single benchmark. Time is the best of repeat runs, peak memory
+    is measured by tracemalloc in a separate run since tracing slows
+    code down.
+    """
+    run, values, size = BENCHMARKS[name](grid, epochs)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return BenchmarkResult(name, grid, epochs, best, values, size, peak)
+
+
+def run_suite(names: list[str] | None = None,
+              grids: list[str] | None = None,
+              epochs: list[int] | None = None,
+              repeat: int = 3,
+              memory: bool = True,
+              progress: Callable[[BenchmarkResult], None] | None = None
+              ) -> list[BenchmarkResult]:
+    """
+    Runs every benchmark for every grid and number of epochs. Header
+    benchmark does not depend on epochs and runs once per grid.
+    """
+    names = names or list(BENCHMARKS)
+    grids = grids or PROFILES["quick"][0]
+    epochs = epochs or PROFILES["quick"][1]
+    results = list()
+    for grid in grids:
+        for name in names:
+            for count in ([1] if name == "header" else epochs):
+                result = measure(name, grid, count, repeat, memory)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+def to_json(results: list[BenchmarkResult]) -> dict:
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def save(results: list[BenchmarkResult], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(to_json(results), f, indent=2)
+
+
+def load(path: str) -> list[BenchmarkResult]:
+    with open(path) as f:
+        data = json.load(f)
+    fields = BenchmarkResult.__dataclass_fields__
+    return [
+        BenchmarkResult(**{k: v for k, v in item.items() if k in fields})
+        for item in data["results"]
+    ]
+
+
+def compare(results: list[BenchmarkResult],
+            baseline: list[BenchmarkResult],
+            threshold: float = 0.1) -> list[dict]:
+    """
+    Compares results with baseline. Benchmark is a regression when it
+    is slower than baseline by more than threshold (0.1 is 10 %).
+
+    :returns: comparison for benchmarks present in both lists
+    """
+    reference = {result.key: result for result in baseline}
+    comparison = list()
+    for result in results:
+        base = reference.get(result.key)
+        if base is None or not base.seconds:
+            continue
+        ratio = result.seconds / base.seconds
+        comparison.append({
+            "name": result.name,
+            "grid": result.grid,
+            "epochs": result.epochs,
+            "seconds": result.seconds,
+            "baseline_seconds": base.seconds,
+            "ratio": ratio,
+            "peak_memory": result.peak_memory,
+            "baseline_peak_memory": base.peak_memory,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparison
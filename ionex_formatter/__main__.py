@@ -0,0 +1,78 @@
+import argparse
+import logging
+import signal
+import sys
+from pathlib import Path
+
+from .compression import Compression
+from .convert import ConversionError, ConversionOptions
+from .watch import DirectoryWatcher, convert_file
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ionex_formatter",
+        description="Converts CSV or gridded JSON data to IONEX files"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--in", dest="input",
+                        help="input file (.csv or .json)")
+    source.add_argument("--watch", metavar="DIR",
+                        help="convert files that appear in directory")
+    parser.add_argument("--out", required=True,
+                        help="directory for IONEX files")
+    parser.add_argument("--center", default="mos",
+                        help="3 character analysis center designator")
+    parser.add_argument("--region", default="G")
+    parser.add_argument("--exponent", type=int, default=-1)
+    parser.add_argument("--height", type=float, default=450.0)
+    parser.add_argument("--compression", default="none",
+                        choices=["none", "gzip", "bzip2", "lzma"])
+    parser.add_argument("--manifest", action="store_true",
+                        help="write sidecar manifest with size, digests, "
+                             "maps and grid of every output")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="worker processes of watch mode")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="seconds between polls of watch mode")
+    parser.add_argument("--state", default=None,
+                        help="state file of watch mode, by default "
+                             ".ionex_watch.json in output directory")
+    parser.add_argument("--once", action="store_true",
+                        help="poll watched directory twice and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        options = ConversionOptions(args.center, args.region, args.exponent,
+                                    args.height)
+    except ConversionError as e:
+        parser.error(str(e))
+    compression = Compression(args.compression)
+    if args.input:
+        Path(args.out).mkdir(parents=True, exist_ok=True)
+        try:
+            path = convert_file(args.input, args.out, options, compression,
+                                args.manifest)
+        except (ConversionError, OSError) as e:
+            print("Could not convert {}: {}".format(args.input, e),
+                  file=sys.stderr)
+            return 1
+        print(path)
+        return 0
+
+    watcher = DirectoryWatcher(args.watch, args.out, options, compression,
+                               args.workers, args.interval, args.state,
+                               manifest=args.manifest)
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    try:
+        # file is taken when it did not change between two polls
+        watcher.run(polls=2 if args.once else None)
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
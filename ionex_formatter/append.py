@@ -0,0 +1,202 @@
+import os
+from datetime import datetime
+from pathlib import Path
+
+from .compression import MAGIC_NUMBERS, UnsupportedCompressionError
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap
+
+
+class AppendError(Exception):
+    """
+    Raised when maps could not be appended to existing file.
+    """
+    pass
+
+
+class IonexAppender:
+    """
+    Appends maps to existing IONEX file without rewriting it.
+
+    Only header and the tail of file are read: END OF FILE line is
+    overwritten by new map blocks, then EPOCH OF LAST MAP and # OF MAPS IN
+    FILE header lines are updated in place. Both lines have fixed width,
+    hence the rest of the file is not moved.
+
+    New maps should be of the same type as the last map block in file
+    and should be later than EPOCH OF LAST MAP.
+    """
+
+    TAIL_SIZE = 4096
+    UPDATED_LABELS = ("EPOCH OF LAST MAP", "# OF MAPS IN FILE")
+
+    def __init__(self, path: str | Path):
+        """
+        :param path: path to uncompressed IONEX file
+        :type path: str or Path
+        """
+        self.path = Path(path)
+        self.formatter = IonexFile()
+
+    def append(self,
+               maps: dict[datetime, IonexMap],
+               dtype: IonexMapType = IonexMapType.TEC) -> int:
+        """
+        Appends maps to the end of file.
+
+        :param maps: maps to be appended, keys are epochs
+        :type maps: dict
+
+        :param dtype: type of maps
+        :type dtype: IonexMapType
+
+        :returns: number of maps in file after append
+        :rtype: int
+
+        :raises AppendError: when file structure does not allow to append
+        """
+        if not maps:
+            return 0
+        with open(self.path, "r+b") as f:
+            self._check_compression(f)
+            header = self._read_header(f)
+            eof_offset, last_index = self._read_tail(f, dtype)
+            epochs = sorted(maps)
+            last_epoch = header.get("EPOCH OF LAST MAP")
+            if last_epoch is not None and epochs[0] <= last_epoch[1]:
+                msg = "Map {} is not later than last map {} in file"
+                raise AppendError(msg.format(epochs[0], last_epoch[1]))
+            # everything is formatted before file is changed, so formatting
+            # errors leave file intact
+            blocks = list()
+            for map_index, epoch in enumerate(epochs, start=last_index + 1):
+                lines = self.formatter.format_map(
+                    dtype, map_index, epoch, maps[epoch]
+                )
+                blocks.append(self._to_bytes(lines))
+            blocks.append(self._to_bytes(
+                [self.formatter._get_end_line("END OF FILE")]
+            ))
+            maps_number = last_index + len(epochs)
+            updates = self._header_updates(header, epochs[-1], maps_number)
+            f.seek(eof_offset)
+            f.truncate()
+            f.write(b"".join(blocks))
+            for offset, line in updates:
+                f.seek(offset)
+                f.write(line)
+        return maps_number
+
+    def _check_compression(self, f) -> None:
+        head = f.read(6)
+        for magic, compression in MAGIC_NUMBERS.items():
+            if head.startswith(magic):
+                raise UnsupportedCompressionError(compression.value)
+        f.seek(0)
+
+    def _read_header(self, f) -> dict:
+        """
+        Finds header lines to be updated.
+
+        :returns: dict label -> (offset, value, line length)
+        """
+        header = dict()
+        offset = 0
+        for raw in iter(f.readline, b""):
+            line = raw.rstrip(b"\r\n").decode("ascii")
+            label = line[IonexFile.header_line_length:].strip()
+            if label == "EPOCH OF LAST MAP":
+                fields = [int(line[i: i + 6]) for i in range(0, 36, 6)]
+                header[label] = (offset, datetime(*fields), len(line))
+            elif label == "# OF MAPS IN FILE":
+                header[label] = (offset, int(line[:6]), len(line))
+            elif label == "END OF HEADER":
+                return header
+            offset += len(raw)
+        raise AppendError("There is no END OF HEADER in file")
+
+    def _read_tail(self, f, dtype: IonexMapType) -> tuple[int, int]:
+        """
+        Finds END OF FILE line and index of the last map.
+
+        :returns: offset of END OF FILE line and index of last map
+        """
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - self.TAIL_SIZE)
+        f.seek(start)
+        tail = f.read()
+        lines = tail.splitlines(keepends=True)
+        offset = size
+        eof_offset = None
+        for raw in reversed(lines):
+            offset -= len(raw)
+            line = raw.rstrip(b"\r\n").decode("ascii")
+            label = line[IonexFile.header_line_length:].strip()
+            if not label:
+                continue
+            if label == "END OF FILE":
+                eof_offset = offset
+                continue
+            if eof_offset is None:
+                raise AppendError("There is no END OF FILE in file")
+            _, end_label = IonexFile.MAP_LABELS[dtype]
+            if label == "END OF HEADER":
+                return eof_offset, 0
+            if label != end_label:
+                msg = "Last block in file is '{}', can not append {} maps"
+                raise AppendError(msg.format(label, dtype.name))
+            return eof_offset, int(line[:6])
+        raise AppendError("There is no END OF FILE in file")
+
+    def _header_updates(self,
+                        header: dict,
+                        last_epoch: datetime,
+                        maps_number: int) -> list[tuple[int, bytes]]:
+        """
+        Formats header lines to be overwritten.
+
+        :returns: list of (offset, line)
+        """
+        updates = list()
+        label = "EPOCH OF LAST MAP"
+        if label in header:
+            line = self.formatter._get_header_date_time(last_epoch) + label
+            updates.append(self._fit_line(header[label], line))
+        label = "# OF MAPS IN FILE"
+        if label in header:
+            fmt = self.formatter.header_format.HEADER_FORMATS[label]
+            line = self.formatter.format_header_line([maps_number], fmt)
+            updates.append(self._fit_line(header[label], line + label))
+        return updates
+
+    def _fit_line(self, position: tuple, line: str) -> tuple[int, bytes]:
+        offset, _, length = position
+        line = line.rstrip().ljust(length)
+        if len(line) != length:
+            raise AppendError("Line '{}' does not fit file".format(line))
+        return offset, line.encode("ascii")
+
+    @staticmethod
+    def _to_bytes(lines: list[str]) -> bytes:
+        return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def append_maps(path: str | Path,
+                maps: dict[datetime, IonexMap],
+                dtype: IonexMapType = IonexMapType.TEC) -> int:
+    """
+    Appends maps to existing IONEX file without rewriting it.
+
+    :param path: path to uncompressed IONEX file
+    :type path: str or Path
+
+    :param maps: maps to be appended, keys are epochs
+    :type maps: dict
+
+    :param dtype: type of maps
+    :type dtype: IonexMapType
+
+    :returns: number of maps in file after append
+    :rtype: int
+    """
+    return IonexAppender(path).append(maps, dtype)
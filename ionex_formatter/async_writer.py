@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Executor
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap
+
+
+class WriterClosedError(Exception):
+    """
+    Raised when map is added to writer that is already closed.
+    """
+    pass
+
+
+def _encode_lines(func, *args) -> bytes:
+    """
+    Calls func and joins returned lines, it is module level function, so
+    it could be passed to ProcessPoolExecutor.
+    """
+    return ("\n".join(func(*args)) + "\n").encode("ascii")
+
+
+class AsyncIonexWriter:
+    """
+    Writes IONEX file while maps arrive without blocking event loop.
+
+    Header is taken from IonexFile given to constructor (it should contain
+    epoch range and number of maps since they are written first). Maps are
+    encoded in executor and written to sink in order they were added.
+    Number of maps that are encoded or waiting for sink is limited, so
+    add_map waits when sink is slower than producer.
+
+    Sink could be:
+
+    * path to file, file is opened and written in default loop executor;
+    * stream like asyncio.StreamWriter with write() and coroutine drain();
+    * object with coroutine write() (for example aiofiles file);
+    * blocking binary stream, it is written in default loop executor.
+
+    Usage::
+
+        async with AsyncIonexWriter(ionex_file, writer) as ionex_writer:
+            async for epoch, ionex_map in solutions:
+                await ionex_writer.add_map(epoch, ionex_map)
+    """
+
+    def __init__(self,
+                 ionex_file: IonexFile,
+                 sink: str | Path | Any,
+                 dtype: IonexMapType = IonexMapType.TEC,
+                 executor: Executor | None = None,
+                 max_pending: int = 4):
+        """
+        :param ionex_file: file with header data
+        :type ionex_file: IonexFile
+
+        :param sink: where data is written
+        :type sink: str, Path, asyncio.StreamWriter or binary stream
+
+        :param dtype: type of maps to be written
+        :type dtype: IonexMapType
+
+        :param executor: executor to encode maps (thread or process pool),
+            default loop executor is used if None. Blocking writes always
+            run in default loop executor
+        :type executor: concurrent.futures.Executor
+
+        :param max_pending: number of maps that could be encoded or
+            written simultaneously
+        :type max_pending: int
+        """
+        self.ionex_file = ionex_file
+        self.sink = sink
+        self.dtype = dtype
+        self.executor = executor
+        self.maps_written = 0
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._map_index = 0
+        self._task = None
+        self._start_lock = asyncio.Lock()
+        self._stream = None
+        self._closed = False
+
+    async def __aenter__(self):
+        await self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def add_map(self, epoch: datetime, ionex_map: IonexMap) -> None:
+        """
+        Schedules map encoding and waits if too many maps are pending.
+
+        :param epoch: time of the map
+        :type epoch: datetime
+
+        :param ionex_map: map to be written
+        :type ionex_map: IonexMap
+
+        :raises WriterClosedError: if writer is closed
+        """
+        if self._closed:
+            raise WriterClosedError
+        await self._start()
+        self._check_task()
+        self._map_index += 1
+        future = self._encode(self.ionex_file.format_map, self.dtype,
+                              self._map_index, epoch, ionex_map)
+        await self._put(future)
+
+    async def close(self) -> None:
+        """
+        Writes remaining maps and END OF FILE, then closes sink if it was
+        opened by writer.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._start()
+            await self._put(None)
+            await self._task
+            lines = [self.ionex_file._get_end_line("END OF FILE")]
+            await self._write(self._to_bytes(lines))
+        except BaseException:
+            await self._abort()
+            raise
+        await self._finish()
+
+    async def _start(self) -> None:
+        """
+        Opens sink, writes header and starts task that writes maps.
+        """
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            loop = asyncio.get_running_loop()
+            if isinstance(self.sink, (str, Path)):
+                self._stream = await loop.run_in_executor(
+                    None, open, self.sink, "wb"
+                )
+            else:
+                self._stream = self.sink
+            try:
+                header = self._encode(self.ionex_file.get_header_lines)
+                await self._write(await header)
+            except BaseException:
+                await self._close_sink()
+                raise
+            self._task = asyncio.create_task(self._consume())
+
+    async def _put(self, item: asyncio.Future | None) -> None:
+        """
+        Waits for free place in queue unless writing task failed.
+        """
+        put = asyncio.ensure_future(self._queue.put(item))
+        await asyncio.wait({put, self._task},
+                           return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            self._check_task()
+
+    def _encode(self, func, *args) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(
+            self.executor, functools.partial(_encode_lines, func, *args)
+        )
+
+    @staticmethod
+    def _to_bytes(lines: list[str]) -> bytes:
+        return ("\n".join(lines) + "\n").encode("ascii")
+
+    async def _consume(self) -> None:
+        while True:
+            future = await self._queue.get()
+            if future is None:
+                return
+            await self._write(await future)
+            self.maps_written += 1
+
+    def _check_task(self) -> None:
+        if self._task.done() and self._task.exception() is not None:
+            raise self._task.exception()
+
+    async def _write(self, data: bytes) -> None:
+        instrumentation = self.ionex_file.instrumentation
+        if instrumentation is None:
+            await self._write_data(data)
+            return
+        start = perf_counter()
+        await self._write_data(data)
+        instrumentation.record("write", start, perf_counter(),
+                               lines=data.count(b"\n"), bytes=len(data))
+
+    async def _write_data(self, data: bytes) -> None:
+        stream = self._stream
+        if hasattr(stream, "drain"):
+            stream.write(data)
+            await stream.drain()
+        elif inspect.iscoroutinefunction(stream.write):
+            await stream.write(data)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, stream.write, data)
+
+    async def _abort(self) -> None:
+        """
+        Cancels maps waiting in queue and writing task and closes sink if
+        it was opened by writer.
+        """
+        pending = list()
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item.cancel()
+                pending.append(item)
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            pending.append(self._task)
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self._close_sink()
+
+    async def _close_sink(self) -> None:
+        if isinstance(self.sink, (str, Path)) and self._stream is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._stream.close)
+            self._stream = None
+
+    async def _finish(self) -> None:
+        stream = self._stream
+        loop = asyncio.get_running_loop()
+        if isinstance(self.sink, (str, Path)):
+            await loop.run_in_executor(None, stream.close)
+        elif hasattr(stream, "drain"):
+            await stream.drain()
+        elif hasattr(stream, "flush"):
+            if inspect.iscoroutinefunction(stream.flush):
+                await stream.flush()
+            else:
+                await loop.run_in_executor(None, stream.flush)
@@ -0,0 +1,159 @@
+import copy
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable
+
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    __slots__ = ("lock", "maps")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.maps = dict()
+
+
+class ConcurrentIonexBuilder:
+    """
+    Collects maps and header items from several threads and makes
+    IonexFile snapshots for writing.
+
+    Maps are kept in shards selected by epoch, every shard has its own
+    lock, so threads that add maps for different epochs rarely wait for
+    each other. Header changes are appended to a queue (deque append is
+    atomic). When snapshot is made, queued changes are applied once in
+    order of arrival to a base file owned by builder, and every snapshot
+    is a copy of the base file. Change that raises an exception is logged
+    and dropped, it does not affect other changes and later snapshots.
+
+    Snapshot locks all shards at once only to copy dicts of maps, so it
+    contains every map added before it and no map added after it. Maps
+    are not copied and should not be changed after they are added.
+
+    Usage::
+
+        builder = ConcurrentIonexBuilder()
+        builder.update_header(IonexFile.set_version_type_gnss)
+        builder.set_label("EXPONENT", [-1])
+        # in worker threads
+        builder.add_map(IonexMapType.TEC, epoch, ionex_map)
+        # at any time
+        builder.snapshot().write("mosg3620.10i")
+    """
+
+    def __init__(self,
+                 shards: int = 16,
+                 factory: Callable[[], IonexFile] = IonexFile,
+                 update_epochs: bool = True):
+        """
+        :param shards: number of shards of maps
+        :type shards: int
+
+        :param factory: function that makes empty base file of snapshots
+        :type factory: callable
+
+        :param update_epochs: set EPOCH OF FIRST MAP, EPOCH OF LAST MAP
+            and # OF MAPS IN FILE of snapshot from its maps
+        :type update_epochs: bool
+        """
+        if shards < 1:
+            raise ValueError("Number of shards should be positive")
+        self._shards = [_Shard() for _ in range(shards)]
+        self._header_queue = deque()
+        self._base = factory()
+        self._snapshot_lock = threading.Lock()
+        self.factory = factory
+        self.update_epochs = update_epochs
+
+    def _shard(self, epoch: datetime) -> _Shard:
+        return self._shards[hash(epoch) % len(self._shards)]
+
+    def add_map(self,
+                dtype: IonexMapType,
+                epoch: datetime,
+                ionex_map: IonexMap) -> None:
+        """
+        Adds map, map with the same type and epoch is replaced.
+
+        :param dtype: type of map
+        :type dtype: IonexMapType
+
+        :param epoch: epoch of map
+        :type epoch: datetime
+
+        :param ionex_map: map, IonexMap or any map accepted by IonexFile
+        :type ionex_map: IonexMap
+        """
+        shard = self._shard(epoch)
+        with shard.lock:
+            shard.maps[(dtype, epoch)] = ionex_map
+
+    def remove_map(self, dtype: IonexMapType, epoch: datetime) -> bool:
+        """
+        Removes map if it exists.
+
+        :returns: True if map was removed
+        """
+        shard = self._shard(epoch)
+        with shard.lock:
+            return shard.maps.pop((dtype, epoch), None) is not None
+
+    def update_header(self, func: Callable[..., Any], *args) -> None:
+        """
+        Queues header change: func(ionex_file, *args) is called for file
+        of every following snapshot, for example
+        update_header(IonexFile.add_comment, "text").
+        """
+        self._header_queue.append((func, args))
+
+    def set_label(self, label: str, data: list) -> None:
+        self.update_header(IonexFile.set_label, label, data)
+
+    def add_comment(self, comment: str | list) -> None:
+        self.update_header(IonexFile.add_comment, comment)
+
+    def __len__(self) -> int:
+        return sum(len(shard.maps) for shard in self._shards)
+
+    def snapshot(self) -> IonexFile:
+        """
+        Makes file with all header changes and maps added so far.
+
+        :rtype: IonexFile
+        """
+        with self._snapshot_lock:
+            queue = self._header_queue
+            while queue:
+                func, args = queue.popleft()
+                try:
+                    func(self._base, *args)
+                except Exception:
+                    logger.exception("Header change %s%r is dropped",
+                                     getattr(func, "__name__", func), args)
+            for shard in self._shards:
+                shard.lock.acquire()
+            try:
+                items = [item for shard in self._shards
+                         for item in shard.maps.items()]
+            finally:
+                for shard in self._shards:
+                    shard.lock.release()
+            ionex_file = copy.deepcopy(self._base)
+
+        maps = dict()
+        for (dtype, epoch), ionex_map in items:
+            maps.setdefault(dtype, dict())[epoch] = ionex_map
+        for dtype in IonexMapType:
+            if dtype in maps:
+                ionex_file.set_maps(dict(sorted(maps[dtype].items())), dtype)
+        if self.update_epochs and maps:
+            epochs = maps.get(IonexMapType.TEC) or next(iter(maps.values()))
+            ionex_file.set_epoch_range(min(epochs), max(epochs))
+            ionex_file.set_label("# OF MAPS IN FILE", [len(epochs)])
+        return ionex_file
@@ -0,0 +1,354 @@
+import bz2
+import gzip
+import io
+import lzma
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO
+
+
+class UnsupportedCompressionError(Exception):
+    """
+    Raised when compression could not be handled by standard library.
+
+    Unix compress (.Z) files use LZW algorithm that is not available in
+    python standard library. They are read with decoder of this module,
+    but could not be written.
+    """
+    def __init__(self, compression: str):
+        msg = "Compression '{}' is not supported".format(compression)
+        super().__init__(msg)
+
+
+class Compression(Enum):
+    NONE = "none"
+    GZIP = "gzip"
+    BZIP2 = "bzip2"
+    LZMA = "lzma"
+    UNIX = "compress"
+
+
+SUFFIXES = {
+    ".gz": Compression.GZIP,
+    ".bz2": Compression.BZIP2,
+    ".xz": Compression.LZMA,
+    ".Z": Compression.UNIX,
+}
+
+MAGIC_NUMBERS = {
+    b"\x1f\x8b": Compression.GZIP,
+    b"BZh": Compression.BZIP2,
+    b"\xfd7zXZ\x00": Compression.LZMA,
+    b"\x1f\x9d": Compression.UNIX,
+}
+
+DEFAULT_LEVELS = {
+    Compression.GZIP: 6,
+    Compression.BZIP2: 9,
+    Compression.LZMA: 6,
+}
+
+
+def decompress_lzw(data: bytes) -> bytes:
+    """
+    Decompresses data of unix compress (.Z files).
+
+    Codes of LZW start with 9 bits and grow up to maximal width given in
+    header. Compress writes codes in groups of 8 codes counted from the
+    first code of the same width, so when width of codes changes or table
+    is cleared the rest of the group is skipped.
+
+    :param data: whole content of .Z file
+    :type data: bytes
+
+    :raises ValueError: if data are not valid compress data
+    :rtype: bytes
+    """
+    if data[:2] != b"\x1f\x9d" or len(data) < 3:
+        raise ValueError("Data are not compressed by unix compress")
+    max_bits = data[2] & 0x1f
+    block_mode = data[2] & 0x80
+    if not 9 <= max_bits <= 16:
+        raise ValueError("Wrong maximal code width {}".format(max_bits))
+    max_entries = 1 << max_bits
+    clear = 256
+    # in block mode code 256 clears table, its entry is never used
+    table = [bytes((i,)) for i in range(256)] + [b""] * bool(block_mode)
+    output = bytearray()
+    codes = data[3:] + b"\x00\x00"
+    end = (len(data) - 3) * 8
+    bits = 9
+    position = 0
+    # position of the first code of current width
+    start = 0
+    previous = None
+    while True:
+        if bits < max_bits and len(table) > (1 << bits) - 1:
+            position = start = _skip_group(position, start, bits)
+            bits += 1
+        if position + bits > end:
+            break
+        offset = position >> 3
+        code = int.from_bytes(codes[offset: offset + 3], "little")
+        code = (code >> (position & 7)) & ((1 << bits) - 1)
+        position += bits
+        if code == clear and block_mode:
+            del table[256:]
+            position = start = _skip_group(position, start, bits)
+            bits = 9
+            continue
+        if code < len(table):
+            entry = table[code]
+        elif code == len(table) and previous is not None:
+            entry = previous + previous[:1]
+        else:
+            raise ValueError("Wrong code {} at bit {}".format(code,
+                                                              position))
+        output += entry
+        if previous is not None and len(table) < max_entries:
+            table.append(previous + entry[:1])
+        previous = entry
+    return bytes(output)
+
+
+def _skip_group(position: int, start: int, bits: int) -> int:
+    group = bits * 8
+    return start - (start - position) // group * group
+
+
+def detect_compression(path: str | Path) -> Compression:
+    """
+    Guess compression from file suffix.
+
+    :param path: path to the file
+    :type path: str or Path
+
+    :rtype: Compression
+    """
+    return SUFFIXES.get(Path(path).suffix, Compression.NONE)
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    Writes single gzip member compressing independent blocks in threads.
+
+    Data is split into blocks of block_size bytes. Every block is deflated
+    by separate compressor object primed with the last 32 KiB of the
+    previous block, and flushed to byte boundary, so compressed blocks are
+    concatenated into one valid deflate stream. zlib releases GIL while
+    compressing, hence blocks are compressed in parallel.
+    """
+
+    WINDOW_SIZE = 32768
+
+    def __init__(self,
+                 stream: BinaryIO,
+                 level: int = 6,
+                 threads: int = 2,
+                 block_size: int = 128 * 1024):
+        """
+        :param stream: binary stream to write compressed data
+        :type stream: BinaryIO
+
+        :param level: compression level from 1 to 9
+        :type level: int
+
+        :param threads: number of threads used for compression
+        :type threads: int
+
+        :param block_size: size of uncompressed block in bytes
+        :type block_size: int
+        """
+        super().__init__()
+        self.stream = stream
+        self.level = level
+        self.block_size = block_size
+        self.max_pending = 2 * threads
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._pending = list()
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._crc = 0
+        self._size = 0
+        header = struct.pack("<BBBBIBB", 0x1f, 0x8b, 8, 0,
+                             int(time.time()), 0, 255)
+        self.stream.write(header)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._submit(block, last=False)
+        return len(data)
+
+    def _submit(self, block: bytes, last: bool) -> None:
+        future = self._executor.submit(
+            self._compress, block, self._dictionary, self.level, last
+        )
+        self._dictionary = block[-self.WINDOW_SIZE:]
+        self._pending.append(future)
+        while len(self._pending) > self.max_pending:
+            self.stream.write(self._pending.pop(0).result())
+
+    @staticmethod
+    def _compress(block: bytes, dictionary: bytes, level: int, last: bool):
+        if dictionary:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15,
+                                          zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        mode = zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+        return compressor.compress(block) + compressor.flush(mode)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._submit(bytes(self._buffer), last=True)
+        self._buffer = bytearray()
+        for future in self._pending:
+            self.stream.write(future.result())
+        self._pending = list()
+        self._executor.shutdown()
+        trailer = struct.pack("<II", self._crc, self._size & 0xffffffff)
+        self.stream.write(trailer)
+        self.stream.flush()
+        super().close()
+
+
+@contextmanager
+def open_output(target: str | Path | BinaryIO,
+                compression: Compression | None = None,
+                level: int | None = None,
+                threads: int = 1):
+    """
+    Opens binary stream that compresses data on the fly.
+
+    :param target: path to output file or binary stream. Given stream is
+        not closed on exit.
+    :type target: str, Path or BinaryIO
+
+    :param compression: compression to be used, if None it is guessed from
+        file suffix
+    :type compression: Compression
+
+    :param level: compression level, default is used if None
+    :type level: int
+
+    :param threads: number of threads for gzip compression. Parallel
+        compression is used when there are more than one thread.
+    :type threads: int
+
+    :raises UnsupportedCompressionError: for unix compress (.Z)
+    """
+    is_path = isinstance(target, (str, Path))
+    if compression is None:
+        compression = detect_compression(target) if is_path \
+            else Compression.NONE
+    if compression == Compression.UNIX:
+        raise UnsupportedCompressionError(compression.value)
+    if level is None:
+        level = DEFAULT_LEVELS.get(compression)
+    raw = open(target, "wb") if is_path else target
+    try:
+        if compression == Compression.NONE:
+            stream = io.BufferedWriter(_Unclosable(raw))
+        elif compression == Compression.GZIP and threads > 1:
+            stream = ParallelGzipWriter(raw, level, threads)
+        elif compression == Compression.GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode="wb",
+                                   compresslevel=level)
+        elif compression == Compression.BZIP2:
+            stream = bz2.BZ2File(raw, mode="wb", compresslevel=level)
+        else:
+            stream = lzma.LZMAFile(raw, mode="wb", preset=level)
+        try:
+            yield stream
+        finally:
+            stream.close()
+    finally:
+        if is_path:
+            raw.close()
+
+
+@contextmanager
+def open_input(source: str | Path | BinaryIO):
+    """
+    Opens binary stream that decompresses data transparently.
+
+    Compression is detected by magic number at the start of data.
+
+    Unix compress (.Z) data are decompressed in memory at once, other
+    compressions are decompressed while stream is read.
+
+    :param source: path to input file or binary stream. Given stream is
+        not closed on exit.
+    :type source: str, Path or BinaryIO
+    """
+    is_path = isinstance(source, (str, Path))
+    raw = open(source, "rb") if is_path else source
+    try:
+        if not is_path:
+            raw = io.BufferedReader(_Unclosable(raw))
+        head = raw.peek(6)[:6]
+        compression = Compression.NONE
+        for magic, _compression in MAGIC_NUMBERS.items():
+            if head.startswith(magic):
+                compression = _compression
+        if compression == Compression.UNIX:
+            stream = io.BytesIO(decompress_lzw(raw.read()))
+        elif compression == Compression.GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        elif compression == Compression.BZIP2:
+            stream = bz2.BZ2File(raw, mode="rb")
+        elif compression == Compression.LZMA:
+            stream = lzma.LZMAFile(raw, mode="rb")
+        else:
+            stream = raw
+        try:
+            yield stream
+        finally:
+            if stream is not raw:
+                stream.close()
+    finally:
+        if is_path:
+            raw.close()
+
+
+class _Unclosable(io.RawIOBase):
+    """
+    Wraps stream given by user so it stays open when wrapper is closed.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__()
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return self._stream.readable()
+
+    def writable(self) -> bool:
+        return self._stream.writable()
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data) -> int:
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        if not self.closed:
+            self._stream.flush()
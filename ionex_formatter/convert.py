@@ -0,0 +1,349 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, TextIO
+
+from .formatter import IonexFile, IonexMapType
+from .instrumentation import Instrumentation
+from .ionex_map import IonexMap
+from .naming import get_file_name
+from .spatial import (
+    DecimalDigitReduceAccuracyError,
+    FiniteRangeZeroStepError,
+    NonIntegerStepCountError,
+    OffGridCoordinateError,
+    SpatialRange
+)
+
+# errors raised for ranges that could not be stored in IONEX
+RANGE_ERRORS = (
+    DecimalDigitReduceAccuracyError,
+    FiniteRangeZeroStepError,
+    NonIntegerStepCountError,
+)
+
+
+# values are scaled by 10 ** -exponent, scale out of this range overflows
+# float or gives only values that do not fit I5
+MIN_EXPONENT = -99
+MAX_EXPONENT = 99
+
+
+class ConversionError(ValueError):
+    """
+    Raised when input data could not be converted to IONEX.
+    """
+
+
+@dataclass
+class ConversionOptions:
+    """
+    Parameters of conversion that are not given by input data.
+
+    Grid is inferred from coordinates of input if lat_range or lon_range
+    is None.
+
+    :raises ConversionError: if exponent is out of MIN_EXPONENT and
+        MAX_EXPONENT
+    """
+    center: str = "mos"
+    region: str = "G"
+    exponent: int = -1
+    height: float = 450.0
+    lat_range: SpatialRange | None = None
+    lon_range: SpatialRange | None = None
+    description: str | None = None
+
+    def __post_init__(self):
+        if not MIN_EXPONENT <= self.exponent <= MAX_EXPONENT:
+            msg = "Exponent should be in range {}..{}, got {}"
+            raise ConversionError(msg.format(MIN_EXPONENT, MAX_EXPONENT,
+                                             self.exponent))
+
+
+def read_csv(stream: Iterable[str]) -> dict[datetime, list[tuple]]:
+    """
+    Reads whitespace separated CSV with columns
+
+        year month day_of_month hour minute second lat lon val
+
+    Lines starting with # and empty lines are skipped.
+
+    :param stream: text stream or iterable of lines
+    :type stream: TextIO
+
+    :returns: (lat, lon, val) records grouped by epoch
+    :rtype: dict
+
+    :raises ConversionError: if line could not be parsed
+    """
+    records = defaultdict(list)
+    epochs = dict()
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split()
+        if len(fields) != 9:
+            msg = "Line {}: expected 9 columns, got {}"
+            raise ConversionError(msg.format(number, len(fields)))
+        try:
+            key = tuple(int(field) for field in fields[:6])
+            lat, lon, val = (float(field) for field in fields[6:])
+            epoch = epochs.get(key)
+            if epoch is None:
+                epoch = epochs[key] = datetime(*key)
+        except ValueError as e:
+            raise ConversionError("Line {}: {}".format(number, e)) from e
+        records[epoch].append((lat, lon, val))
+    return dict(records)
+
+
+def infer_range(coordinates: Iterable[float],
+                descending: bool = False) -> SpatialRange:
+    """
+    Makes range from coordinates of nodes, step is the smallest distance
+    between neighbour coordinates.
+
+    :param coordinates: coordinates of nodes with data
+    :type coordinates: iterable of float
+
+    :param descending: range goes from maximum to minimum (latitudes in
+        IONEX go from north to south)
+    :type descending: bool
+
+    :rtype: SpatialRange
+    """
+    values = sorted(set(coordinates))
+    if not values:
+        raise ConversionError("There are no coordinates to infer grid")
+    step = min((b - a for a, b in zip(values, values[1:])), default=0)
+    step = round(step, 6)
+    try:
+        if descending:
+            return SpatialRange(values[-1], values[0], -step)
+        return SpatialRange(values[0], values[-1], step)
+    except RANGE_ERRORS as e:
+        raise ConversionError("Could not infer grid: {}".format(e)) from e
+
+
+def _make_map(lat_range: SpatialRange,
+              lon_range: SpatialRange,
+              height: float,
+              epoch: datetime,
+              rows: list[list]) -> IonexMap:
+    ionex_map = IonexMap(lat_range, lon_range, height, epoch)
+    for lat, row in zip(lat_range.coordinates, rows):
+        ionex_map.set_values(lat, row)
+    return ionex_map
+
+
+def build_file(maps: dict[datetime, IonexMap],
+               options: ConversionOptions,
+               instrumentation: Instrumentation | None = None) -> IonexFile:
+    """
+    Makes file with header for maps on the same grid. Interval is the
+    smallest difference between epochs.
+
+    :param maps: maps with keys as epochs
+    :type maps: dict
+
+    :param options: conversion options
+    :type options: ConversionOptions
+
+    :param instrumentation: stats set to file before header is built
+    :type instrumentation: Instrumentation
+
+    :rtype: IonexFile
+    """
+    if not maps:
+        raise ConversionError("There are no maps to convert")
+    epochs = sorted(maps)
+    first = maps[epochs[0]]
+    interval = min(
+        (int((b - a).total_seconds()) for a, b in zip(epochs, epochs[1:])),
+        default=0
+    )
+    ionex_file = IonexFile()
+    ionex_file.instrumentation = instrumentation
+    ionex_file.set_version_type_gnss()
+    ionex_file.set_label("PGM / RUN BY / DATE", [
+        "ionex_formatter", options.center.upper(),
+        datetime.now(timezone.utc).strftime("%d-%b-%y %H:%M").upper()
+    ])
+    if options.description:
+        ionex_file.set_description(options.description)
+    ionex_file.set_epoch_range(epochs[0], epochs[-1])
+    ionex_file.set_label("INTERVAL", [interval])
+    ionex_file.set_label("# OF MAPS IN FILE", [len(epochs)])
+    ionex_file.set_map_dimension(2)
+    ionex_file.set_spatial_grid(first.lat_range, first.lon_range,
+                                SpatialRange(first.height, first.height, 0))
+    ionex_file.set_label("EXPONENT", [options.exponent])
+    ionex_file.set_maps(maps, IonexMapType.TEC)
+    return ionex_file
+
+
+def _ingest_stage(instrumentation: Instrumentation | None):
+    # reading of input is recorded as 'ingest' stage
+    if instrumentation is None:
+        return nullcontext(dict())
+    return instrumentation.stage("ingest")
+
+
+def convert_records(records: dict[datetime, list[tuple]],
+                    options: ConversionOptions,
+                    instrumentation: Instrumentation | None = None
+                    ) -> IonexFile:
+    """
+    Converts (lat, lon, val) records grouped by epoch into IONEX file.
+    Values are given in TECU and scaled by exponent, nodes without
+    records are set to NO_VALUE.
+
+    :param instrumentation: stats of conversion and of written file
+    :type instrumentation: Instrumentation
+
+    :raises ConversionError: if coordinates are not nodes of grid
+    """
+    if not records:
+        raise ConversionError("There are no records to convert")
+    lat_range = options.lat_range or infer_range(
+        (r[0] for rows in records.values() for r in rows), descending=True
+    )
+    lon_range = options.lon_range or infer_range(
+        r[1] for rows in records.values() for r in rows
+    )
+    lats = lat_range.get_node_number()
+    lons = lon_range.get_node_number()
+    scale = 10 ** -options.exponent
+    maps = dict()
+    for epoch, rows in records.items():
+        values = [[IonexMap.NO_VALUE] * lons for _ in range(lats)]
+        try:
+            for lat, lon, val in rows:
+                values[lat_range.index(lat)][lon_range.index(lon)] = \
+                    round(val * scale)
+        except OffGridCoordinateError as e:
+            raise ConversionError("Epoch {}: {}".format(epoch, e)) from e
+        maps[epoch] = _make_map(lat_range, lon_range, options.height,
+                                epoch, values)
+    return build_file(maps, options, instrumentation)
+
+
+def convert_csv(stream: TextIO,
+                options: ConversionOptions | None = None,
+                instrumentation: Instrumentation | None = None
+                ) -> IonexFile:
+    """
+    Converts CSV (see read_csv) into IONEX file.
+
+    :param instrumentation: stats of conversion, reading of CSV is
+        recorded as 'ingest' stage, the same stats are set to file
+    :type instrumentation: Instrumentation
+
+    :rtype: IonexFile
+    """
+    with _ingest_stage(instrumentation) as counters:
+        records = read_csv(stream)
+        counters["records"] = sum(len(rows) for rows in records.values())
+    return convert_records(records, options or ConversionOptions(),
+                           instrumentation)
+
+
+def convert_grid(data: dict,
+                 options: ConversionOptions | None = None,
+                 instrumentation: Instrumentation | None = None
+                 ) -> IonexFile:
+    """
+    Converts gridded arrays into IONEX file. Data are given as dict (for
+    example loaded from JSON)::
+
+        {
+            "lat": [87.5, -87.5, -2.5],
+            "lon": [-180, 180, 5],
+            "height": 450,
+            "maps": [
+                {"epoch": "2010-12-28T00:00:00", "values": [[...], ...]}
+            ]
+        }
+
+    Values are TECU given as rows per latitude or as flat list in (lat,
+    lon) order, None is a missing value. Height is optional.
+
+    :param instrumentation: stats of conversion, reading of maps is
+        recorded as 'ingest' stage, the same stats are set to file
+    :type instrumentation: Instrumentation
+
+    :raises ConversionError: if data does not match grid
+    """
+    options = options or ConversionOptions()
+    try:
+        lat_range = SpatialRange(*data["lat"])
+        lon_range = SpatialRange(*data["lon"])
+        height = float(data.get("height", options.height))
+        items = data["maps"]
+    except (KeyError, TypeError, ValueError, *RANGE_ERRORS) as e:
+        raise ConversionError("Wrong grid description: {}".format(e)) from e
+    lats = lat_range.get_node_number()
+    lons = lon_range.get_node_number()
+    scale = 10 ** -options.exponent
+    maps = dict()
+    with _ingest_stage(instrumentation) as counters:
+        for item in items:
+            try:
+                epoch = datetime.fromisoformat(item["epoch"])
+                values = item["values"]
+                if values and not isinstance(values[0], list):
+                    if len(values) != lats * lons:
+                        values = [values]
+                    else:
+                        values = [values[i * lons: (i + 1) * lons]
+                                  for i in range(lats)]
+                if len(values) != lats or any(len(row) != lons
+                                              for row in values):
+                    msg = "values do not match grid {}x{}"
+                    raise ConversionError(msg.format(lats, lons))
+                rows = [
+                    [IonexMap.NO_VALUE if v is None else round(v * scale)
+                     for v in row]
+                    for row in values
+                ]
+            except (KeyError, TypeError, ValueError) as e:
+                raise ConversionError("Map {}: {}".format(
+                    item.get("epoch") if isinstance(item, dict) else item, e
+                )) from e
+            maps[epoch] = _make_map(lat_range, lon_range, height, epoch,
+                                    rows)
+        counters["records"] = len(maps) * lats * lons
+    return build_file(maps, options, instrumentation)
+
+
+def output_name(ionex_file: IonexFile,
+                options: ConversionOptions,
+                file_index: str | int = 0) -> str:
+    """
+    Returns name of file following convention cccedddh.yyI for the first
+    map of file.
+    """
+    epochs = [epoch for maps in ionex_file.maps.values() for epoch in maps]
+    return get_file_name(options.center, min(epochs), options.region,
+                         file_index)
+
+
+def warm_up(lat_range: SpatialRange,
+            lon_range: SpatialRange,
+            height: float = 450.0) -> None:
+    """
+    Fills shared caches of formatter for grid: format tokens of header
+    and value lines and grid lines, so the first conversion on the grid
+    is not slower than others.
+    """
+    epoch = datetime(2000, 1, 1)
+    ionex_map = IonexMap(lat_range, lon_range, height, epoch)
+    nodes = lon_range.get_node_number()
+    for lat in lat_range.coordinates:
+        ionex_map.set_values(lat, [IonexMap.NO_VALUE] * nodes)
+    ionex_file = build_file({epoch: ionex_map}, ConversionOptions())
+    ionex_file.get_header_lines()
+    ionex_file.format_map(IonexMapType.TEC, 1, epoch, ionex_map)
@@ -0,0 +1,341 @@
+import argparse
+import io
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import compress
+from pathlib import Path
+
+from .compression import SUFFIXES, open_input
+from .formatter import IonexFile
+from .ionex_map import IonexMap
+from .reader import IonexIndex, IonexReader
+
+NO_VALUE_TOKEN = b"%5d" % IonexMap.NO_VALUE
+
+
+@dataclass
+class MapDiff:
+    """
+    Difference of two maps with the same type and epoch (second minus
+    first) in units of the data (TECU for TEC maps), cells where either
+    map has no value are not compared.
+    """
+    dtype: str
+    epoch: datetime
+    identical: bool
+    count: int = 0
+    bias: float = 0.0
+    rms: float = 0.0
+    max_abs: float = 0.0
+    missing_first: int = 0
+    missing_second: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "dtype": self.dtype,
+            "epoch": self.epoch.isoformat(),
+            "identical": self.identical,
+            "count": self.count,
+            "bias": self.bias,
+            "rms": self.rms,
+            "max_abs": self.max_abs,
+            "missing_first": self.missing_first,
+            "missing_second": self.missing_second,
+        }
+
+
+@dataclass
+class CellStats:
+    """
+    Per-cell accumulators over all compared maps of single type, cells are
+    in order of rows() of maps. Identical maps add zero differences.
+    """
+    count: list[int]
+    total: list[float]
+    squares: list[float]
+    max_abs: list[float]
+
+    @classmethod
+    def create(cls, size: int) -> "CellStats":
+        return cls([0] * size, [0.0] * size, [0.0] * size, [0.0] * size)
+
+    def bias(self) -> list[float | None]:
+        return [t / c if c else None for t, c in zip(self.total, self.count)]
+
+    def rms(self) -> list[float | None]:
+        return [math.sqrt(s / c) if c else None
+                for s, c in zip(self.squares, self.count)]
+
+
+@dataclass
+class FileDiff:
+    """
+    Map-level difference of two files. Maps are aligned by type and epoch,
+    maps that exist in only one file are listed in only_first and
+    only_second.
+    """
+    first: str
+    second: str
+    maps: list[MapDiff] = field(default_factory=list)
+    only_first: list[tuple[str, datetime]] = field(default_factory=list)
+    only_second: list[tuple[str, datetime]] = field(default_factory=list)
+    cells: dict[str, CellStats] = field(default_factory=dict)
+
+    @property
+    def identical(self) -> int:
+        return sum(1 for m in self.maps if m.identical)
+
+    def summary(self) -> dict:
+        """
+        Totals over all compared maps: bias and RMS are weighted by
+        number of compared cells of each map.
+        """
+        count = sum(m.count for m in self.maps)
+        total = sum(m.bias * m.count for m in self.maps)
+        squares = sum(m.rms ** 2 * m.count for m in self.maps)
+        return {
+            "first": self.first,
+            "second": self.second,
+            "maps": len(self.maps),
+            "identical": self.identical,
+            "only_first": len(self.only_first),
+            "only_second": len(self.only_second),
+            "count": count,
+            "bias": total / count if count else 0.0,
+            "rms": math.sqrt(squares / count) if count else 0.0,
+            "max_abs": max((m.max_abs for m in self.maps), default=0.0),
+            "missing_first": sum(m.missing_first for m in self.maps),
+            "missing_second": sum(m.missing_second for m in self.maps),
+        }
+
+
+class _IndexedFile:
+    """
+    Uncompressed content of file with index of its map blocks.
+    """
+
+    def __init__(self, path: str | Path):
+        with open_input(path) as stream:
+            self.content = stream.read()
+        self.reader = IonexReader(io.BytesIO(self.content))
+        self.index: IonexIndex = self.reader.index()
+
+    def block(self, key) -> bytes:
+        block = self.index.blocks[key]
+        return self.content[block.offset: block.offset + block.size]
+
+    def read_map(self, key) -> IonexMap:
+        return self.reader.read_map(self.block(key))
+
+
+def _body(block: bytes) -> bytes:
+    # START OF and END OF ... MAP lines hold index of map in file, which
+    # could differ for the same map
+    return block[block.find(b"\n") + 1: block.rfind(b"\n", 0, -1)]
+
+
+def _valid_cells(block: bytes) -> list[bool]:
+    """
+    Finds cells with values in map block without parsing values: every I5
+    token of data lines is compared with NO_VALUE token.
+    """
+    valid = list()
+    for line in block.splitlines():
+        label = line[IonexFile.header_line_length:].strip()
+        if label.startswith((b"START OF", b"END OF")) or \
+                label in (b"EPOCH OF CURRENT MAP", b"LAT/LON1/LON2/DLON/H"):
+            continue
+        line = line.rstrip()
+        valid.extend(line[i: i + 5] != NO_VALUE_TOKEN
+                     for i in range(0, len(line), 5))
+    return valid
+
+
+def _cell_stats(result: FileDiff, dtype: str, size: int) -> CellStats:
+    cells = result.cells.get(dtype)
+    if cells is None:
+        cells = result.cells[dtype] = CellStats.create(size)
+    elif len(cells.count) != size:
+        raise ValueError("Grids of {} maps differ".format(dtype))
+    return cells
+
+
+def _grid(ionex_map) -> tuple:
+    ranges = [ionex_map.lat_range, ionex_map.lon_range,
+              getattr(ionex_map, "height_range", None)]
+    grid = tuple((r.vmin, r.vmax, r.vstep) for r in ranges if r is not None)
+    return grid + (getattr(ionex_map, "height", None),)
+
+
+def _compare_maps(first, second, first_scale: float, second_scale: float,
+                  result: MapDiff, cells: CellStats) -> None:
+    no_value = IonexMap.NO_VALUE
+    count = 0
+    total = squares = max_abs = 0.0
+    k = 0
+    c_count, c_total = cells.count, cells.total
+    c_squares, c_max = cells.squares, cells.max_abs
+    for (_, _, a_values), (_, _, b_values) in zip(first.rows(),
+                                                  second.rows()):
+        for a, b in zip(a_values, b_values):
+            if a == no_value or b == no_value:
+                if a == no_value and b != no_value:
+                    result.missing_first += 1
+                elif b == no_value and a != no_value:
+                    result.missing_second += 1
+                k += 1
+                continue
+            d = b * second_scale - a * first_scale
+            count += 1
+            total += d
+            squares += d * d
+            if abs(d) > max_abs:
+                max_abs = abs(d)
+            c_count[k] += 1
+            c_total[k] += d
+            c_squares[k] += d * d
+            if abs(d) > c_max[k]:
+                c_max[k] = abs(d)
+            k += 1
+    result.count = count
+    if count:
+        result.bias = total / count
+        result.rms = math.sqrt(squares / count)
+        result.max_abs = max_abs
+
+
+def diff_files(first: str | Path, second: str | Path) -> FileDiff:
+    """
+    Compares maps of two IONEX files (plain or compressed) with the same
+    grid.
+
+    Files are indexed without parsing map values. Map blocks with the
+    same bytes (exponents of files are equal) are marked identical and not
+    parsed, their cells with values are counted as zero differences in
+    totals. Other blocks are parsed and compared cell by cell.
+
+    :param first: path to the first file
+    :type first: str or Path
+
+    :param second: path to the second file
+    :type second: str or Path
+
+    :raises ValueError: when grids of maps differ
+    :rtype: FileDiff
+    """
+    a, b = _IndexedFile(first), _IndexedFile(second)
+    result = FileDiff(str(first), str(second))
+    a_keys, b_keys = set(a.index.blocks), set(b.index.blocks)
+    result.only_first = [(dtype.name, epoch) for dtype, epoch
+                         in sorted(a_keys - b_keys, key=lambda k: k[1])]
+    result.only_second = [(dtype.name, epoch) for dtype, epoch
+                          in sorted(b_keys - a_keys, key=lambda k: k[1])]
+    a_exponent, b_exponent = a.index.exponent, b.index.exponent
+    a_scale, b_scale = 10.0 ** a_exponent, 10.0 ** b_exponent
+    grid = None
+    for key in sorted(a_keys & b_keys, key=lambda k: (k[1], k[0].value)):
+        dtype, epoch = key
+        if a_exponent == b_exponent and \
+                _body(a.block(key)) == _body(b.block(key)):
+            # valid cells of identical maps are zero differences
+            valid = _valid_cells(a.block(key))
+            cells = _cell_stats(result, dtype.name, len(valid))
+            count = cells.count
+            for k in compress(range(len(valid)), valid):
+                count[k] += 1
+            result.maps.append(MapDiff(dtype.name, epoch, True,
+                                       count=sum(valid)))
+            continue
+        first_map, second_map = a.read_map(key), b.read_map(key)
+        if grid is None:
+            grid = _grid(first_map)
+        if _grid(first_map) != grid or _grid(second_map) != grid:
+            raise ValueError("Grids of maps for {} {} differ".format(
+                dtype.name, epoch.isoformat()))
+        size = sum(len(values) for _, _, values in first_map.rows())
+        map_diff = MapDiff(dtype.name, epoch, False)
+        _compare_maps(first_map, second_map, a_scale, b_scale, map_diff,
+                      _cell_stats(result, dtype.name, size))
+        result.maps.append(map_diff)
+    return result
+
+
+def _archive_key(path: Path) -> str:
+    name = path.name
+    if path.suffix in SUFFIXES:
+        name = name[:-len(path.suffix)]
+    return name.lower()
+
+
+def pair_archives(first_dir: str | Path,
+                  second_dir: str | Path) -> list[tuple[Path, Path]]:
+    """
+    Pairs files of two directories by name ignoring case and compression
+    suffix, for example mosg3620.10i and MOSG3620.10I.gz.
+    """
+    second = {_archive_key(p): p for p in Path(second_dir).iterdir()
+              if p.is_file()}
+    pairs = list()
+    for path in sorted(Path(first_dir).iterdir()):
+        if path.is_file() and _archive_key(path) in second:
+            pairs.append((path, second[_archive_key(path)]))
+    return pairs
+
+
+def _diff_pair(pair: tuple[Path, Path]) -> FileDiff:
+    return diff_files(*pair)
+
+
+def diff_archives(pairs: list[tuple[Path, Path]],
+                  workers: int | None = None) -> list[FileDiff]:
+    """
+    Compares pairs of files in pool of worker processes, files are
+    compared independently, so archives of a year use all cores.
+
+    :param pairs: pairs of paths, see pair_archives
+    :type pairs: list
+
+    :param workers: number of processes, files are compared in current
+        process when it is 1
+    :type workers: int
+
+    :rtype: list of FileDiff in order of pairs
+    """
+    if workers == 1 or len(pairs) < 2:
+        return [_diff_pair(pair) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_diff_pair, pairs))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ionex_formatter.diff",
+        description="Map-level differences of two IONEX files or of two "
+                    "directories with IONEX files"
+    )
+    parser.add_argument("first")
+    parser.add_argument("second")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--maps", action="store_true",
+                        help="print statistics of every map")
+    args = parser.parse_args(argv)
+
+    if Path(args.first).is_dir() and Path(args.second).is_dir():
+        pairs = pair_archives(args.first, args.second)
+        results = diff_archives(pairs, args.workers)
+    else:
+        results = [diff_files(args.first, args.second)]
+    for result in results:
+        summary = result.summary()
+        if args.maps:
+            summary["per_map"] = [m.to_dict() for m in result.maps]
+        print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
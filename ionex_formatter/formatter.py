@@ -1,11 +1,18 @@
 from datetime import datetime
 from collections import defaultdict
-from typing import Any
+from pathlib import Path
+from time import perf_counter
+from typing import Any, BinaryIO
 from enum import Enum
+from numbers import Integral
 
 from .spatial import SpatialRange
 from .ionex_format import IonexHeader
-from .ionex_map import IonexMap
+from .ionex_map import IonexMap, IonexMap3D
+from .compression import Compression, open_output
+from .header_model import IonexHeaderModel
+from .instrumentation import Instrumentation
+from .validation import MapStackValidator, ValidationReport
 
 class UnknownFormatingError(Exception):
     def __init__(self, msg):
@@ -57,18 +64,46 @@ class IonexMapType(Enum):
     HGT = 3
 
 
+class VerificationLevel(Enum):
+    """
+    How formatted values are verified when file is written.
+
+    STRICT - every value is converted back and compared with original one,
+    FAST - only type and width of formatted values are checked (for map
+    values it is a single type and min/max check per latitude), OFF - no
+    checks at all, map values should be integers in I5 range since floats
+    are truncated by %d formatting.
+    """
+    STRICT = 1
+    FAST = 2
+    OFF = 3
+
+
 class IonexFile:
     
     header_line_length = 60
     max_line_length = 80
     VALUES_PER_LINE = 16
-
+    MAP_LABELS = {
+        IonexMapType.TEC: ("START OF TEC MAP", "END OF TEC MAP"),
+        IonexMapType.RMS: ("START OF RMS MAP", "END OF RMS MAP"),
+        IonexMapType.HGT: ("START OF HEIGHT MAP", "END OF HEIGHT MAP"),
+    }
+    MIN_VALUE = -9999
+    MAX_VALUE = 99999
+    # unwrapped tokens of format strings shared by all instances
+    _FORMAT_TOKENS = dict()
+    _GRID_LINES = dict()
     
     def __init__(self):
         self._raw_data = dict()
-        self.header = defaultdict(list)
+        # read-only mapping label -> lines, changed by set_* methods
+        self.header = IonexHeaderModel(self._render_header_entry)
         self.header_format = IonexHeader()
+        self.verification = VerificationLevel.STRICT
         self.maps = defaultdict(dict)
+        # stats and hooks of writer stages, disabled when None
+        self.instrumentation: Instrumentation | None = None
         self.set_header_order()
 
     def set_maps(self, maps: dict[list], dtype: IonexMapType):
@@ -87,6 +122,34 @@ class IonexFile:
         """
         self.maps[dtype] = maps
 
+    def validate(self, interval: int | None = None) -> ValidationReport:
+        """
+        Validates all maps at once and reports all found problems.
+
+        Maps are checked against grid set to header, maps of file without
+        grid in header are checked against grid of the first map.
+
+        :param interval: expected interval between maps in seconds, if 
+            None the most common interval is expected
+        :type interval: int
+
+        :rtype: ValidationReport
+        """
+        report = ValidationReport()
+        lat_range = self.get_header_range("LAT1 / LAT2 / DLAT")
+        lon_range = self.get_header_range("LON1 / LON2 / DLON")
+        for maps in self.maps.values():
+            if not maps:
+                continue
+            first = next(iter(maps.values()))
+            validator = MapStackValidator(lat_range or first.lat_range,
+                                          lon_range or first.lon_range,
+                                          interval,
+                                          self.MIN_VALUE,
+                                          self.MAX_VALUE)
+            report.issues.extend(validator.validate_maps(maps).issues)
+        return report
+
     def get_map_lines(self, dtype: IonexMapType, epoch: datetime) -> list[str]:
         """
         Make formatted output for map.
@@ -98,15 +161,53 @@ class IonexFile:
         :type epoch: datetime
 
         """
-        lines = list()
         maps: dict = self.maps[dtype]
         epoch_map: IonexMap = maps[epoch]
         epochs = list(maps.keys())
         epochs.sort()
         map_index = epochs.index(epoch) + 1
+        return self.format_map(dtype, map_index, epoch, epoch_map)
+
+    def format_map(self,
+                   dtype: IonexMapType,
+                   map_index: int,
+                   epoch: datetime,
+                   epoch_map: IonexMap) -> list[str]:
+        """
+        Make formatted output for map with known index in file.
+
+        :param dtype: type of map to be formatted
+        :type dtype: IonexMapType
+
+        :param map_index: index of map in file starting from 1
+        :type map_index: int
+
+        :param epoch: time (epoch) of map to be formatted
+        :type epoch: datetime
+
+        :param epoch_map: map to be formatted, for 3-dimensional map
+            blocks are written for every height
+        :type epoch_map: IonexMap or IonexMap3D
+        """
+        if self.instrumentation is None:
+            return self._format_map(dtype, map_index, epoch, epoch_map)
+        start = perf_counter()
+        lines = self._format_map(dtype, map_index, epoch, epoch_map)
+        values = sum(len(row[2]) for row in epoch_map.rows())
+        self.instrumentation.record("encode", start, perf_counter(),
+                                    maps=1, values=values)
+        return lines
+
+    def _format_map(self,
+                    dtype: IonexMapType,
+                    map_index: int,
+                    epoch: datetime,
+                    epoch_map: IonexMap) -> list[str]:
+        lines = list()
+        start_label, end_label = self.MAP_LABELS[dtype]
 
         # add START OF TEC MAP line
-        label = "START OF TEC MAP"
+        label = start_label
         line_format = self.header_format.HEADER_FORMATS[label]
         line  = self.format_header_line([map_index], line_format)
         lines.append((line+label).ljust(self.max_line_length))
@@ -117,34 +218,192 @@ class IonexFile:
         lines.append((line+label).ljust(self.max_line_length))
         
         # add values for same latitude
-        for lat, lon_data in epoch_map.data.items():
+        chunks = epoch_map.lon_range.get_chunks(self.VALUES_PER_LINE)
+        grid_lines = None
+        grid_height = None
+        for height, lat, lon_data in epoch_map.rows():
             # add grid specifier
-            label = "LAT/LON1/LON2/DLON/H"
-            line_format = self.header_format.HEADER_FORMATS[label]
-            grid_data =[
-                lat, 
-                epoch_map.lon_range.vmin, 
-                epoch_map.lon_range.vmax, 
-                epoch_map.lon_range.vstep, 
-                epoch_map.height
-            ]
-            line = self.format_header_line(grid_data, line_format)
-            lines.append((line+label).ljust(self.max_line_length))
+            if grid_lines is None or height != grid_height:
+                grid_height = height
+                grid_lines = self._get_grid_lines(epoch_map.lat_range,
+                                                  epoch_map.lon_range,
+                                                  height)
+            line = grid_lines.get(lat)
+            if line is None:
+                line = self._format_grid_line(lat, epoch_map.lon_range,
+                                              height)
+            lines.append(line)
 
             # add map data
-            chunks = epoch_map.lon_range.get_chunks(self.VALUES_PER_LINE)
+            if self.verification == VerificationLevel.FAST:
+                self._verify_values_width(lon_data)
             for start, end in chunks:
-                fmt = "{}I5".format(end - start)
-                line = self.format_header_line(lon_data[start: end], fmt)
+                line = self._format_values(lon_data[start: end])
                 lines.append(line.ljust(self.max_line_length))
 
         # add end of map
-        label = "END OF TEC MAP"
+        label = end_label
         line_format = self.header_format.HEADER_FORMATS[label]
         line  = self.format_header_line([map_index], line_format)
         lines.append((line+label).ljust(self.max_line_length))
         return lines
 
+    def _format_grid_line(self,
+                          lat: float,
+                          lon_range: SpatialRange,
+                          height: float) -> str:
+        """
+        Formats LAT/LON1/LON2/DLON/H line for single latitude.
+        """
+        label = "LAT/LON1/LON2/DLON/H"
+        line_format = self.header_format.HEADER_FORMATS[label]
+        grid_data = [
+            lat,
+            lon_range.vmin,
+            lon_range.vmax,
+            lon_range.vstep,
+            height
+        ]
+        line = self.format_header_line(grid_data, line_format)
+        return (line + label).ljust(self.max_line_length)
+
+    def _get_grid_lines(self,
+                        lat_range: SpatialRange,
+                        lon_range: SpatialRange,
+                        height: float) -> dict[float, str]:
+        """
+        Returns LAT/LON1/LON2/DLON/H lines for every node of lat_range.
+        Lines are formatted once per process for each grid and height and
+        shared by all maps on this grid.
+        """
+        key = (lat_range, lon_range, height)
+        grid_lines = self._GRID_LINES.get(key)
+        if grid_lines is None:
+            grid_lines = {
+                lat: self._format_grid_line(lat, lon_range, height)
+                for lat in lat_range.coordinates
+            }
+            self._GRID_LINES[key] = grid_lines
+        return grid_lines
+
+    def _format_values(self, values: list) -> str:
+        """
+        Formats map values using I5 format. Values are verified one by one
+        only for strict verification level.
+        """
+        if self.verification == VerificationLevel.STRICT:
+            fmt = "{}I5".format(len(values))
+            return self.format_header_line(values, fmt)
+        return ("%5d" * len(values)) % tuple(values)
+
+    def _verify_values_width(self, values: list) -> None:
+        if not values:
+            return
+        # floats are rejected as in strict mode instead of being truncated
+        for value_type in set(map(type, values)):
+            if not issubclass(value_type, Integral):
+                msg = "Map values should be integers, got {}"
+                raise ValueError(msg.format(value_type.__name__))
+        low = min(values)
+        high = max(values)
+        if low < self.MIN_VALUE:
+            raise NumericTokenTooBig(low, 5, 0)
+        if high > self.MAX_VALUE:
+            raise NumericTokenTooBig(high, 5, 0)
+
+    def get_header_lines(self) -> list[str]:
+        """
+        Make formatted header lines in order given by line_order.
+
+        END OF HEADER line is added if it was not set explicitly.
+        """
+        start = perf_counter()
+        lines = list()
+        for label in self.line_order:
+            lines.extend(self.header[label])
+        if "END OF HEADER" not in self.header:
+            lines.append(self._get_end_line("END OF HEADER"))
+        if self.instrumentation is not None:
+            self.instrumentation.record("header", start, perf_counter())
+        return lines
+
+    def iter_blocks(self, header_lines: list[str] | None = None):
+        """
+        Iterates over formatted parts of the file.
+
+        First block is the header, then every map is a separate block
+        (TEC maps first, then RMS and HGT maps) and the last block is 
+        END OF FILE line. Hence whole file is never stored in memory.
+
+        :param header_lines: already formatted header (for example stamped
+            from HeaderTemplate), if None header is formatted from labels
+        :type header_lines: list
+
+        :returns: generator of list of lines
+        """
+        if header_lines is None:
+            header_lines = self.get_header_lines()
+        yield header_lines
+        for dtype in IonexMapType:
+            maps = self.maps.get(dtype, {})
+            for map_index, epoch in enumerate(sorted(maps), start=1):
+                yield self.format_map(dtype, map_index, epoch, maps[epoch])
+        yield [self._get_end_line("END OF FILE")]
+
+    def write(self,
+              target: str | Path | BinaryIO,
+              compression: Compression | None = None,
+              level: int | None = None,
+              threads: int = 1,
+              header_lines: list[str] | None = None) -> None:
+        """
+        Writes IONEX file streaming data directly to compressor.
+
+        :param target: path to output file or binary stream
+        :type target: str, Path or BinaryIO
+
+        :param compression: compression of output, if None it is guessed 
+            from file suffix (.gz, .bz2, .xz)
+        :type compression: Compression
+
+        :param level: compression level, if None default level is used
+        :type level: int
+
+        :param threads: number of threads for gzip compression
+        :type threads: int
+
+        :param header_lines: already formatted header, if None header is
+            formatted from labels
+        :type header_lines: list
+        """
+        with open_output(target, compression, level, threads) as stream:
+            for lines in self.iter_blocks(header_lines):
+                self.write_block(stream, lines)
+
+    def write_block(self, stream: BinaryIO, lines: list[str]) -> None:
+        """
+        Writes formatted lines to binary stream, time of write and number
+        of lines and bytes are recorded by instrumentation if it is set.
+
+        :param stream: output stream
+        :type stream: BinaryIO
+
+        :param lines: formatted lines
+        :type lines: list
+        """
+        data = ("\n".join(lines) + "\n").encode("ascii")
+        if self.instrumentation is None:
+            stream.write(data)
+            return
+        start = perf_counter()
+        stream.write(data)
+        self.instrumentation.record("write", start, perf_counter(),
+                                    lines=len(lines), bytes=len(data))
+
+    def _get_end_line(self, label: str) -> str:
+        line = "".rjust(self.header_line_length) + label
+        return line.ljust(self.max_line_length)
+
     def set_header_order(self, order: list=[]):
         """
         Set new order of lines to be listed in header
@@ -162,7 +421,7 @@ class IonexFile:
             "COMMENT",
             "EPOCH OF FIRST MAP",
             "EPOCH OF LAST MAP",
-            "INTERVAL"
+            "INTERVAL",
             "# OF MAPS IN FILE",
             "MAPPING FUNCTION",
             "ELEVATION CUTOFF",
@@ -209,10 +468,7 @@ class IonexFile:
         :type sites: list[str]
         """
         self._raw_data["sites"] = sites
-        label = "COMMENT"
-        sites_lines = self._format_header_long_string(" ".join(sites), 
-                                                      label)
-        self.header[label].extend(sites_lines)
+        self.header.append("COMMENT", "text", " ".join(sites))
 
     def add_comment(self, comment: str | list) -> None:
         """
@@ -223,25 +479,90 @@ class IonexFile:
         :type description: string or list
         """
         self._raw_data["comment"] = comment
-        label = "COMMENT"
-        header_lines = []
-        if isinstance(comment, str):
-            header_lines = self._format_header_long_string(comment, label)
-        else:
-            for line in comment:
-                _line = line.ljust(self.header_line_length) + label
-                header_lines.append(_line.ljust(self.max_line_length))
-        self.header[label].extend(header_lines)
+        self.header.append("COMMENT", *self._text_entry(comment))
+
+    def set_comment(self, comment: str | list) -> None:
+        """
+        Replaces all comments (including list of sites) in IONEX file 
+        header. Other header lines are not formatted again.
+
+        :param comment: description to be stored under COMMENT label
+            in IONEX file header
+        :type description: string or list
+        """
+        self._raw_data["comment"] = comment
+        self.header.set("COMMENT", [self._text_entry(comment)])
 
     def update_label(self, label: str, data: list) -> None:
         """
         Wrapper over format_header_line using line label instead of
-        line format.
+        line format. Adds line to lines already stored under label.
+
+        :raises NumericTokenTooBig: if data does not fit label format,
+            header is not changed then
         """
-        line_format = self.header_format.HEADER_FORMATS[label]
-        formatted  = self.format_header_line(data, line_format)
-        line = formatted + label
-        self.header[label].append(line.ljust(self.max_line_length))
+        if label not in self.header_format.HEADER_FORMATS:
+            raise UnknownLabelError(label)
+        self.header.append(label, "values", list(data))
+
+    def set_label(self, label: str, data: list) -> None:
+        """
+        The same as update_label but replaces lines stored under label.
+        """
+        if label not in self.header_format.HEADER_FORMATS:
+            raise UnknownLabelError(label)
+        self.header.set(label, [("values", list(data))])
+
+    def _text_entry(self, text: str | list) -> tuple[str, Any]:
+        if isinstance(text, str):
+            return ("text", text)
+        return ("lines", list(text))
+
+    def _render_header_entry(self, label: str, kind: str, value: Any):
+        """
+        Formats single value stored in header model. Called when value
+        is set, time is recorded as 'header_entry' stage.
+
+        :param label: header label
+        :type label: str
+
+        :param kind: kind of value: 'values' - list of data formatted
+            according to label format, 'text' - long string, 'lines' - list
+            of strings for separate lines, 'epoch' - datetime, 'range' - 
+            SpatialRange, 'raw' - already formatted line
+        :type kind: str
+
+        :returns: list of lines
+        """
+        if self.instrumentation is None:
+            return self._format_header_entry(label, kind, value)
+        start = perf_counter()
+        lines = self._format_header_entry(label, kind, value)
+        self.instrumentation.record("header_entry", start, perf_counter(),
+                                    header_lines=len(lines))
+        return lines
+
+    def _format_header_entry(self, label: str, kind: str, value: Any):
+        if kind == "values":
+            line_format = self.header_format.HEADER_FORMATS[label]
+            line = self.format_header_line(value, line_format) + label
+        elif kind == "text":
+            return self._format_header_long_string(value, label)
+        elif kind == "lines":
+            lines = list()
+            for line in value:
+                _line = line.ljust(self.header_line_length) + label
+                lines.append(_line.ljust(self.max_line_length))
+            return lines
+        elif kind == "epoch":
+            line = self._get_header_date_time(value) + label
+        elif kind == "range":
+            line = self._format_range_line(value) + label
+        elif kind == "raw":
+            line = value
+        else:
+            raise ValueError("Unknown header entry kind {}".format(kind))
+        return [line.ljust(self.max_line_length)]
 
 
     def format_header_line(self, data: list, format_string: str) -> str:
@@ -268,8 +589,7 @@ class IonexFile:
              1.0            I                   BEN                5
         """
         formatted_line = ""
-        format_string = self.unwrap_format_spec(format_string)
-        tokens = format_string.split(', ')
+        tokens = self._get_format_tokens(format_string)
         val_tokens = [f for f in tokens if not 'X' in f]
 
         if len(val_tokens) != len(data):
@@ -297,9 +617,13 @@ class IonexFile:
             else:
                 raise UnknownFormatSpecifier(token)
             if token[-1] != 'X':
-                self._verify_formatted(
-                    data[i], token[0], formatted_data, width, precision
-                )
+                if self.verification == VerificationLevel.STRICT:
+                    self._verify_formatted(
+                        data[i], token[0], formatted_data, width, precision
+                    )
+                elif self.verification == VerificationLevel.FAST:
+                    if len(formatted_data) > width:
+                        raise NumericTokenTooBig(data[i], width, precision)
                 if token[0] == 'A':
                     formatted_data = formatted_data.ljust(width)
                 else:
@@ -309,6 +633,17 @@ class IonexFile:
         
         return formatted_line
 
+    def _get_format_tokens(self, format_string: str) -> tuple[str]:
+        """
+        Returns unwrapped tokens of format string, every format string is
+        unwrapped once per process.
+        """
+        tokens = self._FORMAT_TOKENS.get(format_string)
+        if tokens is None:
+            tokens = tuple(self.unwrap_format_spec(format_string).split(', '))
+            self._FORMAT_TOKENS[format_string] = tokens
+        return tokens
+
     def _verify_formatted(self, 
                           data: Any, 
                           fmt: str, 
@@ -385,20 +720,14 @@ class IonexFile:
         :type description: string
         """
         self._raw_data["description"] = description
-        label = "DESCRIPTION"
-        header_lines = []
-        if isinstance(description, str):
-            header_lines = self._format_header_long_string(description, label)
-        else:
-            for line in description:
-                _line = line.ljust(self.header_line_length) + label
-                header_lines.append(_line.ljust(self.max_line_length))
-        self.header[label] = header_lines 
+        self.header.set("DESCRIPTION", [self._text_entry(description)])
         
         
     def set_epoch_range(self, start: datetime, last: datetime) -> None:
         """
         Sets range of epoch that correspond to first and last map in file.
+        Previous range is replaced.
+
         :param start: time of the first map in IONEX file
         :type start: datetime.datetime
         
@@ -413,9 +742,7 @@ class IonexFile:
                "last_map_time": last}
         for time_type, time in times.items():
             _id = ids[time_type]
-            line = self._get_header_date_time(time) + _id
-            line = line.ljust(self.max_line_length)
-            self.header[_id].append(line)
+            self.header.set(_id, [("epoch", time)])
 
     def set_spatial_grid(self, 
                         lat_range: SpatialRange,
@@ -441,9 +768,6 @@ class IonexFile:
         :param lon_range: range and steps for longitude
         :type lon_range: SpatialRange
         """
-        width = 6
-        start_space = 2
-        fin_space = 40
         ranges = {"lat": lat_range, 
                   "lon": lon_range, 
                   "height":height_range}
@@ -455,16 +779,56 @@ class IonexFile:
             raise HeaderDuplicatedLine
         for rng_type, rng in ranges.items():
             rng.verify()
-            mnt = self._get_header_numeric_token(rng.vmin, width, rng.decimal)
-            mxt = self._get_header_numeric_token(rng.vmax, width, rng.decimal)
-            stp = self._get_header_numeric_token(rng.vstep, width, rng.decimal)
-            line = " " * start_space + mnt + mxt + stp + " " * fin_space
-            _id = ids[rng_type]
-            line = line + _id
-            line = line.ljust(self.max_line_length)
-            self.header[_id].append(line)
-            
-            
+        for rng_type, rng in ranges.items():
+            self.header.set(ids[rng_type], [("range", rng)])
+
+    def get_header_range(self, label: str) -> SpatialRange | None:
+        """
+        Returns spatial range set to header under label (for example
+        'LAT1 / LAT2 / DLAT'), lines read from file are parsed.
+
+        :param label: label of range line
+        :type label: str
+
+        :returns: SpatialRange or None if label is not set
+        """
+        entries = self.header.entries(label)
+        if not entries:
+            return None
+        kind, value = entries[0]
+        if kind == "range":
+            return value
+        line = self.header[label][0]
+        vmin, vmax, vstep = [float(line[i: i + 6]) for i in (2, 8, 14)]
+        return SpatialRange(vmin, vmax, vstep)
+
+    def set_map_dimension(self, dimension: int) -> None:
+        """
+        Sets MAP DIMENSION: 2 for maps on single height (IonexMap), 3 for
+        maps on several heights (IonexMap3D). Previous value is replaced.
+
+        :param dimension: dimension of maps
+        :type dimension: int
+
+        :raises ValueError: if dimension is not 2 or 3
+        """
+        if dimension not in (2, 3):
+            msg = "Map dimension should be 2 or 3, got {}".format(dimension)
+            raise ValueError(msg)
+        self.set_label("MAP DIMENSION", [dimension])
+
+    def _format_range_line(self, rng: SpatialRange) -> str:
+        """
+        Formats spatial range using format 2X, 3F6.1, 40X
+        """
+        width = 6
+        start_space = 2
+        fin_space = 40
+        mnt = self._get_header_numeric_token(rng.vmin, width, rng.decimal)
+        mxt = self._get_header_numeric_token(rng.vmax, width, rng.decimal)
+        stp = self._get_header_numeric_token(rng.vstep, width, rng.decimal)
+        return " " * start_space + mnt + mxt + stp + " " * fin_space
+
     def _get_header_numeric_token(self, 
                                   val: float, 
                                   width: int,
@@ -0,0 +1,228 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from .ionex_map import IonexMap
+from .spatial import SpatialRange
+
+
+class _EpochStats:
+    """
+    Running count, mean and sum of squared deviations for every node of
+    the grid at single epoch.
+    """
+
+    __slots__ = ("counts", "means", "m2")
+
+    def __init__(self, nodes: int):
+        self.counts = [0] * nodes
+        self.means = [0.0] * nodes
+        self.m2 = [0.0] * nodes
+
+
+class GridAccumulator:
+    """
+    Bins raw observations to grid nodes and epochs and makes TEC and RMS
+    maps out of them.
+
+    Observations are given in chunks, only per node statistics are kept
+    (count, mean and variance), so memory depends on grid size and number
+    of epochs, not on number of observations. Every chunk is reduced per
+    node first and then merged to running statistics (parallel variant of
+    Welford's algorithm), hence chunks could be of any size.
+
+    Observation is assigned to the nearest node of the grid and to the
+    nearest epoch start + k * interval. Observations that are further
+    than half of step from all nodes are dropped.
+
+    Usage::
+
+        accumulator = GridAccumulator(lat_range, lon_range, 450,
+                                      start=datetime(2010, 12, 28),
+                                      interval=3600)
+        for times, lats, lons, values in chunks:
+            accumulator.add(times, lats, lons, values)
+        tec_maps, rms_maps = accumulator.pop_maps()
+    """
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 height: float,
+                 start: datetime,
+                 interval: int,
+                 exponent: int = -1,
+                 min_count: int = 1):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param height: height of maps
+        :type height: float
+
+        :param start: epoch of the first map
+        :type start: datetime
+
+        :param interval: interval between maps in seconds
+        :type interval: int
+
+        :param exponent: exponent of map values (EXPONENT header label),
+            mean value 12.3 TECU is written as 123 for exponent -1
+        :type exponent: int
+
+        :param min_count: nodes with less observations are set to NO_VALUE
+        :type min_count: int
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.height = height
+        self.start = start
+        self.interval = interval
+        self.exponent = exponent
+        self.min_count = min_count
+        self.nodes = lat_range.get_node_number() * \
+            lon_range.get_node_number()
+        self._lat_tolerance = abs(lat_range.vstep) / 2
+        self._lon_tolerance = abs(lon_range.vstep) / 2
+        self._stats = dict()
+
+    @property
+    def epochs(self) -> list[datetime]:
+        """
+        Epochs that have at least one observation.
+        """
+        return sorted(self._stats)
+
+    def epoch_of(self, time: datetime) -> datetime:
+        """
+        Returns the nearest map epoch for given time.
+        """
+        seconds = (time - self.start).total_seconds()
+        k = round(seconds / self.interval)
+        return self.start + timedelta(seconds=k * self.interval)
+
+    def add(self,
+            times: list[datetime],
+            lats: list[float],
+            lons: list[float],
+            values: list[float]) -> int:
+        """
+        Adds chunk of observations.
+
+        :param times: time of every observation
+        :type times: list
+
+        :param lats: latitude of every observation
+        :type lats: list
+
+        :param lons: longitude of every observation
+        :type lons: list
+
+        :param values: observed values (TECU)
+        :type values: list
+
+        :returns: number of observations that were assigned to grid
+        :rtype: int
+
+        :raises ValueError: if lengths of lists differ
+        """
+        if not len(times) == len(lats) == len(lons) == len(values):
+            raise ValueError("Observation lists should have the same length")
+        lat_index = self.lat_range.indices(lats, self._lat_tolerance)
+        lon_index = self.lon_range.indices(lons, self._lon_tolerance)
+        lon_nodes = self.lon_range.get_node_number()
+
+        # reduce chunk per epoch and node: count and sum
+        chunk = defaultdict(dict)
+        for time, i, j, value in zip(times, lat_index, lon_index, values):
+            if i is None or j is None or not math.isfinite(value):
+                continue
+            cells = chunk[self.epoch_of(time)]
+            node = i * lon_nodes + j
+            cell = cells.get(node)
+            if cell is None:
+                cells[node] = [1, value, [value]]
+            else:
+                cell[0] += 1
+                cell[1] += value
+                cell[2].append(value)
+
+        accepted = 0
+        for epoch, cells in chunk.items():
+            stats = self._stats.get(epoch)
+            if stats is None:
+                stats = self._stats[epoch] = _EpochStats(self.nodes)
+            for node, (count, total, cell_values) in cells.items():
+                mean = total / count
+                m2 = sum((v - mean) ** 2 for v in cell_values)
+                self._merge(stats, node, count, mean, m2)
+                accepted += count
+        return accepted
+
+    @staticmethod
+    def _merge(stats: _EpochStats,
+               node: int,
+               count: int,
+               mean: float,
+               m2: float) -> None:
+        total = stats.counts[node] + count
+        delta = mean - stats.means[node]
+        stats.means[node] += delta * count / total
+        stats.m2[node] += m2 + delta ** 2 * stats.counts[node] * count / total
+        stats.counts[node] = total
+
+    def get_maps(self, epoch: datetime) -> tuple[IonexMap, IonexMap]:
+        """
+        Makes TEC map (mean value) and RMS map (standard deviation) for
+        epoch. Nodes without enough observations are set to NO_VALUE.
+
+        :rtype: tuple of IonexMap
+        """
+        stats = self._stats.get(epoch) or _EpochStats(self.nodes)
+        scale = 10 ** -self.exponent
+        tec = list()
+        rms = list()
+        for count, mean, m2 in zip(stats.counts, stats.means, stats.m2):
+            if count < self.min_count or count == 0:
+                tec.append(IonexMap.NO_VALUE)
+                rms.append(IonexMap.NO_VALUE)
+            else:
+                tec.append(round(mean * scale))
+                rms.append(round(math.sqrt(m2 / count) * scale))
+        return self._make_map(epoch, tec), self._make_map(epoch, rms)
+
+    def _make_map(self, epoch: datetime, values: list[int]) -> IonexMap:
+        ionex_map = IonexMap(self.lat_range, self.lon_range, self.height,
+                             epoch)
+        lon_nodes = self.lon_range.get_node_number()
+        for i, lat in enumerate(self.lat_range.coordinates):
+            ionex_map.set_values(
+                lat, values[i * lon_nodes: (i + 1) * lon_nodes]
+            )
+        return ionex_map
+
+    def pop_maps(self, until: datetime | None = None
+                 ) -> tuple[dict[datetime, IonexMap],
+                            dict[datetime, IonexMap]]:
+        """
+        Makes maps for epochs before until and drops their statistics.
+        Used to emit finished epochs while data of later epochs is still
+        added.
+
+        :param until: maps with earlier epochs are emitted, if None all
+            maps are emitted
+        :type until: datetime
+
+        :returns: TEC and RMS maps, keys are epochs
+        """
+        tec_maps = dict()
+        rms_maps = dict()
+        for epoch in self.epochs:
+            if until is not None and epoch >= until:
+                break
+            tec_maps[epoch], rms_maps[epoch] = self.get_maps(epoch)
+            del self._stats[epoch]
+        return tec_maps, rms_maps
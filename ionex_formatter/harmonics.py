@@ -0,0 +1,239 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .ionex_map import IonexMap
+from .spatial import SpatialRange
+
+
+@dataclass
+class HarmonicCoefficients:
+    """
+    Coefficients of spherical harmonic expansion of TEC for single epoch
+
+        TEC(lat, lon) = sum P_nm(sin lat) * (a_nm cos(m lon) + b_nm sin(m lon))
+
+    where P_nm are fully normalized associated Legendre functions (without
+    Condon-Shortley phase), 0 <= m <= n <= degree. Missing coefficients
+    are zero.
+    """
+    degree: int
+    cos: dict[tuple[int, int], float] = field(default_factory=dict)
+    sin: dict[tuple[int, int], float] = field(default_factory=dict)
+
+
+def legendre(degree: int, lat: float) -> list[list[float]]:
+    """
+    Returns fully normalized associated Legendre functions P[n][m] of
+    sin(lat) for all 0 <= m <= n <= degree.
+
+    :param degree: maximal degree
+    :type degree: int
+
+    :param lat: latitude in degrees
+    :type lat: float
+    """
+    x = math.sin(math.radians(lat))
+    y = math.cos(math.radians(lat))
+    p = [[0.0] * (n + 1) for n in range(degree + 1)]
+    p[0][0] = 1.0
+    for m in range(1, degree + 1):
+        factor = 3.0 if m == 1 else (2 * m + 1) / (2 * m)
+        p[m][m] = math.sqrt(factor) * y * p[m - 1][m - 1]
+    for m in range(degree):
+        p[m + 1][m] = math.sqrt(2 * m + 3) * x * p[m][m]
+        for n in range(m + 2, degree + 1):
+            a = math.sqrt((2 * n - 1) * (2 * n + 1) / ((n - m) * (n + m)))
+            b = math.sqrt((2 * n + 1) * (n + m - 1) * (n - m - 1) /
+                          ((n - m) * (n + m) * (2 * n - 3)))
+            p[n][m] = a * x * p[n - 1][m] - b * p[n - 2][m]
+    return p
+
+
+class HarmonicTables:
+    """
+    Legendre functions for every latitude node and cos(m lon), sin(m lon)
+    for every longitude node. Tables depend only on grid and degree, they
+    are built once and shared, see HarmonicTables.get.
+    """
+
+    _CACHE = dict()
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 degree: int):
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.degree = degree
+        self.legendre = [legendre(degree, lat)
+                         for lat in lat_range.coordinates]
+        lons = [math.radians(lon) for lon in lon_range.coordinates]
+        self.cos = [[math.cos(m * lon) for lon in lons]
+                    for m in range(degree + 1)]
+        self.sin = [[math.sin(m * lon) for lon in lons]
+                    for m in range(degree + 1)]
+
+    @classmethod
+    def get(cls,
+            lat_range: SpatialRange,
+            lon_range: SpatialRange,
+            degree: int) -> "HarmonicTables":
+        """
+        Returns cached tables for grid and degree.
+        """
+        key = (lat_range, lon_range, degree)
+        tables = cls._CACHE.get(key)
+        if tables is None:
+            tables = cls._CACHE[key] = cls(lat_range, lon_range, degree)
+        return tables
+
+
+class HarmonicMapSource:
+    """
+    Evaluates spherical harmonic expansions on the grid and makes maps
+    out of them.
+
+    Evaluation of epoch is two products with cached tables: coefficients
+    times Legendre table give cos and sin amplitudes of every order for
+    every latitude, then amplitudes times trigonometric table give values
+    for every longitude.
+
+    With sun_fixed expansion is given in sun-fixed longitude
+    s = lon + 15 * UT - 180 (degrees, UT in hours). Coefficients are
+    rotated for every epoch instead of the tables, so tables are still
+    shared by all epochs.
+
+    Usage::
+
+        source = HarmonicMapSource(lat_range, lon_range, 450)
+        ionex_file.set_maps(source.get_maps(coefficients), IonexMapType.TEC)
+    """
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 height: float,
+                 exponent: int = -1,
+                 sun_fixed: bool = False):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param height: height of maps
+        :type height: float
+
+        :param exponent: exponent of map values, TEC 12.3 TECU is written
+            as 123 for exponent -1
+        :type exponent: int
+
+        :param sun_fixed: expansion is given in sun-fixed longitude
+        :type sun_fixed: bool
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.height = height
+        self.exponent = exponent
+        self.sun_fixed = sun_fixed
+
+    def evaluate(self,
+                 coefficients: HarmonicCoefficients,
+                 epoch: datetime | None = None) -> list[float]:
+        """
+        Evaluates expansion at all nodes.
+
+        :param coefficients: expansion
+        :type coefficients: HarmonicCoefficients
+
+        :param epoch: time of expansion, required for sun-fixed expansion
+        :type epoch: datetime
+
+        :returns: flat list of TEC values in (lat, lon) order
+        :rtype: list
+        """
+        degree = coefficients.degree
+        tables = HarmonicTables.get(self.lat_range, self.lon_range, degree)
+        a = [[coefficients.cos.get((n, m), 0.0) for m in range(n + 1)]
+             for n in range(degree + 1)]
+        b = [[coefficients.sin.get((n, m), 0.0) for m in range(n + 1)]
+             for n in range(degree + 1)]
+        if self.sun_fixed:
+            if epoch is None:
+                raise ValueError("Epoch is required for sun-fixed expansion")
+            a, b = self._rotate(a, b, epoch)
+
+        orders = range(degree + 1)
+        values = list()
+        for p in tables.legendre:
+            # amplitudes of cos(m lon) and sin(m lon) for this latitude
+            c = [sum(a[n][m] * p[n][m] for n in range(m, degree + 1))
+                 for m in orders]
+            s = [sum(b[n][m] * p[n][m] for n in range(m, degree + 1))
+                 for m in orders]
+            row = [0.0] * self.lon_range.get_node_number()
+            for m in orders:
+                cm, sm = c[m], s[m]
+                if cm:
+                    row = [v + cm * t for v, t in zip(row, tables.cos[m])]
+                if sm:
+                    row = [v + sm * t for v, t in zip(row, tables.sin[m])]
+            values.extend(row)
+        return values
+
+    @staticmethod
+    def _rotate(a: list, b: list, epoch: datetime) -> tuple[list, list]:
+        # s = lon + shift, cos(m(lon + shift)) and sin(m(lon + shift)) are
+        # expanded so coefficients are rotated by m * shift
+        hours = epoch.hour + epoch.minute / 60 + epoch.second / 3600
+        shift = math.radians(15 * hours - 180)
+        ra = list()
+        rb = list()
+        for an, bn in zip(a, b):
+            ra.append([])
+            rb.append([])
+            for m, (am, bm) in enumerate(zip(an, bn)):
+                cs = math.cos(m * shift)
+                sn = math.sin(m * shift)
+                ra[-1].append(am * cs + bm * sn)
+                rb[-1].append(bm * cs - am * sn)
+        return ra, rb
+
+    def get_map(self,
+                epoch: datetime,
+                coefficients: HarmonicCoefficients) -> IonexMap:
+        """
+        Makes map from expansion, values are scaled by exponent and
+        rounded.
+
+        :rtype: IonexMap
+        """
+        scale = 10 ** -self.exponent
+        values = [round(v * scale) for v in self.evaluate(coefficients, epoch)]
+        ionex_map = IonexMap(self.lat_range, self.lon_range, self.height,
+                             epoch)
+        nodes = self.lon_range.get_node_number()
+        for i, lat in enumerate(self.lat_range.coordinates):
+            ionex_map.set_values(lat, values[i * nodes: (i + 1) * nodes])
+        return ionex_map
+
+    def iter_maps(self, coefficients: dict[datetime, HarmonicCoefficients]):
+        """
+        Iterates over maps ordered by epoch, maps are made when they are
+        requested, so they could be passed to writer one by one.
+
+        :returns: generator of (epoch, IonexMap)
+        """
+        for epoch in sorted(coefficients):
+            yield epoch, self.get_map(epoch, coefficients[epoch])
+
+    def get_maps(self, coefficients: dict[datetime, HarmonicCoefficients]
+                 ) -> dict[datetime, IonexMap]:
+        """
+        Makes maps for all epochs.
+
+        :rtype: dict
+        """
+        return dict(self.iter_maps(coefficients))
@@ -0,0 +1,156 @@
+from collections.abc import Mapping
+from typing import Any, Callable
+
+
+class HeaderEntry:
+    """
+    Raw value stored under header label and its rendered lines.
+
+    Kind defines how value is rendered, for example 'values' for data
+    formatted by label format or 'text' for long string split into lines.
+    """
+
+    __slots__ = ("kind", "value", "lines")
+
+    def __init__(self, kind: str, value: Any):
+        self.kind = kind
+        self.value = value
+        self.lines = None
+
+
+class HeaderLines(list):
+    """
+    Read-only list of formatted lines of header label. Lines are changed
+    through IonexFile methods (update_label, set_label, add_comment ...).
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Header lines are read-only, use IonexFile methods "
+                        "to change header")
+
+    append = extend = insert = remove = pop = clear = _read_only
+    sort = reverse = __setitem__ = __delitem__ = _read_only
+    __iadd__ = __imul__ = _read_only
+
+    def __reduce__(self):
+        # copy and pickle would fill new object by extend otherwise
+        return (HeaderLines, (list(self),))
+
+
+class IonexHeaderModel(Mapping):
+    """
+    Header that stores raw values per label together with their rendered
+    lines.
+
+    Every entry is rendered when it is set, so formatting errors are
+    raised by the call that sets the value and model is not changed.
+    Reading a label returns its lines as read-only HeaderLines. When label
+    is changed it is marked dirty and its lines are joined again from
+    rendered entries on next access, all other labels are returned from
+    cache.
+    """
+
+    def __init__(self, render_entry: Callable[[str, str, Any], list[str]]):
+        """
+        :param render_entry: function (label, kind, value) -> lines that
+            formats a single entry
+        :type render_entry: callable
+        """
+        self._render_entry = render_entry
+        self._entries = dict()
+        self._lines = dict()
+        self._dirty = set()
+
+    def set(self, label: str, entries: list[tuple[str, Any]]) -> None:
+        """
+        Replaces all values of label.
+
+        :param label: header label
+        :type label: str
+
+        :param entries: list of (kind, value) pairs
+        :type entries: list
+        """
+        self._entries[label] = [self._entry(label, k, v) for k, v in entries]
+        self._dirty.add(label)
+
+    def append(self, label: str, kind: str, value: Any) -> None:
+        """
+        Adds value to label keeping values that are already set.
+
+        :param label: header label
+        :type label: str
+
+        :param kind: how value is rendered
+        :type kind: str
+
+        :param value: raw value
+        """
+        entry = self._entry(label, kind, value)
+        self._entries.setdefault(label, list()).append(entry)
+        self._dirty.add(label)
+
+    def _entry(self, label: str, kind: str, value: Any) -> HeaderEntry:
+        entry = HeaderEntry(kind, value)
+        entry.lines = self._render_entry(label, kind, value)
+        return entry
+
+    def remove(self, label: str) -> None:
+        """
+        Removes all values of label.
+        """
+        self._entries.pop(label, None)
+        self._lines.pop(label, None)
+        self._dirty.discard(label)
+
+    def entries(self, label: str) -> list[tuple[str, Any]]:
+        """
+        Returns raw values of label as list of (kind, value) pairs.
+        """
+        return [(e.kind, e.value) for e in self._entries.get(label, [])]
+
+    @property
+    def dirty(self) -> frozenset:
+        """
+        Labels changed since they were rendered last time.
+        """
+        return frozenset(self._dirty)
+
+    def render(self) -> list[str]:
+        """
+        Joins lines of all changed labels.
+
+        :returns: labels that were joined
+        """
+        rendered = list(self._dirty)
+        for label in rendered:
+            self._render(label)
+        return rendered
+
+    def _render(self, label: str) -> None:
+        lines = list()
+        for entry in self._entries[label]:
+            lines.extend(entry.lines)
+        self._lines[label] = HeaderLines(lines)
+        self._dirty.discard(label)
+
+    def __getitem__(self, label: str) -> list[str]:
+        """
+        Returns formatted lines of label, empty list if label is not set.
+
+        :rtype: HeaderLines
+        """
+        if label in self._dirty:
+            self._render(label)
+        if label not in self._lines:
+            return HeaderLines()
+        return self._lines[label]
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,171 @@
+from datetime import datetime
+
+from .formatter import IonexFile, NumericTokenTooBig
+
+
+class HeaderTemplate:
+    """
+    Header rendered and verified once and stamped for every file.
+
+    Lines are rendered from IonexFile in its line order. Fields that
+    differ between files are fixed-width slots, so stamping a header is
+    a copy of the line list and a few slice assignments:
+
+    * date of file creation in PGM / RUN BY / DATE (A20, columns 41-60);
+    * EPOCH OF FIRST MAP and EPOCH OF LAST MAP (6I6, columns 1-36);
+    * # OF MAPS IN FILE (I6, columns 1-6);
+    * extra COMMENT lines inserted after comments of template.
+
+    Usage::
+
+        template = HeaderTemplate(ionex_file)
+        for maps in daily_maps:
+            ionex_file.set_maps(maps, IonexMapType.TEC)
+            header = template.stamp_for_maps(maps, date="28-DEC-10 00:00")
+            ionex_file.write(path, header_lines=header)
+    """
+
+    SLOTS = {
+        "PGM / RUN BY / DATE": (40, 60),
+        "EPOCH OF FIRST MAP": (0, 36),
+        "EPOCH OF LAST MAP": (0, 36),
+        "# OF MAPS IN FILE": (0, 6),
+    }
+
+    def __init__(self, ionex_file: IonexFile):
+        """
+        :param ionex_file: file with header data shared by all files
+        :type ionex_file: IonexFile
+        """
+        self.ionex_file = ionex_file
+        self.lines = list()
+        self.slots = dict()
+        self.comment_index = None
+        header = ionex_file.header
+        empty = "".ljust(ionex_file.header_line_length)
+        for label in ionex_file.line_order:
+            label_lines = header[label]
+            if label in self.SLOTS:
+                if not label_lines and label != "PGM / RUN BY / DATE":
+                    label_lines = [
+                        (empty + label).ljust(ionex_file.max_line_length)
+                    ]
+                if label_lines:
+                    self.slots[label] = len(self.lines)
+            self.lines.extend(label_lines)
+            if label == "COMMENT":
+                self.comment_index = len(self.lines)
+        if "END OF HEADER" not in header:
+            self.lines.append(ionex_file._get_end_line("END OF HEADER"))
+        if self.comment_index is None:
+            self.comment_index = len(self.lines) - 1
+        self.offsets = [0]
+        for line in self.lines:
+            self.offsets.append(self.offsets[-1] + len(line) + 1)
+
+    def stamp(self,
+              first_epoch: datetime | None = None,
+              last_epoch: datetime | None = None,
+              maps_number: int | None = None,
+              date: str | None = None,
+              comments: str | list | None = None) -> list[str]:
+        """
+        Returns header lines with per-file fields set.
+
+        :param first_epoch: epoch of the first map in file
+        :type first_epoch: datetime
+
+        :param last_epoch: epoch of the last map in file
+        :type last_epoch: datetime
+
+        :param maps_number: number of maps in file
+        :type maps_number: int
+
+        :param date: date and time of file creation
+        :type date: str
+
+        :param comments: comments added to template comments
+        :type comments: str or list
+
+        :raises NumericTokenTooBig: when value does not fit its slot
+        """
+        lines = self.lines.copy()
+        values = {
+            "PGM / RUN BY / DATE": date,
+            "EPOCH OF FIRST MAP": first_epoch,
+            "EPOCH OF LAST MAP": last_epoch,
+            "# OF MAPS IN FILE": maps_number,
+        }
+        for label, value in values.items():
+            if value is None or label not in self.slots:
+                continue
+            start, end = self.SLOTS[label]
+            line = lines[self.slots[label]]
+            lines[self.slots[label]] = \
+                line[:start] + self.format_slot(label, value) + line[end:]
+        if comments:
+            index = self.comment_index
+            lines[index:index] = self.format_comments(comments)
+        return lines
+
+    def stamp_for_maps(self, maps: dict, **kwargs) -> list[str]:
+        """
+        Stamps header with epoch range and number of maps taken from maps.
+
+        :param maps: maps to be written, keys are epochs
+        :type maps: dict
+
+        :param kwargs: other fields passed to stamp
+        """
+        epochs = sorted(maps)
+        return self.stamp(first_epoch=epochs[0],
+                          last_epoch=epochs[-1],
+                          maps_number=len(epochs),
+                          **kwargs)
+
+    def format_slot(self, label: str, value) -> str:
+        """
+        Formats value to fit slot of given label.
+        """
+        start, end = self.SLOTS[label]
+        width = end - start
+        if isinstance(value, datetime):
+            text = self.ionex_file._get_header_date_time(value)[:width]
+        elif isinstance(value, int):
+            text = str(value).rjust(width)
+        else:
+            text = value.ljust(width)
+        if len(text) > width:
+            raise NumericTokenTooBig(value, width, 0)
+        return text
+
+    def format_comments(self, comments: str | list) -> list[str]:
+        """
+        Formats comment lines the same way as IonexFile.add_comment.
+        """
+        ionex = self.ionex_file
+        if isinstance(comments, str):
+            return ionex._format_header_long_string(comments, "COMMENT")
+        lines = list()
+        for line in comments:
+            line = line.ljust(ionex.header_line_length) + "COMMENT"
+            lines.append(line.ljust(ionex.max_line_length))
+        return lines
+
+    def field_offset(self, label: str, comment_lines: int = 0) -> int:
+        """
+        Returns byte offset of slot in written header.
+
+        Used to update field in place when file is already written.
+
+        :param label: label of slot
+        :type label: str
+
+        :param comment_lines: number of comment lines added by stamp
+        :type comment_lines: int
+        """
+        index = self.slots[label]
+        offset = self.offsets[index]
+        if index >= self.comment_index:
+            offset += comment_lines * (self.ionex_file.max_line_length + 1)
+        return offset + self.SLOTS[label][0]
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, TextIO
+
+Hook = Callable[[str, float, dict], None]
+
+
+@dataclass
+class StageStats:
+    """
+    Number of calls and time spent in a single stage.
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+@dataclass
+class WriterStats:
+    """
+    Timers per stage and counters collected by Instrumentation.
+
+    Stages recorded by the package are 'ingest' (reading of converter
+    input), 'set_data' (IonexMap.set_data), 'header_entry' (formatting of
+    header value when it is set), 'header' (assembling of header lines),
+    'encode' (formatting of single map) and 'write' (writing of block to
+    output including compression). Other stages could be recorded by user
+    code with Instrumentation.stage.
+    """
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    counters: Counter = field(default_factory=Counter)
+
+    def add(self, stage: str, seconds: float, counters: dict) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        self.counters.update(counters)
+
+    @property
+    def maps_encoded(self) -> int:
+        return self.counters["maps"]
+
+    @property
+    def values_encoded(self) -> int:
+        return self.counters["values"]
+
+    @property
+    def lines_written(self) -> int:
+        return self.counters["lines"]
+
+    @property
+    def bytes_written(self) -> int:
+        return self.counters["bytes"]
+
+    @property
+    def seconds_per_map(self) -> float:
+        stats = self.stages.get("encode")
+        return stats.mean_seconds if stats else 0.0
+
+    def summary(self) -> dict:
+        """
+        Returns stats as dict that could be dumped to JSON.
+        """
+        return {
+            "stages": {
+                name: {
+                    "calls": stats.calls,
+                    "seconds": stats.seconds,
+                    "mean_seconds": stats.mean_seconds,
+                    "max_seconds": stats.max_seconds,
+                }
+                for name, stats in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class Instrumentation:
+    """
+    Collects time and counters of writer stages.
+
+    Instrumentation is disabled by default: IonexFile.instrumentation and
+    IonexMap.instrumentation are None and instrumented code does a single
+    None check per map, header value or written block. When enabled every stage updates stats, calls hooks
+    and, if trace is set, keeps event for Chrome trace timeline
+    (chrome://tracing or https://ui.perfetto.dev).
+
+    Usage::
+
+        instrumentation = Instrumentation(trace=True)
+        instrumentation.add_hook(lambda stage, seconds, counters: ...)
+        ionex_file.instrumentation = instrumentation
+        ionex_map.instrumentation = instrumentation
+        ionex_map.set_data(cells)
+        ionex_file.write(path)
+        print(instrumentation.stats.summary())
+        instrumentation.dump_trace("trace.json")
+    """
+
+    def __init__(self, trace: bool = False):
+        """
+        :param trace: keep events to dump Chrome trace
+        :type trace: bool
+        """
+        self.stats = WriterStats()
+        self.hooks = list()
+        self.trace = trace
+        self.events = list()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+        Adds function (stage, seconds, counters) called after every stage.
+        """
+        self.hooks.append(hook)
+
+    def record(self,
+               stage: str,
+               start: float,
+               end: float,
+               **counters) -> None:
+        """
+        Records finished stage.
+
+        :param stage: name of stage
+        :type stage: str
+
+        :param start: time.perf_counter() at start of stage
+        :type start: float
+
+        :param end: time.perf_counter() at end of stage
+        :type end: float
+
+        :param counters: counters to be added, for example values=5184
+        """
+        seconds = end - start
+        with self._lock:
+            self.stats.add(stage, seconds, counters)
+            if self.trace:
+                self.events.append({
+                    "name": stage,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": seconds * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": counters,
+                })
+        for hook in self.hooks:
+            hook(stage, seconds, counters)
+
+    @contextmanager
+    def stage(self, name: str, **counters):
+        """
+        Measures code inside with block as stage. Yielded dict could be
+        updated with counters known at the end of stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record(name, start, time.perf_counter(), **counters)
+
+    def dump_trace(self, target: str | Path | TextIO) -> None:
+        """
+        Writes events in Chrome trace event format.
+
+        :param target: path or text stream
+        :type target: str, Path or TextIO
+        """
+        with self._lock:
+            data = {"traceEvents": list(self.events),
+                    "displayTimeUnit": "ms"}
+        if isinstance(target, (str, Path)):
+            with open(target, "w") as f:
+                json.dump(data, f)
+        else:
+            json.dump(data, target)
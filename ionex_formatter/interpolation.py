@@ -0,0 +1,290 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from enum import Enum
+
+from .ionex_map import IonexMap
+from .spatial import SpatialRange
+
+EARTH_RADIUS = 6371.0
+
+
+class InterpolationMethod(Enum):
+    NEAREST = 1
+    IDW = 2
+
+
+def unit_vector(lat: float, lon: float) -> tuple[float, float, float]:
+    """
+    Returns point on unit sphere for latitude and longitude in degrees.
+    """
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    return (math.cos(phi) * math.cos(lam),
+            math.cos(phi) * math.sin(lam),
+            math.sin(phi))
+
+
+def chord(a: tuple, b: tuple) -> float:
+    """
+    Returns straight line distance between points on unit sphere.
+    """
+    return math.sqrt((a[0] - b[0]) ** 2 +
+                     (a[1] - b[1]) ** 2 +
+                     (a[2] - b[2]) ** 2)
+
+
+def arc_length(chord_value: float) -> float:
+    """
+    Converts chord on unit sphere to great-circle distance in km.
+    """
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, chord_value / 2))
+
+
+def chord_length(distance: float) -> float:
+    """
+    Converts great-circle distance in km to chord on unit sphere.
+    """
+    return 2 * math.sin(min(distance / EARTH_RADIUS, math.pi) / 2)
+
+
+def great_circle_distance(a: tuple, b: tuple) -> float:
+    """
+    Returns distance in km between points given as unit vectors.
+    """
+    return arc_length(chord(a, b))
+
+
+class GridIndex:
+    """
+    Data of grid that does not depend on observations: unit vectors of
+    nodes and their buckets. Built once per (lat_range, lon_range) pair
+    and shared by all interpolators, see GridIndex.get.
+
+    Buckets are cubes of size cell_size in 3-D space of unit vectors, so
+    they do not degenerate near poles and there is no longitude wrap.
+    Point in bucket at Chebyshev distance r (in buckets) from bucket of
+    node is further than (r - 1) * cell_size from node, hence search of
+    neighbours in rings of buckets stops exactly.
+    """
+
+    _CACHE = dict()
+    _RINGS = dict()
+
+    def __init__(self, lat_range: SpatialRange, lon_range: SpatialRange):
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.lat_nodes = lat_range.get_node_number()
+        self.lon_nodes = lon_range.get_node_number()
+        step = max(abs(lat_range.vstep), abs(lon_range.vstep), 1.0)
+        # chord length of the largest step
+        self.cell_size = 2 * math.sin(math.radians(min(step, 180)) / 2)
+        self.max_ring = math.ceil(2 / self.cell_size) + 1
+        self.vectors = [
+            unit_vector(lat, lon)
+            for lat in lat_range.coordinates
+            for lon in lon_range.coordinates
+        ]
+        self.cells = [self.bucket(vector) for vector in self.vectors]
+
+    @classmethod
+    def get(cls,
+            lat_range: SpatialRange,
+            lon_range: SpatialRange) -> "GridIndex":
+        """
+        Returns cached index for grid.
+        """
+        key = (lat_range, lon_range)
+        index = cls._CACHE.get(key)
+        if index is None:
+            index = cls._CACHE[key] = cls(lat_range, lon_range)
+        return index
+
+    def bucket(self, vector: tuple) -> tuple[int, int, int]:
+        """
+        Returns bucket of point given as unit vector.
+        """
+        size = self.cell_size
+        return (math.floor(vector[0] / size),
+                math.floor(vector[1] / size),
+                math.floor(vector[2] / size))
+
+    @classmethod
+    def ring(cls, r: int) -> list[tuple[int, int, int]]:
+        """
+        Returns offsets of buckets at Chebyshev distance r.
+        """
+        offsets = cls._RINGS.get(r)
+        if offsets is None:
+            steps = range(-r, r + 1)
+            offsets = [
+                (x, y, z) for x in steps for y in steps for z in steps
+                if max(abs(x), abs(y), abs(z)) == r
+            ]
+            cls._RINGS[r] = offsets
+        return offsets
+
+
+class GridInterpolator:
+    """
+    Fills all nodes of the grid from scattered observations.
+
+    NEAREST takes value of the nearest observation, IDW takes mean of
+    the nearest observations weighted by inverse distance to the power.
+    Distances are great-circle distances.
+
+    Observations are put to buckets of GridIndex once per epoch, then
+    for every node only buckets around it are searched, so epoch costs
+    roughly O(observations + nodes * neighbours) instead of
+    O(nodes * observations). Neighbours are ordered by chord length which
+    has the same order as great-circle distance.
+
+    When max_distance is set, nodes without observations closer than
+    max_distance are set to IonexMap.NO_VALUE.
+    """
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 method: InterpolationMethod = InterpolationMethod.IDW,
+                 neighbours: int = 8,
+                 power: float = 2.0,
+                 max_distance: float | None = None):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param method: interpolation method
+        :type method: InterpolationMethod
+
+        :param neighbours: number of observations used by IDW
+        :type neighbours: int
+
+        :param power: power of inverse distance weight
+        :type power: float
+
+        :param max_distance: observations further than max_distance (km)
+            are not used, node without observations is set to NO_VALUE
+        :type max_distance: float
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.method = method
+        self.neighbours = 1 if method == InterpolationMethod.NEAREST \
+            else neighbours
+        self.power = power
+        self.max_distance = max_distance
+        self.index = GridIndex.get(lat_range, lon_range)
+
+    def interpolate_values(self,
+                           lats: list[float],
+                           lons: list[float],
+                           values: list[float]) -> list:
+        """
+        Interpolates observations to all nodes.
+
+        :returns: flat list of values in (lat, lon) order, values are
+            rounded to integers
+        :rtype: list
+
+        :raises ValueError: if lengths of lists differ or there are no
+            observations
+        """
+        if not len(lats) == len(lons) == len(values):
+            raise ValueError("Observation lists should have the same length")
+        if not values:
+            raise ValueError("There are no observations to interpolate")
+        index = self.index
+        buckets = defaultdict(list)
+        for lat, lon, value in zip(lats, lons, values):
+            point = unit_vector(lat, lon)
+            buckets[index.bucket(point)].append((point, value))
+        buckets = dict(buckets)
+
+        if self.max_distance is None:
+            max_chord = 2.0
+        else:
+            max_chord = chord_length(self.max_distance)
+        size = index.cell_size
+        result = list()
+        for vector, (x, y, z) in zip(index.vectors, index.cells):
+            candidates = list()
+            for r in range(index.max_ring):
+                offsets = index.ring(r)
+                if len(offsets) > len(buckets):
+                    # sparse observations, cheaper to check every bucket
+                    ring = [
+                        bucket for (bx, by, bz), bucket in buckets.items()
+                        if max(abs(bx - x), abs(by - y), abs(bz - z)) == r
+                    ]
+                else:
+                    ring = [
+                        buckets.get((x + dx, y + dy, z + dz))
+                        for dx, dy, dz in offsets
+                    ]
+                for bucket in ring:
+                    if bucket:
+                        candidates.extend(
+                            (chord(vector, point), value)
+                            for point, value in bucket
+                        )
+                # points in further rings are further than r * size
+                if r * size > max_chord or len(candidates) == len(values):
+                    break
+                if len(candidates) >= self.neighbours:
+                    candidates.sort()
+                    if r * size >= candidates[self.neighbours - 1][0]:
+                        break
+            result.append(self._estimate(candidates, max_chord))
+        return result
+
+    def _estimate(self, candidates: list, max_chord: float):
+        candidates.sort()
+        nearest = [
+            (d, v) for d, v in candidates[:self.neighbours] if d <= max_chord
+        ]
+        if not nearest:
+            return IonexMap.NO_VALUE
+        if nearest[0][0] == 0 or self.method == InterpolationMethod.NEAREST:
+            return round(nearest[0][1])
+        weights = [arc_length(d) ** -self.power for d, _ in nearest]
+        total = sum(w * v for w, (_, v) in zip(weights, nearest))
+        return round(total / sum(weights))
+
+    def interpolate(self,
+                    lats: list[float],
+                    lons: list[float],
+                    values: list[float],
+                    height: float,
+                    epoch: datetime) -> IonexMap:
+        """
+        Makes complete map from observations.
+
+        :param lats: latitudes of observations
+        :type lats: list
+
+        :param lons: longitudes of observations
+        :type lons: list
+
+        :param values: observed values in map units
+        :type values: list
+
+        :param height: height of map
+        :type height: float
+
+        :param epoch: epoch of map
+        :type epoch: datetime
+
+        :rtype: IonexMap
+        """
+        result = self.interpolate_values(lats, lons, values)
+        ionex_map = IonexMap(self.lat_range, self.lon_range, height, epoch)
+        lon_nodes = self.index.lon_nodes
+        for i, lat in enumerate(self.lat_range.coordinates):
+            ionex_map.set_values(
+                lat, result[i * lon_nodes: (i + 1) * lon_nodes]
+            )
+        return ionex_map
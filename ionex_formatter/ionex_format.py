@@ -1,6 +1,9 @@
+from importlib import resources
 from pathlib import Path
 import json
 
+DESCRIPTIONS_RESOURCE = "header_line_descriptions.json"
+
 class FormatDescriptionLabelMissing(Exception):
     """
     Raised when there no description for label listed in HEADER_FORMATS
@@ -18,6 +21,10 @@ class IonexHeader_V_1_1:
     HEADER_FORMATS is used to properly adjust data in every line of IONEX
     file. HEADER_DESCRIPTIONS can be used for reference is user have issue
     to define which data go which line of
+
+    HEADER_DESCRIPTIONS are loaded from package resources on first access,
+    AUTO_FORMATTED_LABELS are computed once when the first instance is
+    created, so constructing header does not read any file.
     """
 
     HEADER_FORMATS = {
@@ -55,39 +62,53 @@ class IonexHeader_V_1_1:
         "END OF FILE": "60X",
     }
 
-    HEADER_DESCRIPTIONS = dict()
-
     AUTO_FORMATTED_LABELS = list()
 
     __instance = None
 
     def __new__(class_, *args, **kwargs):
         if class_.__instance is None:
-            class_.__instance = object.__new__(class_, *args, **kwargs)
-        class_.__instance.init_fields("ionex_formatter/header_line_descriptions.json")
+            instance = object.__new__(class_, *args, **kwargs)
+            instance._descriptions = None
+            instance.make_automatic_label_format_list()
+            class_.__instance = instance
         return class_.__instance
 
+    @property
+    def HEADER_DESCRIPTIONS(self) -> dict:
+        """
+        Descriptions of header labels, loaded on first access.
+        """
+        if self._descriptions is None:
+            self.init_fields()
+        return self._descriptions
+
+    @HEADER_DESCRIPTIONS.setter
+    def HEADER_DESCRIPTIONS(self, descriptions: dict) -> None:
+        self._descriptions = descriptions
+
     def _update(self):
-        self.init_fields("ionex_formatter/header_line_descriptions.json")
+        self.init_fields()
 
-    def init_fields(self, description_path: str | Path) -> None:
+    def init_fields(self, description_path: str | Path | None = None) -> None:
         """
         Loads description and compares whether all labels contains necessary 
         description and formats
 
-        :param description_path: path to json file with descriptions
+        :param description_path: path to json file with descriptions, 
+            descriptions shipped with package are used if None
         :type description_path: str or Path
 
         :raises: FormatDescriptionLabelMissing:
         """
-        self.load_descriptions(description_path) 
+        descriptions = self.read_descriptions(description_path)
         format_labels = list(self.HEADER_FORMATS.keys())
-        description_labels = list(self.HEADER_DESCRIPTIONS.keys())
+        description_labels = list(descriptions.keys())
         format_labels.sort()
         description_labels.sort()
         if format_labels != description_labels:
             raise FormatDescriptionLabelMissing
-        self.make_automatic_label_format_list()
+        self.HEADER_DESCRIPTIONS = descriptions
 
     def make_automatic_label_format_list(self):
         self.AUTO_FORMATTED_LABELS = list()
@@ -110,25 +131,44 @@ class IonexHeader_V_1_1:
                 self.AUTO_FORMATTED_LABELS.append(label)
         self.AUTO_FORMATTED_LABELS.sort()
 
-    def load_descriptions(self, file_path: str | Path) -> None:
+    def load_descriptions(self, file_path: str | Path | None = None) -> None:
         """
         Loads description from file_path
 
-        :param description_path: path to json file with descriptions
+        :param description_path: path to json file with descriptions, 
+            descriptions shipped with package are used if None
+        :type description_path: str or Path
+
+        :raises: IonexHeaderDescriptionFileMissing
+        :raises: TypeError
+        """
+        self.HEADER_DESCRIPTIONS = self.read_descriptions(file_path)
+
+    def read_descriptions(self, file_path: str | Path | None = None) -> dict:
+        """
+        Reads and verifies description from file_path without storing them
+
+        :param description_path: path to json file with descriptions, 
+            descriptions shipped with package are used if None
         :type description_path: str or Path
 
         :raises: IonexHeaderDescriptionFileMissing
         :raises: TypeError
         """
-        descriptions_file = Path(file_path)
-        if not descriptions_file.exists():  
-            raise FileNotFoundError(str(file_path))
-        with open(descriptions_file) as f:
-            self.HEADER_DESCRIPTIONS = json.load(f)
-        if not isinstance(self.HEADER_DESCRIPTIONS, dict):
+        if file_path is None:
+            file_path = DESCRIPTIONS_RESOURCE
+            resource = resources.files(__package__) / DESCRIPTIONS_RESOURCE
+            descriptions = json.loads(resource.read_text(encoding="utf-8"))
+        else:
+            descriptions_file = Path(file_path)
+            if not descriptions_file.exists():  
+                raise FileNotFoundError(str(file_path))
+            with open(descriptions_file) as f:
+                descriptions = json.load(f)
+        if not isinstance(descriptions, dict):
             msg = "Descriptions in {} must be dict".format(file_path)
             raise TypeError(msg)
-        for key, val in self.HEADER_DESCRIPTIONS.items():
+        for key, val in descriptions.items():
             if not(isinstance(key, str) and isinstance(val, str)):
                 key_type = type(key)
                 val_type = type(val)
@@ -136,6 +176,7 @@ class IonexHeader_V_1_1:
                 msg = msg + "For pair {} and  {} types are {} and  {}"
                 msg = msg.format(key, val, key_type, val_type)
                 raise TypeError(msg)
+        return descriptions
                 
     def line_tokens(self, label):
         format_tokens = self.HEADER_FORMATS[label].split(', ')
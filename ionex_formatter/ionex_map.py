@@ -1,5 +1,7 @@
 from collections import defaultdict
 from datetime import datetime
+from time import perf_counter
+from .instrumentation import Instrumentation
 from .spatial import SpatialRange
 
 class LongitudeCellIsNotSet(Exception):
@@ -73,6 +75,9 @@ class IonexMap():
     """
 
     NO_VALUE = 999
+    # stats of set_data, disabled when None, could be set to single map or
+    # to all maps as IonexMap.instrumentation
+    instrumentation: Instrumentation | None = None
 
     def __init__(self, 
                  lat_range: SpatialRange,
@@ -94,32 +99,230 @@ class IonexMap():
 
         :param data: list of data used to set map
         :type data: list of GridCell
+
+        :raises ValueError: if some latitudes are missing or are not nodes
+            of lat_range
+
+        :raises LongitudeCellIsNotSet: if some longitudes are missing or
+            are not nodes of lon_range
         """
-        _data = defaultdict(list)
-        for cell in data:
-            _data[cell.lat].append((cell.lon, cell.val))
+        if self.instrumentation is None:
+            return self._set_data(data)
+        start = perf_counter()
+        self._set_data(data)
+        self.instrumentation.record("set_data", start, perf_counter(),
+                                    cells=len(data))
+
+    def _set_data(self, data: list[GridCell]) -> None:
+        lat_index = self.lat_range.indices([cell.lat for cell in data])
+        lon_index = self.lon_range.indices([cell.lon for cell in data])
+        rows = defaultdict(dict)
+        for cell, i, j in zip(data, lat_index, lon_index):
+            rows[i][j] = cell.val
 
         lat_cells = self.lat_range.get_node_number()
-        if len(_data.keys()) != lat_cells:
-            msg = "Some latitudes are missing {}".format(list(_data.keys()))
+        if None in rows or len(rows) != lat_cells:
+            lats = sorted(set(cell.lat for cell in data))
+            msg = "Some latitudes are missing {}".format(lats)
             raise ValueError(msg)
 
-        for lat, lon_data in _data.items():
-            lons = [lon for lon, _ in lon_data]
-            lon_cells = self.lon_range.get_node_number()
-            if len(set(lons)) != lon_cells:
+        lon_cells = self.lon_range.get_node_number()
+        self.data.clear()
+        for i, lat in enumerate(self.lat_range.coordinates):
+            row = rows[i]
+            if None in row or len(row) != lon_cells:
+                coordinates = self.lon_range.coordinates
+                lons = [coordinates[j] for j in row if j is not None]
                 raise LongitudeCellIsNotSet(lons, lat)
-            if self.lon_range.vmin < self.lon_range.vmax:
-                _data[lat].sort(key=lambda x: x[0], reverse=False)
-            else:
-                _data[lat].sort(key=lambda x: x[0], reverse=True)
-            self.data[lat] = [val for _, val in _data[lat]]
+            self.data[lat] = [row[j] for j in range(lon_cells)]
+
+    def set_values(self, lat: float, values: list) -> None:
+        """
+        Sets values for all longitude cells of a single latitude. Values
+        are given in the same order as they are written to file.
+
+        :param lat: latitude of cells
+        :type lat: float
+
+        :param values: values for longitudes from lon_range.vmin to
+            lon_range.vmax
+        :type values: list
+        """
+        lon_cells = self.lon_range.get_node_number()
+        if len(values) != lon_cells:
+            msg = "Expected {} values for latitude {}, got {}"
+            msg = msg.format(lon_cells, lat, len(values))
+            raise ValueError(msg)
+        self.data[self.lat_range.snap(lat)] = list(values)
 
             
     def get_cell(self, lat: float, lon: float) -> float:
         """
         Return a value on cell given by latitude and longitude.
         """
-        lon_index = (lon - self.lon_range.vmin) / self.lon_range.vstep
-        print(lon_index)
-        return self.data[lat][int(round(lon_index, 0))]
+        row = self.data[self.lat_range.snap(lat)]
+        return row[self.lon_range.index(lon)]
+
+    def rows(self):
+        """
+        Iterates over rows of map in the order they are written to file.
+
+        :returns: generator of (height, lat, values)
+        """
+        for lat, values in self.data.items():
+            yield self.height, lat, values
+
+
+class IonexMap3D():
+    """
+    Stores 3-dimensional map (MAP DIMENSION = 3) for all heights of
+    height_range.
+
+    Values are kept in a single flat list in (height, lat, lon) order, so
+    value for node (k, i, j) is values[(k * lat_nodes + i) * lon_nodes + j].
+    There are no objects per height or per latitude, rows are sliced
+    from the flat list when map is written.
+
+    In file map is written as one LAT/LON1/LON2/DLON/H block per height
+    and latitude, heights go in order of height_range.
+    """
+
+    NO_VALUE = IonexMap.NO_VALUE
+    instrumentation: Instrumentation | None = None
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 height_range: SpatialRange,
+                 epoch: datetime,
+                 values: list | None = None
+                 ):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param height_range: height grid
+        :type height_range: SpatialRange
+
+        :param epoch: time of the map
+        :type epoch: datetime
+
+        :param values: flat list of values in (height, lat, lon) order, if
+            None all values are set to NO_VALUE
+        :type values: list
+
+        :raises ValueError: if number of values does not match grid
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.height_range = height_range
+        self.epoch = epoch
+        if values is None:
+            self.values = [self.NO_VALUE] * self.size
+        else:
+            self.values = list(values)
+            if len(self.values) != self.size:
+                msg = "Expected {} values for grid {}, got {}"
+                msg = msg.format(self.size, self.shape, len(self.values))
+                raise ValueError(msg)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """
+        Number of nodes in height, latitude and longitude.
+        """
+        return (self.height_range.get_node_number(),
+                self.lat_range.get_node_number(),
+                self.lon_range.get_node_number())
+
+    @property
+    def size(self) -> int:
+        heights, lats, lons = self.shape
+        return heights * lats * lons
+
+    def _row_start(self, height: float, lat: float) -> int:
+        k = self.height_range.index(height)
+        i = self.lat_range.index(lat)
+        return (k * self.lat_range.get_node_number() + i) * \
+            self.lon_range.get_node_number()
+
+    def set_values(self, height: float, lat: float, values: list) -> None:
+        """
+        Sets all longitude values for given height and latitude.
+
+        :raises ValueError: if number of values does not match lon_range
+            or coordinates are not grid nodes
+        """
+        lon_cells = self.lon_range.get_node_number()
+        if len(values) != lon_cells:
+            msg = "Expected {} values for height {} latitude {}, got {}"
+            msg = msg.format(lon_cells, height, lat, len(values))
+            raise ValueError(msg)
+        start = self._row_start(height, lat)
+        self.values[start: start + lon_cells] = values
+
+    def set_layer(self, height: float, values: list) -> None:
+        """
+        Sets values of single height given as flat list in (lat, lon)
+        order.
+
+        :raises ValueError: if number of values does not match grid
+        """
+        _, lats, lons = self.shape
+        if len(values) != lats * lons:
+            msg = "Expected {} values for height {}, got {}"
+            msg = msg.format(lats * lons, height, len(values))
+            raise ValueError(msg)
+        start = self.height_range.index(height) * lats * lons
+        self.values[start: start + lats * lons] = values
+
+    def set_data(self, height: float, data: list[GridCell]) -> None:
+        """
+        Sets values of single height given as GridCell objects.
+
+        :raises ValueError: if some cells are missing or are not grid nodes
+        """
+        if self.instrumentation is None:
+            return self._set_data(height, data)
+        start = perf_counter()
+        self._set_data(height, data)
+        self.instrumentation.record("set_data", start, perf_counter(),
+                                    cells=len(data))
+
+    def _set_data(self, height: float, data: list[GridCell]) -> None:
+        _, lats, lons = self.shape
+        lat_index = self.lat_range.indices([cell.lat for cell in data])
+        lon_index = self.lon_range.indices([cell.lon for cell in data])
+        if None in lat_index or None in lon_index:
+            raise ValueError("Some cells are not nodes of the grid")
+        cells = set(zip(lat_index, lon_index))
+        if len(cells) != lats * lons:
+            msg = "Expected {} cells for height {}, got {}"
+            raise ValueError(msg.format(lats * lons, height, len(cells)))
+        start = self.height_range.index(height) * lats * lons
+        for cell, i, j in zip(data, lat_index, lon_index):
+            self.values[start + i * lons + j] = cell.val
+
+    def get_cell(self, height: float, lat: float, lon: float) -> float:
+        """
+        Return a value on cell given by height, latitude and longitude.
+        """
+        return self.values[self._row_start(height, lat) +
+                           self.lon_range.index(lon)]
+
+    def rows(self):
+        """
+        Iterates over rows of map in the order they are written to file.
+
+        :returns: generator of (height, lat, values)
+        """
+        lon_cells = self.lon_range.get_node_number()
+        values = self.values
+        start = 0
+        for height in self.height_range.coordinates:
+            for lat in self.lat_range.coordinates:
+                yield height, lat, values[start: start + lon_cells]
+                start += lon_cells
@@ -0,0 +1,196 @@
+import hashlib
+import io
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from .compression import Compression, detect_compression, open_output
+from .formatter import IonexFile
+
+DEFAULT_ALGORITHMS = ("md5", "sha256")
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+class HashingStream(io.RawIOBase):
+    """
+    Binary stream that passes data to other stream and updates digests
+    and size of written data on the fly.
+    """
+
+    def __init__(self, raw: BinaryIO, algorithms: tuple[str] = ()):
+        """
+        :param raw: stream to write data to
+        :type raw: BinaryIO
+
+        :param algorithms: names of hashlib algorithms
+        :type algorithms: tuple
+        """
+        super().__init__()
+        self.raw = raw
+        self.hashes = {name: hashlib.new(name) for name in algorithms}
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        for h in self.hashes.values():
+            h.update(data)
+        self.size += len(data)
+        self.raw.write(data)
+        return len(data)
+
+    def hexdigests(self, names: tuple[str] | None = None) -> dict[str, str]:
+        """
+        Returns digests of written data for algorithms in names (all
+        algorithms of stream if None).
+        """
+        if names is None:
+            names = tuple(self.hashes)
+        return {name: self.hashes[name].hexdigest() for name in names}
+
+
+@dataclass
+class Manifest:
+    """
+    Description of written file for distribution: size and digests of
+    file as stored (compressed) and of IONEX content, number of maps per
+    type, epoch range and grid.
+    """
+    name: str | None
+    compression: str
+    size: int
+    digests: dict[str, str]
+    content_size: int
+    content_digests: dict[str, str]
+    maps: dict[str, int] = field(default_factory=dict)
+    first_epoch: str | None = None
+    last_epoch: str | None = None
+    grid: dict[str, list] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Manifest":
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def manifest_path(path: str | Path) -> Path:
+    """
+    Returns path of sidecar manifest for file, for example
+    MOSG3620.10I.gz.manifest.json for MOSG3620.10I.gz.
+    """
+    path = Path(path)
+    return path.with_name(path.name + MANIFEST_SUFFIX)
+
+
+def _describe_maps(ionex_file: IonexFile) -> tuple[dict, list, dict]:
+    counts = dict()
+    epochs = list()
+    grid = dict()
+    for dtype, maps in ionex_file.maps.items():
+        if not maps:
+            continue
+        counts[dtype.name] = len(maps)
+        epochs.extend((min(maps), max(maps)))
+        if not grid:
+            first = maps[min(maps)]
+            ranges = {"lat": first.lat_range, "lon": first.lon_range,
+                      "height": getattr(first, "height_range", None)}
+            for name, rng in ranges.items():
+                if rng is not None:
+                    grid[name] = [rng.vmin, rng.vmax, rng.vstep]
+            if "height" not in grid:
+                grid["height"] = [first.height, first.height, 0]
+    return counts, epochs, grid
+
+
+def write_with_manifest(ionex_file: IonexFile,
+                        target: str | Path | BinaryIO,
+                        compression: Compression | None = None,
+                        level: int | None = None,
+                        threads: int = 1,
+                        algorithms: tuple[str] = DEFAULT_ALGORITHMS,
+                        content_algorithms: tuple[str] | None = None,
+                        header_lines: list[str] | None = None) -> Manifest:
+    """
+    Writes file as IonexFile.write does and computes digests of stored
+    (compressed) data and of IONEX content while data are written, so file
+    is never read back.
+
+    :param ionex_file: file to be written
+    :type ionex_file: IonexFile
+
+    :param target: path to output file or binary stream
+    :type target: str, Path or BinaryIO
+
+    :param compression: compression of output, if None it is guessed
+        from file suffix
+    :type compression: Compression
+
+    :param level: compression level
+    :type level: int
+
+    :param threads: number of threads for gzip compression
+    :type threads: int
+
+    :param algorithms: names of hashlib algorithms for stored (compressed)
+        data, stored data are not hashed if it is empty
+    :type algorithms: tuple
+
+    :param content_algorithms: names of hashlib algorithms for IONEX
+        content, content is not hashed if it is empty, if None the same
+        algorithms are used as for stored data
+    :type content_algorithms: tuple
+
+    :param header_lines: already formatted header
+    :type header_lines: list
+
+    :rtype: Manifest
+    """
+    is_path = isinstance(target, (str, Path))
+    if compression is None:
+        compression = detect_compression(target) if is_path \
+            else Compression.NONE
+    if content_algorithms is None:
+        content_algorithms = algorithms
+    raw = open(target, "wb") if is_path else target
+    try:
+        if compression == Compression.NONE:
+            # stored data are the content, every algorithm is run once
+            both = tuple(dict.fromkeys(tuple(algorithms) +
+                                       tuple(content_algorithms)))
+            stored = HashingStream(raw, both)
+            ionex_file.write(stored, Compression.NONE,
+                             header_lines=header_lines)
+            content = stored
+        else:
+            stored = HashingStream(raw, algorithms)
+            with open_output(stored, compression, level, threads) as stream:
+                content = HashingStream(stream, content_algorithms)
+                ionex_file.write(content, Compression.NONE,
+                                 header_lines=header_lines)
+    finally:
+        if is_path:
+            raw.close()
+
+    counts, epochs, grid = _describe_maps(ionex_file)
+    return Manifest(
+        name=Path(target).name if is_path else None,
+        compression=compression.value,
+        size=stored.size,
+        digests=stored.hexdigests(algorithms),
+        content_size=content.size,
+        content_digests=content.hexdigests(content_algorithms),
+        maps=counts,
+        first_epoch=min(epochs).isoformat() if epochs else None,
+        last_epoch=max(epochs).isoformat() if epochs else None,
+        grid=grid,
+    )
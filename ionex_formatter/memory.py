@@ -0,0 +1,123 @@
+import sys
+import tracemalloc
+import types
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .spatial import SpatialRange
+
+# objects that are shared between maps and files or belong to code, they
+# are not counted in footprint of a single object
+SHARED_TYPES = (
+    SpatialRange,
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.MethodType,
+    types.BuiltinFunctionType,
+)
+
+
+def deep_sizeof(obj: Any,
+                shared: tuple = SHARED_TYPES,
+                seen: set | None = None) -> int:
+    """
+    Returns size of object and all objects it refers to in bytes.
+
+    Containers (dict, list, tuple, set), instance __dict__ and __slots__
+    are followed, every object is counted once. Objects of shared types
+    are skipped.
+
+    :param obj: object to be measured
+    :type obj: Any
+
+    :param shared: types of objects that are not counted
+    :type shared: tuple
+
+    :param seen: ids of objects that are already counted
+    :type seen: set
+
+    :rtype: int
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, shared):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, (str, bytes, int, float)):
+            continue
+        else:
+            if hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+            for cls in type(item).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(item, name):
+                        stack.append(getattr(item, name))
+    return size
+
+
+def file_footprint(ionex_file) -> dict[str, int]:
+    """
+    Returns memory used by parts of IonexFile in bytes: 'header' (raw
+    values and rendered lines) and one item per map type with all maps of
+    that type. Objects shared by several maps (for example the same map
+    set for many epochs) are counted once.
+
+    :param ionex_file: file to be measured
+    :type ionex_file: IonexFile
+
+    :rtype: dict
+    """
+    seen = set()
+    report = {"header": deep_sizeof(ionex_file.header, seen=seen)}
+    for dtype, maps in ionex_file.maps.items():
+        report[dtype.name] = deep_sizeof(maps, seen=seen)
+    return report
+
+
+@dataclass
+class MemoryUsage:
+    """
+    Memory allocated while function was running, in bytes: peak is the
+    maximal traced memory, retained is memory that was still allocated
+    when function returned (including its result).
+    """
+    peak: int
+    retained: int
+
+
+def measure_memory(func: Callable[[], Any]) -> tuple[Any, MemoryUsage]:
+    """
+    Runs function with tracemalloc and returns its result and memory
+    usage. Memory allocated before the call is not counted.
+
+    Tracing slows code down several times, so the function should not be
+    timed at the same run.
+
+    :param func: function without arguments
+    :type func: callable
+
+    :rtype: tuple
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not started:
+            tracemalloc.stop()
+    return result, MemoryUsage(peak - base, current - base)
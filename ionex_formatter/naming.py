@@ -0,0 +1,58 @@
+from datetime import datetime
+
+
+class FileNameFieldError(Exception):
+    """
+    Raised when field of file name does not fit its width.
+    """
+    def __init__(self, field: str, value: str, width: int):
+        msg = "Field '{}' should be {} character(s) long, got '{}'"
+        msg = msg.format(field, width, value)
+        super().__init__(msg)
+
+
+def hour_letter(hour: int) -> str:
+    """
+    Returns letter for hour within a day: A for 0h, B for 1h ... X for 23h.
+
+    :param hour: hour from 0 to 23
+    :type hour: int
+    """
+    if not 0 <= hour <= 23:
+        raise ValueError("Hour should be in [0, 23], got {}".format(hour))
+    return chr(ord("A") + hour)
+
+
+def get_file_name(center: str,
+                  epoch: datetime,
+                  region: str = "G",
+                  file_index: str | int = 0) -> str:
+    """
+    Makes file name following convention cccedddh.yyI.
+
+    :param center: 3 character analysis center designator
+    :type center: str
+
+    :param epoch: time of the first map in file
+    :type epoch: datetime
+
+    :param region: extension for region code (G for Global Ionospheric Map)
+    :type region: str
+
+    :param file_index: file index (0, 1, 2 ...) or hour letter (A, B ...)
+    :type file_index: str or int
+
+    :returns: file name, for example MOSG3620.10I
+    :rtype: str
+    """
+    file_index = str(file_index)
+    for field, value, width in (("center", center, 3),
+                                ("region", region, 1),
+                                ("file index", file_index, 1)):
+        if len(value) != width:
+            raise FileNameFieldError(field, value, width)
+    doy = epoch.timetuple().tm_yday
+    name = "{}{}{:03d}{}.{:02d}I".format(
+        center, region, doy, file_index, epoch.year % 100
+    )
+    return name.upper()
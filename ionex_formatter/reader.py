@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from .compression import open_input
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap, IonexMap3D
+from .spatial import SpatialRange
+
+
+class IonexParseError(Exception):
+    """
+    Raised when file content does not follow IONEX format.
+    """
+    def __init__(self, line_number: int, msg: str):
+        msg = "Line {}: {}".format(line_number, msg)
+        super().__init__(msg)
+
+
+@dataclass
+class MapBlock:
+    """
+    Position of map block (from START OF ... MAP to END OF ... MAP line
+    inclusive) in uncompressed content of file.
+    """
+    dtype: IonexMapType
+    epoch: datetime
+    offset: int
+    size: int
+
+
+@dataclass
+class IonexIndex:
+    """
+    Header and positions of map blocks of file. Blocks are keyed by
+    (map type, epoch).
+    """
+    header: IonexFile
+    lat_range: SpatialRange
+    height_range: SpatialRange | None
+    blocks: dict[tuple[IonexMapType, datetime], MapBlock]
+
+    @property
+    def exponent(self) -> int:
+        """
+        EXPONENT of file, -1 if it is not set.
+        """
+        if "EXPONENT" not in self.header.header:
+            return -1
+        return int(self.header.header["EXPONENT"][0][:6])
+
+
+class _LinePosition:
+    """
+    Decodes lines of binary stream and keeps offset of the current line.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.start = 0
+        self.end = 0
+
+    def __iter__(self):
+        for raw in self.stream:
+            self.start = self.end
+            self.end += len(raw)
+            yield raw.decode("ascii").rstrip("\r\n")
+
+
+class IonexReader:
+    """
+    Reads IONEX file (plain or compressed) into IonexFile.
+
+    Header lines are kept as they are written in file, maps are
+    converted to IonexMap objects or to IonexMap3D objects when header
+    has MAP DIMENSION = 3.
+    """
+
+    MAP_TYPES = {
+        "TEC": IonexMapType.TEC,
+        "RMS": IonexMapType.RMS,
+        "HEIGHT": IonexMapType.HGT,
+    }
+
+    VALUE_WIDTH = 5
+
+    def __init__(self, source: str | Path | BinaryIO):
+        """
+        :param source: path to IONEX file or binary stream. Compression
+            (gzip, bzip2, xz) is detected automatically.
+        :type source: str, Path or BinaryIO
+        """
+        self.source = source
+
+    def read(self) -> IonexFile:
+        """
+        Reads header and all maps.
+
+        :rtype: IonexFile
+        """
+        ionex = IonexFile()
+        with open_input(self.source) as stream:
+            lines = (raw.decode("ascii").rstrip("\r\n") for raw in stream)
+            numbered = enumerate(lines, start=1)
+            self._read_header(numbered, ionex)
+            self._read_maps(numbered, ionex)
+        return ionex
+
+    def index(self) -> IonexIndex:
+        """
+        Reads header and finds positions of map blocks without parsing
+        map values. Blocks could be parsed later with read_map.
+
+        :rtype: IonexIndex
+        """
+        ionex = IonexFile()
+        blocks = dict()
+        with open_input(self.source) as stream:
+            position = _LinePosition(stream)
+            numbered = enumerate(position, start=1)
+            self._read_header(numbered, ionex)
+            start = dtype = epoch = None
+            for line_number, line in numbered:
+                label = line[IonexFile.header_line_length:].strip()
+                if label.startswith("START OF") and label.endswith("MAP"):
+                    dtype = self.MAP_TYPES[label.split()[2]]
+                    start = position.start
+                elif label == "EPOCH OF CURRENT MAP":
+                    fields = [int(line[i: i + 6]) for i in range(0, 36, 6)]
+                    epoch = datetime(*fields)
+                elif label.startswith("END OF") and label.endswith("MAP"):
+                    if start is None or epoch is None:
+                        raise IonexParseError(line_number,
+                                              "Map block without start")
+                    blocks[(dtype, epoch)] = MapBlock(
+                        dtype, epoch, start, position.end - start
+                    )
+                    start = epoch = None
+                elif label == "END OF FILE":
+                    break
+        return IonexIndex(ionex, self.lat_range, self.height_range, blocks)
+
+    def read_map(self, block: bytes) -> IonexMap | IonexMap3D:
+        """
+        Parses single map block, header should be read before (by read or
+        index).
+
+        :param block: content of map block
+        :type block: bytes
+
+        :rtype: IonexMap or IonexMap3D
+        """
+        ionex = IonexFile()
+        lines = (line.rstrip("\r") for line in
+                 block.decode("ascii").split("\n"))
+        self._read_maps(enumerate(lines, start=1), ionex)
+        for maps in ionex.maps.values():
+            for ionex_map in maps.values():
+                return ionex_map
+        raise IonexParseError(1, "There is no map in block")
+
+    def _read_header(self, numbered, ionex: IonexFile) -> None:
+        line_number = 0
+        for line_number, line in numbered:
+            label = line[IonexFile.header_line_length:].strip()
+            ionex.header.append(label, "raw", line)
+            if label == "END OF HEADER":
+                break
+        if "LAT1 / LAT2 / DLAT" not in ionex.header:
+            raise IonexParseError(line_number, "Latitude grid is not set")
+        self.lat_range = self._parse_range(ionex, "LAT1 / LAT2 / DLAT")
+        self.height_range = None
+        if "MAP DIMENSION" in ionex.header:
+            line = ionex.header["MAP DIMENSION"][0]
+            if int(line[:6]) == 3:
+                if "HGT1 / HGT2 / DHGT" not in ionex.header:
+                    msg = "Height grid is not set for 3-dimensional maps"
+                    raise IonexParseError(line_number, msg)
+                self.height_range = self._parse_range(ionex,
+                                                      "HGT1 / HGT2 / DHGT")
+
+    def _parse_range(self, ionex: IonexFile, label: str) -> SpatialRange:
+        return ionex.get_header_range(label)
+
+    def _read_maps(self, numbered, ionex: IonexFile) -> None:
+        maps = {dtype: dict() for dtype in IonexMapType}
+        current = None
+        dtype = None
+        epoch = None
+        for line_number, line in numbered:
+            label = line[IonexFile.header_line_length:].strip()
+            if label.startswith("START OF") and label.endswith("MAP"):
+                dtype = self.MAP_TYPES[label.split()[2]]
+            elif label == "EPOCH OF CURRENT MAP":
+                fields = [int(line[i: i + 6]) for i in range(0, 36, 6)]
+                epoch = datetime(*fields)
+            elif label == "LAT/LON1/LON2/DLON/H":
+                lat, lon1, lon2, dlon, height = [
+                    float(line[i: i + 6]) for i in range(2, 32, 6)
+                ]
+                if current is None:
+                    lon_range = SpatialRange(lon1, lon2, dlon)
+                    if self.height_range is None:
+                        current = IonexMap(self.lat_range, lon_range, height,
+                                           epoch)
+                    else:
+                        current = IonexMap3D(self.lat_range, lon_range,
+                                             self.height_range, epoch)
+                values = self._read_values(
+                    numbered, current.lon_range.get_node_number(),
+                    line_number
+                )
+                try:
+                    if self.height_range is None:
+                        current.set_values(lat, values)
+                    else:
+                        current.set_values(height, lat, values)
+                except ValueError as e:
+                    raise IonexParseError(line_number, str(e))
+            elif label.startswith("END OF") and label.endswith("MAP"):
+                if current is None:
+                    raise IonexParseError(line_number, "Empty map block")
+                maps[dtype][epoch] = current
+                current = None
+            elif label == "END OF FILE":
+                break
+        for dtype, dtype_maps in maps.items():
+            if dtype_maps:
+                ionex.set_maps(dtype_maps, dtype)
+
+    def _read_values(self,
+                     numbered,
+                     count: int,
+                     line_number: int) -> list[int]:
+        values = list()
+        width = self.VALUE_WIDTH
+        while len(values) < count:
+            try:
+                line_number, line = next(numbered)
+            except StopIteration:
+                raise IonexParseError(line_number, "Map values are truncated")
+            line = line.rstrip()
+            try:
+                values.extend(
+                    int(line[i: i + width]) for i in range(0, len(line), width)
+                )
+            except ValueError:
+                raise IonexParseError(line_number, "Bad map values")
+        return values
+
+
+def read_ionex(source: str | Path | BinaryIO) -> IonexFile:
+    """
+    Reads IONEX file (plain or compressed) into IonexFile.
+
+    :param source: path to IONEX file or binary stream
+    :type source: str, Path or BinaryIO
+
+    :rtype: IonexFile
+    """
+    return IonexReader(source).read()
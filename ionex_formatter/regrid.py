@@ -0,0 +1,221 @@
+from datetime import datetime
+
+from .ionex_map import IonexMap, IonexMap3D
+from .spatial import SpatialRange
+
+
+class GridCoverageError(ValueError):
+    """
+    Raised when target grid is not covered by source grid.
+    """
+    def __init__(self, value: float, rng: SpatialRange):
+        msg = "Coordinate {} is outside of source grid {}".format(value, rng)
+        super().__init__(msg)
+
+
+def axis_weights(source: SpatialRange,
+                 target: SpatialRange,
+                 period: float | None = None
+                 ) -> list[list[tuple[int, float]]]:
+    """
+    Returns weights of source nodes for every target node along one axis.
+
+    When target step is not smaller than source step (coarsening) target
+    node is a block average of source nodes closer than half of target
+    step, nodes exactly at the block edge have half weight. Otherwise
+    (refinement) target node is linearly interpolated between two
+    nearest source nodes.
+
+    If source grid spans the whole period (longitude from -180 to 180)
+    blocks wrap around it: nodes at both ends are averaged together and
+    the last node, which repeats the first one, is not counted twice.
+
+    :param period: period of axis, 360 for longitude
+    :type period: float
+
+    :returns: for every target node list of (source index, weight)
+
+    :raises GridCoverageError: if target node is outside of source grid
+    """
+    coordinates = source.coordinates
+    wrap = period is not None and len(coordinates) > 1 and \
+        abs(abs(coordinates[-1] - coordinates[0]) - period) < 1e-9
+    # the last node of wrapped axis is the first one
+    nodes = coordinates[:-1] if wrap else coordinates
+    low = min(coordinates[0], coordinates[-1])
+    high = max(coordinates[0], coordinates[-1])
+    half = abs(target.vstep) / 2
+    coarsen = abs(target.vstep) >= abs(source.vstep)
+    rows = list()
+    for value in target.coordinates:
+        if not low - half <= value <= high + half or \
+                (not coarsen and not low <= value <= high):
+            raise GridCoverageError(value, source)
+        if source.istep == 0:
+            rows.append([(0, 1.0)])
+            continue
+        if coarsen:
+            row = list()
+            for k, node in enumerate(nodes):
+                distance = abs(node - value)
+                if wrap:
+                    distance = min(distance % period,
+                                   period - distance % period)
+                if distance < half - 1e-9:
+                    row.append((k, 1.0))
+                elif distance <= half + 1e-9:
+                    row.append((k, 0.5))
+        else:
+            position = (value * source.scale - source.imin) / source.istep
+            k = min(int(position), source.get_node_number() - 2)
+            fraction = position - k
+            row = [(k, 1.0 - fraction), (k + 1, fraction)]
+            row = [(k, w) for k, w in row if w > 1e-12]
+        total = sum(w for _, w in row)
+        rows.append([(k, w / total) for k, w in row])
+    return rows
+
+
+class RegridWeights:
+    """
+    Sparse weights that convert values on source grid to target grid.
+
+    Weights are separable: weight of source node (i, j) for target node
+    (m, n) is product of latitude and longitude weights. Rows are built
+    once per (source, target) grid pair and shared, see RegridWeights.get.
+    """
+
+    _CACHE = dict()
+
+    def __init__(self,
+                 source_lat: SpatialRange,
+                 source_lon: SpatialRange,
+                 target_lat: SpatialRange,
+                 target_lon: SpatialRange):
+        self.source_lat = source_lat
+        self.source_lon = source_lon
+        self.target_lat = target_lat
+        self.target_lon = target_lon
+        lon_nodes = source_lon.get_node_number()
+        lat_rows = axis_weights(source_lat, target_lat)
+        lon_rows = axis_weights(source_lon, target_lon, period=360)
+        self.rows = [
+            [(i * lon_nodes + j, wi * wj)
+             for i, wi in lat_row for j, wj in lon_row]
+            for lat_row in lat_rows for lon_row in lon_rows
+        ]
+
+    @classmethod
+    def get(cls,
+            source_lat: SpatialRange,
+            source_lon: SpatialRange,
+            target_lat: SpatialRange,
+            target_lon: SpatialRange) -> "RegridWeights":
+        """
+        Returns cached weights for grid pair.
+        """
+        key = (source_lat, source_lon, target_lat, target_lon)
+        weights = cls._CACHE.get(key)
+        if weights is None:
+            weights = cls._CACHE[key] = cls(*key)
+        return weights
+
+    def apply(self, values: list) -> list:
+        """
+        Converts flat list of values on source grid to target grid.
+
+        Source nodes set to IonexMap.NO_VALUE are skipped and weights of
+        other nodes are normalized. Target node without any valid source
+        node is set to NO_VALUE.
+
+        :param values: values in (lat, lon) order of source grid
+        :type values: list
+
+        :returns: rounded values in (lat, lon) order of target grid
+        :rtype: list
+        """
+        no_value = IonexMap.NO_VALUE
+        result = list()
+        for row in self.rows:
+            total = 0.0
+            weight = 0.0
+            for k, w in row:
+                value = values[k]
+                if value != no_value:
+                    total += w * value
+                    weight += w
+            result.append(round(total / weight) if weight else no_value)
+        return result
+
+
+class Regridder:
+    """
+    Converts maps from one lat/lon grid to another, for example from 1x1
+    degree grid to 2.5x5 degree grid.
+
+    Usage::
+
+        regridder = Regridder(SpatialRange(87.5, -87.5, -2.5),
+                              SpatialRange(-180, 180, 5))
+        coarse_maps = regridder.regrid_maps(fine_maps)
+    """
+
+    def __init__(self,
+                 target_lat: SpatialRange,
+                 target_lon: SpatialRange):
+        """
+        :param target_lat: latitude grid of result
+        :type target_lat: SpatialRange
+
+        :param target_lon: longitude grid of result
+        :type target_lon: SpatialRange
+        """
+        self.target_lat = target_lat
+        self.target_lon = target_lon
+
+    def _weights(self, ionex_map: IonexMap | IonexMap3D) -> RegridWeights:
+        return RegridWeights.get(ionex_map.lat_range, ionex_map.lon_range,
+                                 self.target_lat, self.target_lon)
+
+    def regrid(self,
+               ionex_map: IonexMap | IonexMap3D) -> IonexMap | IonexMap3D:
+        """
+        Returns map on target grid, 3-dimensional maps are converted
+        height by height.
+
+        :raises GridCoverageError: if target grid is outside of map grid
+        """
+        weights = self._weights(ionex_map)
+        lon_nodes = self.target_lon.get_node_number()
+        if isinstance(ionex_map, IonexMap3D):
+            _, lats, lons = ionex_map.shape
+            layer = lats * lons
+            values = list()
+            for start in range(0, len(ionex_map.values), layer):
+                values.extend(
+                    weights.apply(ionex_map.values[start: start + layer])
+                )
+            return IonexMap3D(self.target_lat, self.target_lon,
+                              ionex_map.height_range, ionex_map.epoch, values)
+        source = list()
+        for lat in ionex_map.lat_range.coordinates:
+            source.extend(ionex_map.data[lat])
+        values = weights.apply(source)
+        result = IonexMap(self.target_lat, self.target_lon, ionex_map.height,
+                          ionex_map.epoch)
+        for i, lat in enumerate(self.target_lat.coordinates):
+            result.set_values(lat, values[i * lon_nodes: (i + 1) * lon_nodes])
+        return result
+
+    def regrid_maps(self, maps: dict[datetime, IonexMap | IonexMap3D]
+                    ) -> dict[datetime, IonexMap | IonexMap3D]:
+        """
+        Converts all maps, weights are computed once for all maps on the
+        same grid.
+
+        :param maps: maps, keys are epochs
+        :type maps: dict
+
+        :rtype: dict
+        """
+        return {epoch: self.regrid(m) for epoch, m in maps.items()}
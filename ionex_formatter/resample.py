@@ -0,0 +1,245 @@
+import bisect
+from datetime import datetime, timedelta
+from enum import Enum
+
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap, IonexMap3D
+
+
+class ResampleMethod(Enum):
+    """
+    NEAREST - map with the nearest epoch is copied, LINEAR - values of two
+    neighbour maps are interpolated in time, ROTATION - as LINEAR, but
+    maps are rotated around Earth axis with the Sun (15 degrees per hour)
+    before interpolation, so features fixed relative to the Sun are not
+    smeared.
+    """
+    NEAREST = 1
+    LINEAR = 2
+    ROTATION = 3
+
+
+# degrees of longitude Earth rotates per second
+ROTATION_RATE = 360.0 / 86400
+
+
+class TemporalResampler:
+    """
+    Makes maps at regular epochs from maps at irregular epochs.
+
+    Epochs of result go from start to end with given interval (by
+    default from the first to the last epoch of input). Every map is
+    flattened once, then values of result maps are computed from the two
+    neighbour input maps. Nodes where any of used values is NO_VALUE are
+    set to NO_VALUE.
+
+    Usage::
+
+        resampler = TemporalResampler(3600, ResampleMethod.ROTATION)
+        regular_maps = resampler.resample(maps)
+    """
+
+    def __init__(self,
+                 interval: int,
+                 method: ResampleMethod = ResampleMethod.LINEAR,
+                 start: datetime | None = None,
+                 end: datetime | None = None):
+        """
+        :param interval: interval between result maps in seconds
+        :type interval: int
+
+        :param method: interpolation method
+        :type method: ResampleMethod
+
+        :param start: epoch of the first result map
+        :type start: datetime
+
+        :param end: result maps are not later than end
+        :type end: datetime
+
+        :raises ValueError: if interval is not positive
+        """
+        if interval <= 0:
+            raise ValueError("Interval should be positive, got {}".format(
+                interval
+            ))
+        self.interval = interval
+        self.method = method
+        self.start = start
+        self.end = end
+
+    def epochs(self, maps: dict) -> list[datetime]:
+        """
+        Returns epochs of result maps.
+        """
+        start = self.start if self.start is not None else min(maps)
+        end = self.end if self.end is not None else max(maps)
+        step = timedelta(seconds=self.interval)
+        result = list()
+        epoch = start
+        while epoch <= end:
+            result.append(epoch)
+            epoch += step
+        return result
+
+    def resample(self, maps: dict[datetime, IonexMap | IonexMap3D]
+                 ) -> dict[datetime, IonexMap | IonexMap3D]:
+        """
+        Makes maps at regular epochs.
+
+        :param maps: maps on the same grid, keys are epochs
+        :type maps: dict
+
+        :rtype: dict
+
+        :raises ValueError: if there are no maps or result epoch is out of
+            range of input maps
+        """
+        if not maps:
+            raise ValueError("There are no maps to resample")
+        epochs = sorted(maps)
+        flat = dict()
+        result = dict()
+        for epoch in self.epochs(maps):
+            if not epochs[0] <= epoch <= epochs[-1]:
+                msg = "Epoch {} is out of range of maps {} - {}"
+                raise ValueError(msg.format(epoch, epochs[0], epochs[-1]))
+            k = bisect.bisect_left(epochs, epoch)
+            if epochs[k] == epoch:
+                result[epoch] = self._make_map(maps[epoch], epoch,
+                                               self._flat(maps[epoch], flat))
+                continue
+            before, after = epochs[k - 1], epochs[k]
+            if self.method == ResampleMethod.NEAREST:
+                nearest = before if epoch - before <= after - epoch else after
+                values = self._flat(maps[nearest], flat)
+            else:
+                values = self._interpolate(maps, flat, before, after, epoch)
+            result[epoch] = self._make_map(maps[before], epoch, values)
+        return result
+
+    def _interpolate(self,
+                     maps: dict,
+                     flat: dict,
+                     before: datetime,
+                     after: datetime,
+                     epoch: datetime) -> list:
+        span = (after - before).total_seconds()
+        weight = (epoch - before).total_seconds() / span
+        first = self._flat(maps[before], flat)
+        second = self._flat(maps[after], flat)
+        if self.method == ResampleMethod.ROTATION:
+            lon_range = maps[before].lon_range
+            first = self._rotate(first, lon_range,
+                                 (epoch - before).total_seconds())
+            second = self._rotate(second, lon_range,
+                                  (epoch - after).total_seconds())
+        no_value = IonexMap.NO_VALUE
+        return [
+            no_value if a == no_value or b == no_value
+            else round(a + (b - a) * weight)
+            for a, b in zip(first, second)
+        ]
+
+    @staticmethod
+    def _rotate(values: list, lon_range, seconds: float) -> list:
+        """
+        Returns values at longitudes lon + rotation rate * seconds, values
+        between nodes are interpolated linearly. For grids that cover
+        whole circle longitude wraps around, otherwise nodes rotated out
+        of grid are set to NO_VALUE.
+        """
+        nodes = lon_range.get_node_number()
+        if lon_range.istep == 0 or seconds == 0:
+            return values
+        shift = ROTATION_RATE * seconds / lon_range.vstep
+        span = abs(lon_range.imax - lon_range.imin + lon_range.istep)
+        period = None
+        if span >= 360 * lon_range.scale:
+            period = 360 * lon_range.scale // abs(lon_range.istep)
+        base = int(shift // 1)
+        fraction = shift - base
+        no_value = IonexMap.NO_VALUE
+        rotated = list()
+        for start in range(0, len(values), nodes):
+            row = values[start: start + nodes]
+            for j in range(nodes):
+                left = j + base
+                right = left + 1
+                if period is not None:
+                    left %= period
+                    right %= period
+                elif not 0 <= left < nodes or \
+                        (fraction and not 0 <= right < nodes):
+                    rotated.append(no_value)
+                    continue
+                a = row[left]
+                b = row[right] if fraction else a
+                if a == no_value or b == no_value:
+                    rotated.append(no_value)
+                else:
+                    rotated.append(a + (b - a) * fraction)
+        return rotated
+
+    @staticmethod
+    def _flat(ionex_map: IonexMap | IonexMap3D, cache: dict) -> list:
+        key = id(ionex_map)
+        values = cache.get(key)
+        if values is None:
+            if isinstance(ionex_map, IonexMap3D):
+                values = ionex_map.values
+            else:
+                values = list()
+                for lat in ionex_map.lat_range.coordinates:
+                    values.extend(ionex_map.data[lat])
+            cache[key] = values
+        return values
+
+    @staticmethod
+    def _make_map(template: IonexMap | IonexMap3D,
+                  epoch: datetime,
+                  values: list) -> IonexMap | IonexMap3D:
+        if isinstance(template, IonexMap3D):
+            return IonexMap3D(template.lat_range, template.lon_range,
+                              template.height_range, epoch, values)
+        ionex_map = IonexMap(template.lat_range, template.lon_range,
+                             template.height, epoch)
+        nodes = template.lon_range.get_node_number()
+        for i, lat in enumerate(template.lat_range.coordinates):
+            ionex_map.set_values(lat, values[i * nodes: (i + 1) * nodes])
+        return ionex_map
+
+
+def resample_file(ionex_file: IonexFile,
+                  interval: int,
+                  method: ResampleMethod = ResampleMethod.LINEAR) -> None:
+    """
+    Resamples all maps of file to regular epochs and sets EPOCH OF FIRST
+    MAP, EPOCH OF LAST MAP, INTERVAL and # OF MAPS IN FILE accordingly.
+
+    All map types (TEC, RMS, HGT) are resampled to the same epochs
+    defined by TEC maps (or by the first map type that has maps).
+
+    :param ionex_file: file with maps at irregular epochs
+    :type ionex_file: IonexFile
+
+    :param interval: interval between maps in seconds
+    :type interval: int
+
+    :param method: interpolation method
+    :type method: ResampleMethod
+    """
+    stacks = {dtype: maps for dtype, maps in ionex_file.maps.items() if maps}
+    if not stacks:
+        raise ValueError("There are no maps to resample")
+    reference = stacks.get(IonexMapType.TEC) or next(iter(stacks.values()))
+    resampler = TemporalResampler(interval, method,
+                                  min(reference), max(reference))
+    epochs = None
+    for dtype, maps in stacks.items():
+        resampled = resampler.resample(maps)
+        ionex_file.set_maps(resampled, dtype)
+        epochs = epochs or sorted(resampled)
+    ionex_file.set_epoch_range(epochs[0], epochs[-1])
+    ionex_file.set_label("INTERVAL", [interval])
+    ionex_file.set_label("# OF MAPS IN FILE", [len(epochs)])
@@ -0,0 +1,188 @@
+import os
+import tempfile
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+from .formatter import IonexFile, IonexMapType
+from .header_template import HeaderTemplate
+from .ionex_map import IonexMap
+from .naming import get_file_name, hour_letter
+
+
+class EpochOrderError(Exception):
+    """
+    Raised when maps given to rolling writer are not ordered by time.
+    """
+    def __init__(self, epoch: datetime, last_epoch: datetime):
+        msg = "Map {} is not later than previous map {}"
+        msg = msg.format(epoch, last_epoch)
+        super().__init__(msg)
+
+
+class SegmentPeriod(Enum):
+    HOUR = 1
+    DAY = 2
+
+
+class RollingIonexWriter:
+    """
+    Cuts time ordered stream of maps into hourly or daily files.
+
+    File names follow cccedddh.yyI convention, h is hour letter (A, B ...)
+    for hourly files and 0 for daily ones. Every file is written to
+    temporary file in output directory and renamed when the segment is
+    finished, so the file with final name is always complete.
+
+    Header is rendered once as HeaderTemplate from IonexFile given to
+    constructor. Only EPOCH OF FIRST MAP, EPOCH OF LAST MAP and # OF MAPS
+    IN FILE differ between segments, the last two are updated in place
+    when segment is finished.
+    """
+
+    def __init__(self,
+                 ionex_file: IonexFile,
+                 directory: str | Path,
+                 center: str,
+                 region: str = "G",
+                 period: SegmentPeriod = SegmentPeriod.HOUR,
+                 dtype: IonexMapType = IonexMapType.TEC,
+                 on_segment: Callable[[Path], None] | None = None):
+        """
+        :param ionex_file: file with header data shared by all segments
+        :type ionex_file: IonexFile
+
+        :param directory: output directory
+        :type directory: str or Path
+
+        :param center: 3 character analysis center designator
+        :type center: str
+
+        :param region: region code (G for Global Ionospheric Map)
+        :type region: str
+
+        :param period: length of segment
+        :type period: SegmentPeriod
+
+        :param dtype: type of maps
+        :type dtype: IonexMapType
+
+        :param on_segment: called with path of every finished file
+        :type on_segment: callable
+        """
+        self.ionex_file = ionex_file
+        self.directory = Path(directory)
+        self.center = center
+        self.region = region
+        self.period = period
+        self.dtype = dtype
+        self.on_segment = on_segment
+        self.template = HeaderTemplate(ionex_file)
+        self._segment_start = None
+        self._stream = None
+        self._temp_path = None
+        self._last_epoch = None
+        self._map_index = 0
+
+    def segment_start(self, epoch: datetime) -> datetime:
+        """
+        Returns start of segment that contains epoch.
+        """
+        start = epoch.replace(minute=0, second=0, microsecond=0)
+        if self.period == SegmentPeriod.DAY:
+            start = start.replace(hour=0)
+        return start
+
+    def segment_name(self, start: datetime) -> str:
+        """
+        Returns file name for segment starting at given time.
+        """
+        if self.period == SegmentPeriod.HOUR:
+            file_index = hour_letter(start.hour)
+        else:
+            file_index = 0
+        return get_file_name(self.center, start, self.region, file_index)
+
+    def add_map(self, epoch: datetime, ionex_map: IonexMap) -> None:
+        """
+        Writes map to current segment, finishes segment when map belongs
+        to the next one.
+
+        :param epoch: time of the map
+        :type epoch: datetime
+
+        :param ionex_map: map to be written
+        :type ionex_map: IonexMap
+
+        :raises EpochOrderError: when map is not later than previous one
+        """
+        if self._last_epoch is not None and epoch <= self._last_epoch:
+            raise EpochOrderError(epoch, self._last_epoch)
+        start = self.segment_start(epoch)
+        if self._stream is not None and start != self._segment_start:
+            self._finish_segment()
+        if self._stream is None:
+            self._start_segment(start, epoch)
+        self._map_index += 1
+        lines = self.ionex_file.format_map(
+            self.dtype, self._map_index, epoch, ionex_map
+        )
+        self._write(lines)
+        self._last_epoch = epoch
+
+    def close(self) -> None:
+        """
+        Finishes current segment.
+        """
+        if self._stream is not None:
+            self._finish_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._stream is not None:
+            self._stream.close()
+            os.unlink(self._temp_path)
+            self._stream = None
+
+    def _start_segment(self, start: datetime, epoch: datetime) -> None:
+        self._segment_start = start
+        self._map_index = 0
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=".", suffix=".tmp"
+        )
+        self._temp_path = Path(temp_path)
+        self._stream = os.fdopen(fd, "w+b")
+        header = self.template.stamp(
+            first_epoch=epoch, last_epoch=epoch, maps_number=0
+        )
+        self._write(header)
+
+    def _finish_segment(self) -> None:
+        self._write([self.ionex_file._get_end_line("END OF FILE")])
+        values = {
+            "EPOCH OF LAST MAP": self._last_epoch,
+            "# OF MAPS IN FILE": self._map_index,
+        }
+        for label, value in values.items():
+            if label not in self.template.slots:
+                continue
+            field = self.template.format_slot(label, value)
+            self._stream.seek(self.template.field_offset(label))
+            self._stream.write(field.encode("ascii"))
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+        self._stream.close()
+        self._stream = None
+        os.chmod(self._temp_path, 0o644)
+        path = self.directory / self.segment_name(self._segment_start)
+        os.replace(self._temp_path, path)
+        if self.on_segment is not None:
+            self.on_segment(path)
+
+    def _write(self, lines: list[str]) -> None:
+        self.ionex_file.write_block(self._stream, lines)
@@ -0,0 +1,383 @@
+import argparse
+import io
+import json
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .compression import SUFFIXES, Compression
+from .convert import (
+    ConversionError,
+    ConversionOptions,
+    convert_csv,
+    convert_grid,
+    output_name,
+    warm_up
+)
+from .formatter import NumericTokenTooBig
+from .spatial import SpatialRange
+
+# grids warmed up on start if no grids are given
+DEFAULT_GRIDS = [
+    (SpatialRange(87.5, -87.5, -2.5), SpatialRange(-180, 180, 5), 450.0),
+]
+
+
+CONTENT_TYPES = {
+    Compression.NONE: "text/plain; charset=ascii",
+    Compression.GZIP: "application/gzip",
+    Compression.BZIP2: "application/x-bzip2",
+    Compression.LZMA: "application/x-xz",
+}
+
+# errors of request data, reported with status 400, ArithmeticError is
+# raised for values that could not be scaled (infinite values)
+REQUEST_ERRORS = (ConversionError, ValueError, UnicodeDecodeError,
+                  NumericTokenTooBig, ArithmeticError)
+
+
+def _init_worker(grids: list[tuple]) -> None:
+    """
+    Initializer of worker process: fills caches of formatter for grids.
+    """
+    for lat_range, lon_range, height in grids:
+        warm_up(lat_range, lon_range, height)
+
+
+def convert_request(body: bytes,
+                    content_type: str,
+                    options: ConversionOptions,
+                    compression: Compression) -> tuple[str, bytes]:
+    """
+    Converts request body to IONEX file, runs in worker process.
+
+    :returns: file name and content of file
+    """
+    text = body.decode("utf-8")
+    if content_type.startswith("application/json"):
+        ionex_file = convert_grid(json.loads(text), options)
+    else:
+        ionex_file = convert_csv(io.StringIO(text), options)
+    suffixes = {v: k for k, v in SUFFIXES.items()}
+    name = output_name(ionex_file, options) + suffixes.get(compression, "")
+    stream = io.BytesIO()
+    ionex_file.write(stream, compression)
+    return name, stream.getvalue()
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """
+    Handles POST /convert with CSV (text/csv) or gridded arrays
+    (application/json) in body and GET /health.
+
+    Query parameters of /convert: center, region, exponent, height and
+    compression (none, gzip, bzip2 or lzma).
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: "ConversionServer"
+
+    def log_message(self, format, *args) -> None:
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path != "/health":
+            self._send_error(404, "Not found")
+            return
+        self._send_json(200, self.server.service.stats())
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self._send_error(404, "Not found")
+            return
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self._send_error(411, "Content-Length is required")
+            return
+        if length > service.max_body:
+            # body is not read, so connection could not be reused
+            self.close_connection = True
+            self._send_error(413, "Request body is too large")
+            return
+        # slot is taken before body is read, so overloaded service does
+        # not read bodies of rejected requests
+        if not service.slots.acquire(blocking=False):
+            self.close_connection = True
+            service.count("rejected")
+            self._send_error(503, "Too many requests", {"Retry-After": "1"})
+            return
+        try:
+            self._convert(url.query, self.rfile.read(length))
+        finally:
+            service.slots.release()
+
+    def _convert(self, query: str, body: bytes) -> None:
+        service = self.server.service
+        try:
+            params = {k: v[-1] for k, v in parse_qs(query).items()}
+            options = service.options
+            for name, cast in (("center", str), ("region", str),
+                               ("exponent", int), ("height", float)):
+                if name in params:
+                    options = replace(options, **{name: cast(params[name])})
+            compression = Compression(params.get("compression", "none"))
+            if compression == Compression.UNIX:
+                raise ConversionError(
+                    "Compression {} is not supported".format(compression)
+                )
+            content_type = self.headers.get("Content-Type", "text/csv")
+            executor = service.executor
+            future = executor.submit(convert_request, body, content_type,
+                                     options, compression)
+            name, data = future.result()
+        except REQUEST_ERRORS as e:
+            service.count("failed")
+            self._send_error(400, str(e))
+            return
+        except BrokenProcessPool:
+            # worker process died, the next request gets a new pool
+            service.count("failed")
+            service.restart_pool(executor)
+            self._send_error(503, "Conversion worker failed",
+                             {"Retry-After": "1"})
+            return
+        except Exception as e:
+            service.count("failed")
+            self.log_error("Conversion failed: %r", e)
+            self._send_error(500, "Internal server error")
+            return
+
+        service.count("converted")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[compression])
+        self.send_header("Content-Disposition",
+                         'attachment; filename="{}"'.format(name))
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self,
+                    code: int,
+                    message: str,
+                    headers: dict | None = None) -> None:
+        self._send_json(code, {"error": message}, headers)
+
+    def _send_json(self,
+                   code: int,
+                   data: dict,
+                   headers: dict | None = None) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: "ConversionService"):
+        self.service = service
+        super().__init__(address, ConversionHandler)
+
+
+class ConversionService:
+    """
+    HTTP service that converts CSV or gridded arrays to IONEX.
+
+    Conversions run in a pool of worker processes, so they do not compete
+    for GIL with each other and with request handling. Caches of formatter
+    (format tokens of header and value lines, grid lines) are filled for
+    given grids by initializer of every worker process, so the first
+    requests on these grids are not slower than others. Number of
+    requests that are converted or wait for worker is limited, other
+    requests are rejected with 503 status.
+
+    Usage::
+
+        with ConversionService(port=8080, workers=4) as service:
+            service.serve_forever()
+
+    or from command line::
+
+        python -m ionex_formatter.service --port 8080 --workers 4
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 workers: int = 4,
+                 max_requests: int | None = None,
+                 max_body: int = 256 * 1024 * 1024,
+                 options: ConversionOptions | None = None,
+                 grids: list[tuple] | None = None,
+                 verbose: bool = False):
+        """
+        :param host: address to listen
+        :type host: str
+
+        :param port: port to listen, 0 for any free port
+        :type port: int
+
+        :param workers: number of conversion worker processes
+        :type workers: int
+
+        :param max_requests: number of requests converted or waiting for
+            worker, by default twice the number of workers
+        :type max_requests: int
+
+        :param max_body: maximal size of request body in bytes
+        :type max_body: int
+
+        :param options: default conversion options
+        :type options: ConversionOptions
+
+        :param grids: (lat_range, lon_range, height) to warm up
+        :type grids: list
+
+        :param verbose: log requests to stderr
+        :type verbose: bool
+        """
+        self.workers = workers
+        self.max_requests = max_requests or 2 * workers
+        self.max_body = max_body
+        self.options = options or ConversionOptions()
+        self.grids = DEFAULT_GRIDS if grids is None else grids
+        self.verbose = verbose
+        self.slots = threading.BoundedSemaphore(self.max_requests)
+        self.executor = None
+        self._counters = {"converted": 0, "failed": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._thread = None
+        self.server = ConversionServer((host, port), self)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        return "http://{}:{}".format(*self.address)
+
+    def start_pool(self) -> None:
+        """
+        Starts worker processes and waits until one of them is ready.
+        Every worker warms up caches before it takes the first request.
+        """
+        if self.executor is not None:
+            return
+        self.executor = ProcessPoolExecutor(self.workers,
+                                            initializer=_init_worker,
+                                            initargs=(self.grids,))
+        self.executor.submit(int).result()
+
+    def restart_pool(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Replaces broken pool of worker processes. Pool is replaced once
+        when several requests failed on it.
+
+        :param executor: pool that failed
+        :type executor: ProcessPoolExecutor
+        """
+        with self._pool_lock:
+            if self.executor is not executor:
+                return
+            self.executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.start_pool()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["workers"] = self.workers
+        counters["max_requests"] = self.max_requests
+        return counters
+
+    def serve_forever(self) -> None:
+        self.start_pool()
+        self.server.serve_forever()
+
+    def start(self) -> None:
+        """
+        Serves requests in background thread.
+        """
+        self.start_pool()
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops serving and waits for running conversions.
+        """
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self) -> "ConversionService":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ionex_formatter.service",
+        description="HTTP service that converts CSV or gridded arrays "
+                    "to IONEX"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="requests converted or waiting for worker")
+    parser.add_argument("--center", default="mos")
+    parser.add_argument("--grid", nargs=7, type=float, action="append",
+                        metavar=("LAT1", "LAT2", "DLAT",
+                                 "LON1", "LON2", "DLON", "H"),
+                        help="grid to warm up, could be repeated")
+    args = parser.parse_args(argv)
+
+    grids = None
+    if args.grid:
+        grids = [(SpatialRange(*g[:3]), SpatialRange(*g[3:6]), g[6])
+                 for g in args.grid]
+    service = ConversionService(args.host, args.port, args.workers,
+                                args.max_requests,
+                                options=ConversionOptions(center=args.center),
+                                grids=grids, verbose=True)
+    print("Serving on {}".format(service.url), file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from .ionex_map import IonexMap, IonexMap3D
+from .spatial import SpatialRange
+
+# SharedMemory takes track argument since Python 3.13, blocks created
+# without tracking are not removed by resource tracker of producer
+_TRACK_ARGUMENT = sys.version_info >= (3, 13)
+
+
+def _range_key(rng: SpatialRange) -> tuple:
+    return (rng.vmin, rng.vmax, rng.vstep, rng.decimal)
+
+
+@dataclass(frozen=True)
+class SharedMapDescriptor:
+    """
+    Small picklable description of map stored in shared memory: name of
+    shared memory block, shape (heights, lats, lons), type code of values
+    (see array module), epoch and grid given as (vmin, vmax, vstep,
+    decimal) of SpatialRange.
+    """
+    name: str
+    shape: tuple[int, int, int]
+    dtype: str
+    epoch: datetime
+    lat: tuple
+    lon: tuple
+    height: tuple
+
+    @property
+    def lat_range(self) -> SpatialRange:
+        return SpatialRange(*self.lat)
+
+    @property
+    def lon_range(self) -> SpatialRange:
+        return SpatialRange(*self.lon)
+
+    @property
+    def height_range(self) -> SpatialRange:
+        return SpatialRange(*self.height)
+
+
+class SharedIonexMap():
+    """
+    Map with values in multiprocessing.shared_memory block.
+
+    Producer process creates map, sets values and hands descriptor over
+    to writer process (for example through a queue or as result of a
+    pool task). Writer attaches to the same memory and formats map from
+    it, values are never pickled. Values are stored as flat array of C int
+    in (height, lat, lon) order as in IonexMap3D. Map could be passed to
+    IonexFile.format_map and writers like IonexMap or IonexMap3D.
+
+    Shared memory block is owned by producer until handoff and by writer
+    after it, so writer should release map when it is written.
+
+    Usage::
+
+        # producer process
+        shared_map = SharedIonexMap.create(lat_range, lon_range, epoch, 450)
+        for lat, values in rows:
+            shared_map.set_values(lat, values)
+        queue.put(shared_map.handoff())
+
+        # writer process
+        with SharedIonexMap.attach(queue.get()) as shared_map:
+            writer.add_map(shared_map.epoch, shared_map)
+    """
+
+    NO_VALUE = IonexMap.NO_VALUE
+    DTYPE = "i"
+
+    def __init__(self,
+                 memory: SharedMemory,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 height_range: SpatialRange,
+                 epoch: datetime):
+        """
+        Use SharedIonexMap.create or SharedIonexMap.attach instead.
+        """
+        self.memory = memory
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.height_range = height_range
+        self.epoch = epoch
+        self.values = memory.buf.cast(self.DTYPE)[:self.size]
+
+    @classmethod
+    def create(cls,
+               lat_range: SpatialRange,
+               lon_range: SpatialRange,
+               epoch: datetime,
+               height: float | SpatialRange) -> "SharedIonexMap":
+        """
+        Allocates shared memory for map, all values are set to NO_VALUE.
+        Since Python 3.13 block is created without resource tracking, so
+        producer should release maps that are not handed off.
+
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param epoch: time of the map
+        :type epoch: datetime
+
+        :param height: height of 2-dimensional map or height grid of
+            3-dimensional map
+        :type height: float or SpatialRange
+
+        :rtype: SharedIonexMap
+        """
+        if not isinstance(height, SpatialRange):
+            height = SpatialRange(height, height, 0)
+        size = (height.get_node_number() * lat_range.get_node_number() *
+                lon_range.get_node_number())
+        itemsize = array(cls.DTYPE).itemsize
+        if _TRACK_ARGUMENT:
+            memory = SharedMemory(create=True, size=size * itemsize,
+                                  track=False)
+        else:
+            memory = SharedMemory(create=True, size=size * itemsize)
+        shared_map = cls(memory, lat_range, lon_range, height, epoch)
+        shared_map.values[:] = array(cls.DTYPE, [cls.NO_VALUE]) * size
+        return shared_map
+
+    @classmethod
+    def attach(cls, descriptor: SharedMapDescriptor) -> "SharedIonexMap":
+        """
+        Attaches to map created by other process.
+
+        :param descriptor: descriptor returned by handoff or descriptor
+        :type descriptor: SharedMapDescriptor
+
+        :raises ValueError: if shape or type of values do not match grid
+        """
+        shared_map = cls(SharedMemory(name=descriptor.name),
+                         descriptor.lat_range,
+                         descriptor.lon_range,
+                         descriptor.height_range,
+                         descriptor.epoch)
+        if shared_map.shape != descriptor.shape or \
+                descriptor.dtype != cls.DTYPE:
+            shared_map.close()
+            msg = "Descriptor {} does not match grid {}"
+            raise ValueError(msg.format(descriptor, shared_map.shape))
+        return shared_map
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return (self.height_range.get_node_number(),
+                self.lat_range.get_node_number(),
+                self.lon_range.get_node_number())
+
+    @property
+    def size(self) -> int:
+        heights, lats, lons = self.shape
+        return heights * lats * lons
+
+    @property
+    def height(self) -> float:
+        """
+        Height of 2-dimensional map (the first height of the grid).
+        """
+        return self.height_range.coordinates[0]
+
+    @property
+    def descriptor(self) -> SharedMapDescriptor:
+        return SharedMapDescriptor(
+            self.memory.name, self.shape, self.DTYPE, self.epoch,
+            _range_key(self.lat_range), _range_key(self.lon_range),
+            _range_key(self.height_range)
+        )
+
+    def set_values(self,
+                   lat: float,
+                   values: list,
+                   height: float | None = None) -> None:
+        """
+        Sets values of all longitudes for latitude.
+
+        :param lat: latitude of row
+        :type lat: float
+
+        :param values: values of all longitude nodes
+        :type values: list
+
+        :param height: height of row, the first height if None
+        :type height: float
+
+        :raises ValueError: if number of values does not match grid
+        """
+        lons = self.lon_range.get_node_number()
+        if len(values) != lons:
+            msg = "Expected {} values for latitude {}, got {}"
+            raise ValueError(msg.format(lons, lat, len(values)))
+        k = 0 if height is None else self.height_range.index(height)
+        i = self.lat_range.index(lat)
+        start = (k * self.lat_range.get_node_number() + i) * lons
+        self.values[start: start + lons] = array(self.DTYPE, values)
+
+    def rows(self):
+        """
+        Iterates over rows of map in the order they are written to file.
+
+        Values are memoryview slices of shared memory, so rows are encoded
+        without copies. Slices are valid until map is closed and should
+        be copied (for example with tolist) to be kept longer.
+
+        :returns: generator of (height, lat, values)
+        """
+        lons = self.lon_range.get_node_number()
+        values = self.values
+        start = 0
+        for height in self.height_range.coordinates:
+            for lat in self.lat_range.coordinates:
+                yield height, lat, values[start: start + lons]
+                start += lons
+
+    def to_map(self) -> IonexMap | IonexMap3D:
+        """
+        Copies values to IonexMap (single height) or IonexMap3D.
+        """
+        if self.shape[0] > 1:
+            return IonexMap3D(self.lat_range, self.lon_range,
+                              self.height_range, self.epoch,
+                              self.values.tolist())
+        ionex_map = IonexMap(self.lat_range, self.lon_range, self.height,
+                             self.epoch)
+        for _, lat, values in self.rows():
+            ionex_map.set_values(lat, values.tolist())
+        return ionex_map
+
+    def handoff(self) -> SharedMapDescriptor:
+        """
+        Passes ownership of memory to other process: memory is closed in
+        this process and is not removed when this process exits.
+
+        :returns: descriptor to attach to map
+        :rtype: SharedMapDescriptor
+        """
+        descriptor = self.descriptor
+        if not _TRACK_ARGUMENT:
+            # before Python 3.13 created block is always registered in
+            # resource tracker of producer, which removes it at exit.
+            # There is no public API to unregister it, so internal name
+            # of block is used. Writer process registers it on attach.
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.close()
+        return descriptor
+
+    def close(self) -> None:
+        """
+        Closes memory in this process, memory is not removed.
+        """
+        if self.values is not None:
+            self.values.release()
+            self.values = None
+            self.memory.close()
+
+    def release(self) -> None:
+        """
+        Closes and removes shared memory, should be called by owner when
+        map is no longer needed.
+        """
+        self.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedIonexMap":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
@@ -33,10 +33,23 @@ class DecimalDigitReduceAccuracyError(Exception):
         msg = msg + " resulting in {} when rounded".format(rounded_value)
         super().__init__(msg)
 
+class OffGridCoordinateError(ValueError):
+    """
+    Raised when coordinate does not match any node of the range.
+    """
+    def __init__(self, value: float, rng: "SpatialRange"):
+        msg = "Coordinate {} is not a node of {}".format(value, rng)
+        super().__init__(msg)
+
+
 class SpatialRange():
     
     """
     Container for min, max and step storage.
+
+    Range is stored as scaled integers (value * 10 ** decimal) as well, so
+    node count and node index are computed exactly. Coordinates of nodes
+    are computed once and shared by all users of the range.
     """
     
     def __init__(self, vmin: float, vmax: float, vstep: float, decimal: int=1):
@@ -96,21 +109,115 @@ class SpatialRange():
                                                   self.vmin, 
                                                   self.decimal)
 
-        if self.vstep != 0:
-            count = (self.vmax - self.vmin) / self.vstep 
-            if count != int(count):
+        self.scale = 10 ** self.decimal
+        self.imin = round(self.vmin * self.scale)
+        self.imax = round(self.vmax * self.scale)
+        self.istep = round(self.vstep * self.scale)
+        self._coordinates = None
+        if self.istep != 0:
+            if (self.imax - self.imin) % self.istep != 0:
+                count = (self.vmax - self.vmin) / self.vstep 
                 raise NonIntegerStepCountError(count, int(count))
-        if self.vstep == 0 and self.vmax != self.vmin:
+        if self.istep == 0 and self.imax != self.imin:
             raise FiniteRangeZeroStepError
     
     def get_node_number(self) -> int:
         """
         Rerturn a number of nodes in range including both limits
         """
-        if self.vstep == 0:
+        if self.istep == 0:
             return 1
         else:
-            return int(round((self.vmax - self.vmin) / self.vstep, 0)) + 1
+            return (self.imax - self.imin) // self.istep + 1
+
+    @property
+    def coordinates(self) -> tuple[float]:
+        """
+        Coordinates of all nodes from vmin to vmax, computed once.
+        """
+        if self._coordinates is None:
+            self._coordinates = tuple(
+                round((self.imin + k * self.istep) / self.scale, self.decimal)
+                for k in range(self.get_node_number())
+            )
+        return self._coordinates
+
+    def index(self, value: float, tolerance: float = 0.0) -> int:
+        """
+        Returns index of node for given coordinate.
+
+        :param value: coordinate
+        :type value: float
+
+        :param tolerance: coordinate that differs from node not more than
+            tolerance is snapped to that node
+        :type tolerance: float
+
+        :raises OffGridCoordinateError: if there is no node for coordinate
+        """
+        offset = value * self.scale - self.imin
+        if self.istep == 0:
+            k = 0
+        else:
+            k = round(offset / self.istep)
+        limit = tolerance * self.scale + 1e-6
+        if not 0 <= k < self.get_node_number() or \
+                abs(offset - k * self.istep) > limit:
+            raise OffGridCoordinateError(value, self)
+        return k
+
+    def indices(self, 
+                values: list[float], 
+                tolerance: float = 0.0) -> list[int | None]:
+        """
+        Returns index of node for every coordinate, None is returned for
+        coordinates that are not nodes.
+
+        :param values: coordinates
+        :type values: list
+
+        :param tolerance: coordinate that differs from node not more than
+            tolerance is snapped to that node
+        :type tolerance: float
+        """
+        scale = self.scale
+        imin = self.imin
+        istep = self.istep
+        nodes = self.get_node_number()
+        limit = tolerance * scale + 1e-6
+        result = list()
+        for value in values:
+            offset = value * scale - imin
+            k = round(offset / istep) if istep else 0
+            if 0 <= k < nodes and abs(offset - k * istep) <= limit:
+                result.append(k)
+            else:
+                result.append(None)
+        return result
+
+    def snap(self, value: float, tolerance: float = 0.0) -> float:
+        """
+        Returns node coordinate for given coordinate.
+
+        :raises OffGridCoordinateError: if there is no node for coordinate
+        """
+        return self.coordinates[self.index(value, tolerance)]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SpatialRange):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def _key(self) -> tuple:
+        return (self.imin, self.imax, self.istep, self.decimal)
+
+    def __repr__(self) -> str:
+        return "SpatialRange({}, {}, {}, decimal={})".format(
+            self.vmin, self.vmax, self.vstep, self.decimal
+        )
 
     def get_chunks(self, chunk_size: int) -> list:
         """
@@ -0,0 +1,342 @@
+import argparse
+import math
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Iterable, TextIO
+
+from .compression import open_output
+from .formatter import IonexFile, IonexMapType
+from .ionex_map import IonexMap
+from .spatial import SpatialRange
+
+
+@dataclass
+class Storm:
+    """
+    Storm-like enhancement: gaussian spot that appears at start, moves
+    from high latitude to equator and fades after duration.
+    """
+    start: datetime
+    duration: float = 6.0
+    amplitude: float = 30.0
+    lat: float = 50.0
+    lon: float = 0.0
+    width: float = 15.0
+
+
+@dataclass
+class SyntheticTecModel:
+    """
+    Physically plausible TEC field (TECU):
+
+    * diurnal variation with maximum at 14 LT and night floor;
+    * equatorial anomaly crests at +-15 degrees and decrease to poles;
+    * storms given as Storm objects;
+    * gaussian noise.
+    """
+    base: float = 40.0
+    night: float = 0.2
+    noise: float = 1.0
+    storms: list[Storm] = field(default_factory=list)
+
+
+class EpochSchedule:
+    """
+    Lazy sequence of count epochs starting at start with interval seconds.
+    """
+
+    def __init__(self, start: datetime, interval: int, count: int):
+        self.start = start
+        self.interval = interval
+        self.count = count
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self.start + timedelta(seconds=k * self.interval)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class SyntheticGenerator:
+    """
+    Generates synthetic TEC values on the grid for every epoch of
+    schedule.
+
+    Values are generated epoch by epoch when they are requested, so any
+    number of epochs could be written with memory of a single map. Noise
+    of every epoch depends only on seed and epoch number, so the same
+    values are produced by all outputs and for any chunk size.
+
+    Usage::
+
+        generator = SyntheticGenerator(lat_range, lon_range,
+                                       EpochSchedule(start, 900, 96),
+                                       seed=1)
+        for times, lats, lons, values in generator.iter_chunks(100000):
+            ...
+    """
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 epochs: Iterable[datetime],
+                 model: SyntheticTecModel | None = None,
+                 seed: int = 0):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param epochs: epochs of maps, iterated on every pass over data,
+            so it should not be an iterator (use EpochSchedule or list)
+        :type epochs: iterable of datetime
+
+        :param model: parameters of TEC field
+        :type model: SyntheticTecModel
+
+        :param seed: seed of noise
+        :type seed: int
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.epochs = epochs
+        self.model = model or SyntheticTecModel()
+        self.seed = seed
+        lats = lat_range.coordinates
+        self._latitude_factor = [
+            math.exp(-((lat - 15) / 10) ** 2) +
+            math.exp(-((lat + 15) / 10) ** 2) +
+            0.6 * math.cos(math.radians(lat))
+            for lat in lats
+        ]
+
+    def _diurnal(self, epoch: datetime) -> list[float]:
+        hours = epoch.hour + epoch.minute / 60 + epoch.second / 3600
+        night = self.model.night
+        factors = list()
+        for lon in self.lon_range.coordinates:
+            local_time = hours + lon / 15
+            day = math.cos(2 * math.pi * (local_time - 14) / 24)
+            factors.append(night + (1 - night) * max(day, 0.0))
+        return factors
+
+    def _storm(self, storm: Storm, epoch: datetime):
+        hours = (epoch - storm.start).total_seconds() / 3600
+        if not 0 <= hours <= storm.duration:
+            return None
+        phase = hours / storm.duration
+        amplitude = storm.amplitude * math.sin(math.pi * phase)
+        center = storm.lat * (1 - phase)
+        return amplitude, center
+
+    def values(self, index: int, epoch: datetime) -> list[float]:
+        """
+        Returns values of epoch as flat list in (lat, lon) order.
+
+        :param index: number of epoch in schedule, used for noise seed
+        :type index: int
+
+        :param epoch: time of values
+        :type epoch: datetime
+        """
+        model = self.model
+        rng = random.Random(self.seed * 1000003 + index)
+        diurnal = self._diurnal(epoch)
+        storms = [
+            (storm, state) for storm in model.storms
+            if (state := self._storm(storm, epoch)) is not None
+        ]
+        lons = self.lon_range.coordinates
+        values = list()
+        for lat, factor in zip(self.lat_range.coordinates,
+                               self._latitude_factor):
+            row = [model.base * factor * d for d in diurnal]
+            for storm, (amplitude, center) in storms:
+                lat_term = math.exp(-((lat - center) / storm.width) ** 2)
+                if lat_term < 1e-6:
+                    continue
+                for j, lon in enumerate(lons):
+                    distance = (lon - storm.lon + 180) % 360 - 180
+                    row[j] += amplitude * lat_term * \
+                        math.exp(-(distance / (4 * storm.width)) ** 2)
+            if model.noise:
+                row = [max(v + rng.gauss(0, model.noise), 0.0) for v in row]
+            values.extend(row)
+        return values
+
+    def iter_epochs(self):
+        """
+        Iterates over epochs and their values.
+
+        :returns: generator of (epoch, flat list of values)
+        """
+        for index, epoch in enumerate(self.epochs):
+            yield epoch, self.values(index, epoch)
+
+    def iter_chunks(self, chunk_size: int = 100000):
+        """
+        Iterates over chunks of observations given as columns.
+
+        :param chunk_size: maximal number of values in chunk
+        :type chunk_size: int
+
+        :returns: generator of (times, lats, lons, values) lists
+        """
+        lats = self.lat_range.coordinates
+        lons = self.lon_range.coordinates
+        points = [(lat, lon) for lat in lats for lon in lons]
+        chunk = ([], [], [], [])
+        for epoch, values in self.iter_epochs():
+            for (lat, lon), value in zip(points, values):
+                chunk[0].append(epoch)
+                chunk[1].append(lat)
+                chunk[2].append(lon)
+                chunk[3].append(value)
+                if len(chunk[3]) >= chunk_size:
+                    yield chunk
+                    chunk = ([], [], [], [])
+        if chunk[3]:
+            yield chunk
+
+    def iter_maps(self, height: float = 450.0, exponent: int = -1):
+        """
+        Iterates over maps, values are scaled by exponent and rounded.
+
+        :returns: generator of (epoch, IonexMap)
+        """
+        scale = 10 ** -exponent
+        nodes = self.lon_range.get_node_number()
+        for epoch, values in self.iter_epochs():
+            ionex_map = IonexMap(self.lat_range, self.lon_range, height,
+                                 epoch)
+            for i, lat in enumerate(self.lat_range.coordinates):
+                ionex_map.set_values(lat, [
+                    round(v * scale) for v in values[i * nodes:
+                                                     (i + 1) * nodes]
+                ])
+            yield epoch, ionex_map
+
+    def write_csv(self, stream: TextIO, chunk_size: int = 100000) -> int:
+        """
+        Writes values as whitespace separated CSV (the same columns as
+        input of converter: year month day hour minute second lat lon
+        val).
+
+        :returns: number of written values
+        """
+        stream.write("#year month day_of_month hour minute second"
+                     "    lat    lon     val\n")
+        count = 0
+        for times, lats, lons, values in self.iter_chunks(chunk_size):
+            lines = [
+                "{:4d} {:5d} {:12d} {:4d} {:6d} {:6d} {:6.1f} {:6.1f} "
+                "{:7.2f}\n".format(t.year, t.month, t.day, t.hour, t.minute,
+                                   t.second, lat, lon, value)
+                for t, lat, lon, value in zip(times, lats, lons, values)
+            ]
+            stream.write("".join(lines))
+            count += len(values)
+        return count
+
+    def write_ionex(self,
+                    target: str | Path | BinaryIO,
+                    height: float = 450.0,
+                    exponent: int = -1) -> None:
+        """
+        Writes IONEX file map by map, maps are not kept in memory.
+
+        Epoch range, interval and number of maps are taken from epochs
+        before maps are generated, interval is one between the first two
+        epochs.
+        """
+        start = last = second = None
+        count = 0
+        for epoch in self.epochs:
+            if count == 0:
+                start = epoch
+            elif count == 1:
+                second = epoch
+            last = epoch
+            count += 1
+        if count == 0:
+            raise ValueError("There are no epochs to write")
+        interval = int((second - start).total_seconds()) if second else 0
+        ionex_file = IonexFile()
+        ionex_file.set_version_type_gnss()
+        ionex_file.add_comment("Synthetic TEC maps, seed {}".format(self.seed))
+        ionex_file.set_epoch_range(start, last)
+        ionex_file.set_label("INTERVAL", [interval])
+        ionex_file.set_label("# OF MAPS IN FILE", [count])
+        ionex_file.set_map_dimension(2)
+        ionex_file.set_spatial_grid(self.lat_range, self.lon_range,
+                                    SpatialRange(height, height, 0))
+        ionex_file.set_label("EXPONENT", [exponent])
+        with open_output(target) as stream:
+            write = ionex_file.write_block
+            write(stream, ionex_file.get_header_lines())
+            maps = self.iter_maps(height, exponent)
+            for index, (epoch, ionex_map) in enumerate(maps, start=1):
+                write(stream, ionex_file.format_map(IonexMapType.TEC, index,
+                                                    epoch, ionex_map))
+            write(stream, [ionex_file._get_end_line("END OF FILE")])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ionex_formatter.synthetic",
+        description="Generates synthetic TEC data for load testing"
+    )
+    parser.add_argument("--lat", nargs=3, type=float,
+                        default=[87.5, -87.5, -2.5],
+                        metavar=("LAT1", "LAT2", "DLAT"))
+    parser.add_argument("--lon", nargs=3, type=float,
+                        default=[-180.0, 180.0, 5.0],
+                        metavar=("LON1", "LON2", "DLON"))
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        default=datetime(2010, 12, 28))
+    parser.add_argument("--interval", type=int, default=3600,
+                        help="interval between epochs in seconds")
+    parser.add_argument("--count", type=int, default=24,
+                        help="number of epochs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=1.0,
+                        help="standard deviation of noise in TECU")
+    parser.add_argument("--storm", nargs=3, action="append", default=[],
+                        metavar=("START", "HOURS", "AMPLITUDE"),
+                        help="storm start (ISO time), duration, amplitude")
+    parser.add_argument("--format", choices=["csv", "ionex"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--out", default="-",
+                        help="output file, '-' for standard output")
+    args = parser.parse_args(argv)
+
+    storms = [
+        Storm(datetime.fromisoformat(start), float(hours), float(amplitude))
+        for start, hours, amplitude in args.storm
+    ]
+    model = SyntheticTecModel(noise=args.noise, storms=storms)
+    generator = SyntheticGenerator(
+        SpatialRange(*args.lat), SpatialRange(*args.lon),
+        EpochSchedule(args.start, args.interval, args.count),
+        model, args.seed
+    )
+    if args.format == "csv":
+        if args.out == "-":
+            generator.write_csv(sys.stdout, args.chunk_size)
+        else:
+            with open(args.out, "w") as stream:
+                generator.write_csv(stream, args.chunk_size)
+    else:
+        target = sys.stdout.buffer if args.out == "-" else args.out
+        generator.write_ionex(target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
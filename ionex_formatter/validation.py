@@ -0,0 +1,295 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from numbers import Integral
+from typing import Any
+
+from .ionex_map import GridCell, IonexMap, IonexMap3D
+from .spatial import SpatialRange
+
+
+def _all_integral(values: list) -> bool:
+    # the same check as writer does: floats are not integers even when
+    # they have no fractional part, writer can not format them as I5
+    return all(issubclass(t, Integral) for t in set(map(type, values)))
+
+
+class IssueKind(Enum):
+    OVERFLOW = "value does not fit I5 format"
+    NOT_INTEGER = "value is not integer"
+    NOT_FINITE = "value is NaN or infinite"
+    MISSING_NODE = "grid node has no value"
+    DUPLICATE_NODE = "grid node has several values"
+    OFF_GRID = "coordinate is not a grid node"
+    EPOCH_GAP = "interval between maps differs from expected"
+
+
+@dataclass
+class ValidationIssue:
+    kind: IssueKind
+    epoch: datetime | None = None
+    lat: float | None = None
+    lon: float | None = None
+    value: Any = None
+
+    def __str__(self) -> str:
+        place = [
+            "{}={}".format(name, value)
+            for name, value in (("epoch", self.epoch),
+                                ("lat", self.lat),
+                                ("lon", self.lon),
+                                ("value", self.value))
+            if value is not None
+        ]
+        return "{}: {}".format(self.kind.value, ", ".join(place))
+
+
+class MapValidationError(Exception):
+    """
+    Raised by ValidationReport.raise_for_issues when there are issues.
+    """
+    def __init__(self, report: "ValidationReport"):
+        lines = ["{} issue(s) found:".format(len(report.issues))]
+        lines.extend(str(issue) for issue in report.issues[:20])
+        if len(report.issues) > 20:
+            lines.append("...")
+        super().__init__("\n".join(lines))
+        self.report = report
+
+
+@dataclass
+class ValidationReport:
+    """
+    All problems found in map stack.
+    """
+    issues: list[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def summary(self) -> dict[IssueKind, int]:
+        """
+        Returns number of issues of every kind.
+        """
+        return dict(Counter(issue.kind for issue in self.issues))
+
+    def by_kind(self, kind: IssueKind) -> list[ValidationIssue]:
+        return [issue for issue in self.issues if issue.kind == kind]
+
+    def raise_for_issues(self) -> None:
+        """
+        :raises MapValidationError: if there is at least one issue
+        """
+        if self.issues:
+            raise MapValidationError(self)
+
+
+class MapStackValidator:
+    """
+    Checks whole stack of maps and reports all problems at once.
+
+    Unlike checks done while map is set or written, validator does not
+    stop on the first problem. Every map is checked by aggregates first
+    (number of nodes, min and max of values), values are scanned one by
+    one only when aggregate check fails.
+    """
+
+    def __init__(self,
+                 lat_range: SpatialRange,
+                 lon_range: SpatialRange,
+                 interval: int | None = None,
+                 min_value: int = -9999,
+                 max_value: int = 99999):
+        """
+        :param lat_range: latitude grid
+        :type lat_range: SpatialRange
+
+        :param lon_range: longitude grid
+        :type lon_range: SpatialRange
+
+        :param interval: expected interval between maps in seconds, if
+            None the most common interval is expected
+        :type interval: int
+
+        :param min_value: minimal value that fits map format
+        :type min_value: int
+
+        :param max_value: maximal value that fits map format
+        :type max_value: int
+        """
+        self.lat_range = lat_range
+        self.lon_range = lon_range
+        self.interval = interval
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def validate_cells(self,
+                       cells: dict[datetime, list[GridCell]]
+                       ) -> ValidationReport:
+        """
+        Validates raw cells before they are set to maps.
+
+        :param cells: cells for every epoch
+        :type cells: dict
+
+        :rtype: ValidationReport
+        """
+        report = ValidationReport()
+        self._check_epochs(list(cells), report)
+        nodes = self.lat_range.get_node_number() * \
+            self.lon_range.get_node_number()
+        for epoch, epoch_cells in cells.items():
+            lat_index = self.lat_range.indices([c.lat for c in epoch_cells])
+            lon_index = self.lon_range.indices([c.lon for c in epoch_cells])
+            values = [c.val for c in epoch_cells]
+            self._check_values(values, epoch, report, epoch_cells)
+            keys = list()
+            for cell, i, j in zip(epoch_cells, lat_index, lon_index):
+                if i is None or j is None:
+                    report.issues.append(ValidationIssue(
+                        IssueKind.OFF_GRID, epoch, cell.lat, cell.lon
+                    ))
+                else:
+                    keys.append((i, j))
+            if len(keys) == nodes and len(set(keys)) == nodes:
+                continue
+            counts = Counter(keys)
+            for (i, j), count in counts.items():
+                if count > 1:
+                    report.issues.append(ValidationIssue(
+                        IssueKind.DUPLICATE_NODE, epoch,
+                        self.lat_range.coordinates[i],
+                        self.lon_range.coordinates[j],
+                        count
+                    ))
+            for i in range(self.lat_range.get_node_number()):
+                for j in range(self.lon_range.get_node_number()):
+                    if (i, j) not in counts:
+                        report.issues.append(ValidationIssue(
+                            IssueKind.MISSING_NODE, epoch,
+                            self.lat_range.coordinates[i],
+                            self.lon_range.coordinates[j]
+                        ))
+        return report
+
+    def validate_maps(self,
+                      maps: dict[datetime, IonexMap | IonexMap3D]
+                      ) -> ValidationReport:
+        """
+        Validates maps that are ready to be written.
+
+        :param maps: maps for every epoch, 2 or 3-dimensional
+        :type maps: dict
+
+        :rtype: ValidationReport
+        """
+        report = ValidationReport()
+        self._check_epochs(list(maps), report)
+        lon_nodes = self.lon_range.get_node_number()
+        for epoch, ionex_map in maps.items():
+            if isinstance(ionex_map, IonexMap3D):
+                self._check_map_3d(epoch, ionex_map, report)
+                continue
+            lats = list(ionex_map.data.keys())
+            lat_index = self.lat_range.indices(lats)
+            present = set()
+            for lat, i in zip(lats, lat_index):
+                row = ionex_map.data[lat]
+                if i is None:
+                    report.issues.append(
+                        ValidationIssue(IssueKind.OFF_GRID, epoch, lat)
+                    )
+                    continue
+                present.add(i)
+                if len(row) != lon_nodes:
+                    report.issues.append(ValidationIssue(
+                        IssueKind.MISSING_NODE, epoch, lat, value=len(row)
+                    ))
+                lons = self.lon_range.coordinates
+                self._check_values(row, epoch, report, None, lat, lons)
+            for i in range(self.lat_range.get_node_number()):
+                if i not in present:
+                    report.issues.append(ValidationIssue(
+                        IssueKind.MISSING_NODE, epoch,
+                        self.lat_range.coordinates[i]
+                    ))
+        return report
+
+    def _check_map_3d(self,
+                      epoch: datetime,
+                      ionex_map: IonexMap3D,
+                      report: ValidationReport) -> None:
+        if len(ionex_map.values) != ionex_map.size:
+            report.issues.append(ValidationIssue(
+                IssueKind.MISSING_NODE, epoch, value=len(ionex_map.values)
+            ))
+            return
+        try:
+            values = ionex_map.values
+            if _all_integral(values) and \
+                    min(values) >= self.min_value and \
+                    max(values) <= self.max_value:
+                return
+        except TypeError:
+            pass
+        lons = self.lon_range.coordinates
+        for _, lat, row in ionex_map.rows():
+            self._check_values(row, epoch, report, None, lat, lons)
+
+    def _check_values(self,
+                      values: list,
+                      epoch: datetime,
+                      report: ValidationReport,
+                      cells: list[GridCell] | None = None,
+                      lat: float | None = None,
+                      lons: list[float] | None = None) -> None:
+        try:
+            if _all_integral(values) and \
+                    (not values or (min(values) >= self.min_value and
+                                    max(values) <= self.max_value)):
+                return
+        except TypeError:
+            pass
+        for k, value in enumerate(values):
+            kind = self._value_issue(value)
+            if kind is None:
+                continue
+            if cells is not None:
+                issue = ValidationIssue(kind, epoch, cells[k].lat,
+                                        cells[k].lon, value)
+            else:
+                issue = ValidationIssue(kind, epoch, lat, lons[k], value)
+            report.issues.append(issue)
+
+    def _value_issue(self, value) -> IssueKind | None:
+        try:
+            if not math.isfinite(value):
+                return IssueKind.NOT_FINITE
+        except TypeError:
+            return IssueKind.NOT_INTEGER
+        if not isinstance(value, Integral):
+            return IssueKind.NOT_INTEGER
+        if not self.min_value <= value <= self.max_value:
+            return IssueKind.OVERFLOW
+        return None
+
+    def _check_epochs(self,
+                      epochs: list[datetime],
+                      report: ValidationReport) -> None:
+        epochs = sorted(epochs)
+        steps = [b - a for a, b in zip(epochs[:-1], epochs[1:])]
+        if not steps:
+            return
+        if self.interval is None:
+            expected = Counter(steps).most_common(1)[0][0]
+        else:
+            expected = timedelta(seconds=self.interval)
+        for epoch, step in zip(epochs[1:], steps):
+            if step != expected:
+                report.issues.append(ValidationIssue(
+                    IssueKind.EPOCH_GAP, epoch,
+                    value=step.total_seconds()
+                ))
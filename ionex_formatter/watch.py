@@ -0,0 +1,417 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .compression import SUFFIXES, Compression
+from .convert import (
+    ConversionError,
+    ConversionOptions,
+    convert_csv,
+    convert_grid,
+    output_name
+)
+from .manifest import manifest_path, write_with_manifest
+
+logger = logging.getLogger(__name__)
+
+PATTERNS = ("*.csv", "*.json")
+STATE_FILE = ".ionex_watch.json"
+# file indices (h in cccedddh.yyI) tried for outputs of the same day
+FILE_INDICES = "0123456789"
+
+
+def _publish_exclusive(temp: str, path: Path) -> None:
+    try:
+        # hard link fails if path exists, check and publish are atomic
+        os.link(temp, path)
+    except FileExistsError:
+        raise
+    except OSError:
+        # file systems without hard links (FAT, some SMB shares): name is
+        # reserved by exclusive creation and replaced by written file,
+        # readers could see empty file for a moment
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        try:
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return
+    os.unlink(temp)
+
+
+def write_atomic(path: Path, write, overwrite: bool = True) -> None:
+    """
+    Calls write(temp_path) for temporary file in the same directory and
+    renames it to path, so readers never see partially written file.
+
+    :raises FileExistsError: if overwrite is False and path exists, check
+        and publishing are a single atomic operation
+    """
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(temp)
+        os.chmod(temp, 0o644)
+        if overwrite:
+            os.replace(temp, path)
+        else:
+            _publish_exclusive(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+
+
+def _write_output(ionex_file, path: Path, compression: Compression,
+                  manifest: bool, overwrite: bool) -> None:
+    if not manifest:
+        write_atomic(path, lambda temp: ionex_file.write(temp, compression),
+                     overwrite)
+        return
+    result = list()
+    write_atomic(path, lambda temp: result.append(
+        write_with_manifest(ionex_file, temp, compression)
+    ), overwrite)
+    result[0].name = path.name
+    write_atomic(manifest_path(path), result[0].save)
+
+
+def convert_file(source: str | Path,
+                 output_dir: str | Path,
+                 options: ConversionOptions | None = None,
+                 compression: Compression = Compression.NONE,
+                 manifest: bool = False,
+                 exclusive: bool = False,
+                 previous: str | Path | None = None) -> Path:
+    """
+    Converts CSV (or JSON with gridded arrays for .json suffix) to IONEX
+    file in output directory. Name of output follows cccedddh.yyI
+    convention, output is written atomically.
+
+    :param source: input file
+    :type source: str or Path
+
+    :param output_dir: directory for output
+    :type output_dir: str or Path
+
+    :param options: conversion options
+    :type options: ConversionOptions
+
+    :param compression: compression of output
+    :type compression: Compression
+
+    :param manifest: write sidecar manifest with digests computed while
+        file is written
+    :type manifest: bool
+
+    :param exclusive: do not overwrite existing files, the first free file
+        index (0 - 9) of the day is used, so several inputs of the same
+        day get different outputs
+    :type exclusive: bool
+
+    :param previous: output of earlier conversion of the same input, it is
+        overwritten in exclusive mode if the name fits
+    :type previous: str or Path
+
+    :returns: path to output file
+    :rtype: Path
+
+    :raises ConversionError: in exclusive mode if all file indices of the
+        day are taken
+    """
+    source = Path(source)
+    output_dir = Path(output_dir)
+    options = options or ConversionOptions()
+    if source.suffix.lower() == ".json":
+        with open(source) as f:
+            ionex_file = convert_grid(json.load(f), options)
+    else:
+        with open(source) as f:
+            ionex_file = convert_csv(f, options)
+    suffixes = {v: k for k, v in SUFFIXES.items()}
+    suffix = suffixes.get(compression, "")
+    if not exclusive:
+        path = output_dir / (output_name(ionex_file, options) + suffix)
+        _write_output(ionex_file, path, compression, manifest, True)
+        return path
+
+    paths = [output_dir / (output_name(ionex_file, options, i) + suffix)
+             for i in FILE_INDICES]
+    previous = Path(previous) if previous else None
+    if previous in paths:
+        # input converted before keeps its output
+        paths.remove(previous)
+        paths.insert(0, previous)
+    for path in paths:
+        try:
+            _write_output(ionex_file, path, compression, manifest,
+                          overwrite=path == previous)
+            return path
+        except FileExistsError:
+            continue
+    raise ConversionError("All file indices are taken for {}".format(
+        paths[0].name))
+
+
+@dataclass
+class InputState:
+    """
+    State of input file: size and modification time when it was
+    converted, output of the last successful conversion and error
+    message if the last conversion failed.
+    """
+    size: int
+    mtime_ns: int
+    output: str | None = None
+    error: str | None = None
+
+    @property
+    def signature(self) -> tuple[int, int]:
+        return (self.size, self.mtime_ns)
+
+
+class DirectoryWatcher:
+    """
+    Converts files that appear or change in input directory.
+
+    Directory is polled with given interval. File is converted when its
+    size and modification time did not change between two polls, so
+    files that are still being written are not taken. Conversions run in
+    bounded pool of worker processes, at most twice the number of workers
+    inputs are queued at once. State of converted inputs is saved
+    to state file after every conversion, so restarted watcher does not
+    convert finished inputs again. Failed inputs are not retried until
+    they change. Outputs of other inputs are never overwritten: inputs of
+    the same day get different file indices (MOSG3620.10I, MOSG3621.10I
+    ...), input that changed replaces its own output, or removes it when
+    new output has other name (for example input moved to other day).
+
+    Usage::
+
+        watcher = DirectoryWatcher("spool", "maps", ConversionOptions("mos"))
+        watcher.run()
+    """
+
+    def __init__(self,
+                 input_dir: str | Path,
+                 output_dir: str | Path,
+                 options: ConversionOptions | None = None,
+                 compression: Compression = Compression.NONE,
+                 workers: int = 2,
+                 interval: float = 5.0,
+                 state_path: str | Path | None = None,
+                 patterns: tuple[str] = PATTERNS,
+                 executor: Executor | None = None,
+                 manifest: bool = False):
+        """
+        :param input_dir: directory to watch
+        :type input_dir: str or Path
+
+        :param output_dir: directory for IONEX files
+        :type output_dir: str or Path
+
+        :param options: conversion options
+        :type options: ConversionOptions
+
+        :param compression: compression of output
+        :type compression: Compression
+
+        :param workers: number of worker processes
+        :type workers: int
+
+        :param interval: seconds between polls
+        :type interval: float
+
+        :param state_path: path to state file, by default .ionex_watch.json
+            in output directory
+        :type state_path: str or Path
+
+        :param patterns: glob patterns of input files
+        :type patterns: tuple
+
+        :param executor: executor for conversions, by default process pool
+            with given number of workers is created
+        :type executor: Executor
+
+        :param manifest: write sidecar manifest for every output
+        :type manifest: bool
+        """
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.options = options or ConversionOptions()
+        self.compression = compression
+        self.manifest = manifest
+        self.workers = workers
+        self.max_pending = 2 * workers
+        self.interval = interval
+        self.state_path = Path(state_path) if state_path \
+            else self.output_dir / STATE_FILE
+        self.patterns = patterns
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.state = self.load_state()
+        self._executor = executor
+        self._own_executor = executor is None
+        self._seen = dict()
+        self._running = dict()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+
+    def load_state(self) -> dict[str, InputState]:
+        if not self.state_path.exists():
+            return dict()
+        with open(self.state_path) as f:
+            data = json.load(f)
+        return {name: InputState(**item) for name, item in data.items()}
+
+    def save_state(self) -> None:
+        with self._lock:
+            self._write_state()
+
+    def _write_state(self) -> None:
+        data = {name: asdict(item) for name, item in self.state.items()}
+
+        def write(temp):
+            with open(temp, "w") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+        write_atomic(self.state_path, write)
+
+    def scan(self) -> list[tuple[Path, tuple[int, int]]]:
+        """
+        Returns inputs that are new or changed since conversion and did
+        not change since previous scan.
+
+        :returns: list of (path, (size, mtime_ns))
+        """
+        ready = list()
+        seen = dict()
+        paths = {p for pattern in self.patterns
+                 for p in self.input_dir.glob(pattern)}
+        for path in sorted(paths):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            seen[path.name] = signature
+            state = self.state.get(path.name)
+            if state is not None and state.signature == signature:
+                continue
+            if path.name in self._running:
+                continue
+            if self._seen.get(path.name) == signature:
+                ready.append((path, signature))
+        self._seen = seen
+        return ready
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def poll(self) -> list[Future]:
+        """
+        Scans directory once and submits ready inputs to workers.
+
+        :returns: futures of submitted conversions
+        """
+        futures = list()
+        for path, signature in self.scan():
+            if len(self._running) >= self.max_pending:
+                # the rest is taken by next polls
+                break
+            state = self.state.get(path.name)
+            future = self._get_executor().submit(
+                convert_file, path, self.output_dir, self.options,
+                self.compression, self.manifest, True,
+                state.output if state is not None else None
+            )
+            with self._lock:
+                self._running[path.name] = future
+            future.add_done_callback(
+                lambda f, name=path.name, sig=signature:
+                    self._finish(name, sig, f)
+            )
+            futures.append(future)
+        return futures
+
+    def _finish(self, name: str, signature: tuple, future: Future) -> None:
+        error = future.exception()
+        state = InputState(*signature)
+        # conversions finish in different threads, state is changed and
+        # saved under lock, so the last saved state is the newest one
+        with self._lock:
+            previous = self.state.get(name)
+            previous = previous.output if previous is not None else None
+            if error is None:
+                state.output = str(future.result())
+                logger.info("Converted %s to %s", name, state.output)
+                if previous is not None and previous != state.output:
+                    self._remove_stale(name, previous)
+            else:
+                # previous output is kept until input is converted
+                state.output = previous
+                state.error = str(error)
+                logger.error("Could not convert %s: %s", name, error)
+            self.state[name] = state
+            self._write_state()
+            self._running.pop(name, None)
+            self._idle.notify_all()
+
+    def _remove_stale(self, name: str, output: str) -> None:
+        """
+        Removes output (and its manifest) of earlier conversion of input
+        that now has output with other name, for example when changed
+        input is on other day.
+        """
+        if any(other != name and state.output == output
+               for other, state in self.state.items()):
+            return
+        for path in (Path(output), manifest_path(output)):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Could not remove stale output %s: %s",
+                               path, e)
+            else:
+                logger.info("Removed stale output %s of %s", path, name)
+
+    def wait(self) -> None:
+        """
+        Waits until running conversions are finished and saved to state.
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: not self._running)
+
+    def run(self, polls: int | None = None) -> None:
+        """
+        Polls directory until stop is called or number of polls is done.
+
+        :param polls: number of polls, infinite if None
+        :type polls: int
+        """
+        count = 0
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                count += 1
+                if polls is not None and count >= polls:
+                    break
+                self._stop.wait(self.interval)
+            self.wait()
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -2,6 +2,8 @@ import pytest
 import os
 from pathlib import Path
 
+from benchmarks import suite
+
 __map_lines = """
      1                                                      START OF TEC MAP    
   2010    12    28     0     0     0                        EPOCH OF CURRENT MAP
@@ -71,4 +73,61 @@ def map_data():
 def map_lines():
     map_lines = __map_lines
     map_lines = map_lines[1:-1] # to remove \n
-    return map_lines
\ No newline at end of file
+    return map_lines
+
+
+@pytest.fixture(scope='session')
+def make_csv(map_data):
+    '''
+    Returns function that makes CSV input of converter with map_data (or
+    given data) for every hour, values are shifted by hour
+    '''
+    def make(hours=(0, 1), data=None) -> str:
+        lines = ["#year month day_of_month hour minute second lat lon val"]
+        for hour in hours:
+            for lat, lon, val in data or map_data:
+                lines.append("2010 12 28 {} 0 0 {} {} {}".format(
+                    hour, lat, lon, val / 10 + hour
+                ))
+        return "\n".join(lines) + "\n"
+    return make
+
+
+@pytest.fixture(scope='session')
+def grid_ranges():
+    '''
+    Returns function that gives latitude and longitude ranges of benchmark
+    grid by name (5x2.5, 1x1 or 0.2x0.2)
+    '''
+    return suite.get_ranges
+
+
+@pytest.fixture(scope='session')
+def grid_cells():
+    '''
+    Returns function that makes deterministic field of benchmarks with
+    values that fit I5 on the grid
+    '''
+    return suite.make_cells
+
+
+@pytest.fixture(scope='session')
+def make_ionex_file():
+    '''
+    Returns function that makes benchmark file with all header labels set
+    and the same map for every epoch (no maps if with_maps is False)
+    '''
+    def make(grid: str, epochs: int, with_maps: bool = True):
+        if with_maps:
+            return suite.make_file(grid, epochs)
+        return suite.make_header(grid, epochs)
+    return make
+
+
+@pytest.fixture(scope='session')
+def counting_sink():
+    '''
+    Returns class of binary stream that only counts written bytes, so
+    written file is not kept in memory
+    '''
+    return suite.CountingSink
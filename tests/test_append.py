@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime
+
+from ionex_formatter.append import AppendError, append_maps
+from ionex_formatter.formatter import (
+    IonexFile,
+    IonexMapType,
+    NumericTokenTooBig
+)
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestAppendMaps():
+
+    @pytest.fixture
+    def maps(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        maps = dict()
+        for hour in range(5):
+            epoch = datetime(2010, 12, 28, hour)
+            ionex_map = IonexMap(lat_range, lon_range, 450, epoch)
+            ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+            maps[epoch] = ionex_map
+        return maps
+
+    def make_file(self, maps: dict) -> IonexFile:
+        epochs = sorted(maps)
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_epoch_range(epochs[0], epochs[-1])
+        formatter.update_label("INTERVAL", [3600])
+        formatter.update_label("# OF MAPS IN FILE", [len(epochs)])
+        formatter.set_maps(maps, IonexMapType.TEC)
+        return formatter
+
+    def test_append(self, maps, tmp_path):
+        epochs = sorted(maps)
+        path = tmp_path / "mosg3620.10i"
+        self.make_file({e: maps[e] for e in epochs[:3]}).write(path)
+        size = path.stat().st_size
+        assert append_maps(path, {epochs[3]: maps[epochs[3]]}) == 4
+        assert append_maps(path, {epochs[4]: maps[epochs[4]]}) == 5
+        expected = tmp_path / "expected.10i"
+        self.make_file(maps).write(expected)
+        assert path.stat().st_size > size
+        assert path.read_bytes() == expected.read_bytes()
+
+    def test_append_earlier_map(self, maps, tmp_path):
+        epochs = sorted(maps)
+        path = tmp_path / "mosg3620.10i"
+        self.make_file({e: maps[e] for e in epochs[2:]}).write(path)
+        content = path.read_bytes()
+        with pytest.raises(AppendError):
+            append_maps(path, {epochs[0]: maps[epochs[0]]})
+        assert path.read_bytes() == content
+
+    def test_append_other_type(self, maps, tmp_path):
+        epochs = sorted(maps)
+        path = tmp_path / "mosg3620.10i"
+        self.make_file({e: maps[e] for e in epochs[:3]}).write(path)
+        with pytest.raises(AppendError):
+            append_maps(path, {epochs[3]: maps[epochs[3]]},
+                        IonexMapType.RMS)
+
+    def test_formatting_error(self, maps, tmp_path):
+        epochs = sorted(maps)
+        path = tmp_path / "mosg3620.10i"
+        self.make_file({e: maps[e] for e in epochs[:3]}).write(path)
+        content = path.read_bytes()
+        maps[epochs[4]].set_values(87.5, [1234567] * 73)
+        with pytest.raises(NumericTokenTooBig):
+            append_maps(path, {e: maps[e] for e in epochs[3:]})
+        assert path.read_bytes() == content
+        assert append_maps(path, {epochs[3]: maps[epochs[3]]}) == 4
+
+    def test_append_to_empty_file(self, maps, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.update_label("# OF MAPS IN FILE", [0])
+        formatter.write(path)
+        assert append_maps(path, maps) == 5
+        content = path.read_bytes().decode("ascii")
+        assert "     5" + " " * 54 + "# OF MAPS IN FILE" in content
+        assert content.count("END OF TEC MAP") == 5
+        assert content.count("END OF FILE") == 1
@@ -0,0 +1,141 @@
+import pytest
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ionex_formatter.async_writer import AsyncIonexWriter, WriterClosedError
+from ionex_formatter.formatter import (
+    IonexFile,
+    IonexMapType,
+    NumericTokenTooBig
+)
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.spatial import SpatialRange
+
+
+class SlowStreamWriter:
+    """
+    Mimics asyncio.StreamWriter with slow transport
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.max_buffered = 0
+        self.buffered = 0
+
+    def write(self, data):
+        self.buffered += 1
+        self.max_buffered = max(self.max_buffered, self.buffered)
+        self.chunks.append(data)
+
+    async def drain(self):
+        await asyncio.sleep(0.001)
+        self.buffered = 0
+
+
+class TestAsyncIonexWriter():
+
+    @pytest.fixture
+    def maps(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        maps = dict()
+        for hour in range(6):
+            epoch = datetime(2010, 12, 28, hour)
+            ionex_map = IonexMap(lat_range, lon_range, 450, epoch)
+            ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+            maps[epoch] = ionex_map
+        return maps
+
+    @pytest.fixture
+    def ionex_file(self):
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_epoch_range(datetime(2010, 12, 28, 0),
+                                  datetime(2010, 12, 28, 5))
+        return formatter
+
+    def expected(self, ionex_file, maps):
+        ionex_file.set_maps(maps, IonexMapType.TEC)
+        stream = io.BytesIO()
+        ionex_file.write(stream)
+        return stream.getvalue()
+
+    def test_stream_writer(self, ionex_file, maps):
+        sink = SlowStreamWriter()
+
+        async def produce():
+            async with AsyncIonexWriter(ionex_file, sink,
+                                        max_pending=2) as writer:
+                for epoch, ionex_map in maps.items():
+                    await writer.add_map(epoch, ionex_map)
+            return writer
+
+        writer = asyncio.run(produce())
+        assert writer.maps_written == 6
+        assert sink.max_buffered == 1
+        assert b"".join(sink.chunks) == self.expected(ionex_file, maps)
+
+    def test_file_sink(self, ionex_file, maps, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+
+        async def produce():
+            writer = AsyncIonexWriter(ionex_file, path)
+            await asyncio.gather(*[
+                writer.add_map(epoch, ionex_map)
+                for epoch, ionex_map in maps.items()
+            ])
+            await writer.close()
+            with pytest.raises(WriterClosedError):
+                await writer.add_map(datetime(2010, 12, 29), None)
+
+        asyncio.run(produce())
+        assert path.read_bytes() == self.expected(ionex_file, maps)
+
+    def test_encoding_error(self, ionex_file, maps):
+        sink = io.BytesIO()
+
+        async def produce():
+            writer = AsyncIonexWriter(ionex_file, sink, max_pending=1)
+            await writer.add_map(datetime(2010, 12, 28), "not a map")
+            for epoch, ionex_map in maps.items():
+                await writer.add_map(epoch, ionex_map)
+            await writer.close()
+
+        with pytest.raises(AttributeError):
+            asyncio.run(produce())
+
+    def test_process_pool(self, ionex_file, maps, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+
+        async def produce():
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                async with AsyncIonexWriter(ionex_file, path,
+                                            executor=executor) as writer:
+                    for epoch, ionex_map in maps.items():
+                        await writer.add_map(epoch, ionex_map)
+
+        asyncio.run(produce())
+        assert path.read_bytes() == self.expected(ionex_file, maps)
+
+    def test_failure_closes_sink(self, ionex_file, maps, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+        bad_epoch = datetime(2010, 12, 28, 1)
+        maps[bad_epoch].set_values(87.5, [1234567] * 73)
+
+        async def produce():
+            writer = AsyncIonexWriter(ionex_file, path, max_pending=2)
+            try:
+                async with writer:
+                    for epoch, ionex_map in maps.items():
+                        await writer.add_map(epoch, ionex_map)
+            finally:
+                assert writer._stream is None
+                assert writer._queue.empty()
+                assert writer._task.done()
+
+        with pytest.raises(NumericTokenTooBig):
+            asyncio.run(produce())
+        # only header and first map were written, file is closed
+        assert path.read_bytes().count(b"START OF TEC MAP") == 1
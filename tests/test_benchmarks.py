@@ -0,0 +1,46 @@
+import json
+
+from benchmarks.__main__ import main
+from benchmarks.suite import (
+    BENCHMARKS,
+    compare,
+    load,
+    measure,
+    run_suite,
+    save
+)
+
+
+class TestBenchmarks():
+
+    def test_smoke(self, tmp_path):
+        results = run_suite(grids=["5x2.5"], epochs=[1], repeat=1)
+        assert [r.name for r in results] == list(BENCHMARKS)
+        for result in results:
+            assert result.seconds > 0
+            assert result.peak_memory > 0
+        writing = results[-1]
+        assert writing.values == 71 * 73
+        assert writing.bytes > writing.values * 5
+        path = tmp_path / "results.json"
+        save(results, str(path))
+        data = json.loads(path.read_text())
+        assert data["results"][0]["name"] == "header"
+        assert [r.key for r in load(str(path))] == [r.key for r in results]
+
+    def test_compare(self):
+        result = measure("chunks", "5x2.5", 1, repeat=1, memory=False)
+        slow = measure("chunks", "5x2.5", 1, repeat=1, memory=False)
+        slow.seconds = result.seconds * 2
+        assert compare([slow], [result])[0]["regression"]
+        assert not compare([result], [slow])[0]["regression"]
+        assert compare([result], []) == []
+
+    def test_cli_baseline(self, tmp_path, capsys):
+        path = tmp_path / "baseline.json"
+        argv = ["--benchmark", "header", "--epochs", "1", "--repeat", "1",
+                "--no-memory"]
+        assert main(argv + ["--output", str(path)]) == 0
+        assert main(argv + ["--baseline", str(path),
+                            "--threshold", "1000"]) == 0
+        assert '"regression": false' in capsys.readouterr().out
@@ -0,0 +1,131 @@
+import pytest
+import io
+import threading
+from datetime import datetime, timedelta
+
+from ionex_formatter.builder import ConcurrentIonexBuilder
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.spatial import SpatialRange
+
+START = datetime(2010, 12, 28)
+
+
+class TestConcurrentIonexBuilder():
+
+    @pytest.fixture
+    def ionex_map(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        ionex_map = IonexMap(lat_range, lon_range, 450, START)
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        return ionex_map
+
+    def test_snapshot(self, ionex_map):
+        builder = ConcurrentIonexBuilder(shards=4)
+        builder.update_header(IonexFile.set_version_type_gnss)
+        builder.add_comment("first")
+        epochs = [START + timedelta(hours=h) for h in range(5)]
+        for epoch in reversed(epochs):
+            builder.add_map(IonexMapType.TEC, epoch, ionex_map)
+        builder.add_map(IonexMapType.RMS, epochs[0], ionex_map)
+        assert len(builder) == 6
+        snapshot = builder.snapshot()
+
+        expected = IonexFile()
+        expected.set_version_type_gnss()
+        expected.add_comment("first")
+        expected.set_maps({epoch: ionex_map for epoch in epochs},
+                          IonexMapType.TEC)
+        expected.set_maps({epochs[0]: ionex_map}, IonexMapType.RMS)
+        expected.set_epoch_range(epochs[0], epochs[-1])
+        expected.set_label("# OF MAPS IN FILE", [5])
+        first, second = io.BytesIO(), io.BytesIO()
+        snapshot.write(first)
+        expected.write(second)
+        assert first.getvalue() == second.getvalue()
+
+        # snapshot does not change when builder changes
+        builder.add_comment("second")
+        assert builder.remove_map(IonexMapType.TEC, epochs[0])
+        assert not builder.remove_map(IonexMapType.TEC, epochs[0])
+        assert len(snapshot.maps[IonexMapType.TEC]) == 5
+        assert len(snapshot.header["COMMENT"]) == 1
+        later = builder.snapshot()
+        assert len(later.maps[IonexMapType.TEC]) == 4
+        assert len(later.header["COMMENT"]) == 2
+
+    def test_threads(self, ionex_map):
+        builder = ConcurrentIonexBuilder()
+        threads_number = 8
+        per_thread = 50
+        counts = list()
+        done = threading.Event()
+
+        def produce(k):
+            for i in range(per_thread):
+                epoch = START + timedelta(minutes=k * per_thread + i)
+                builder.add_map(IonexMapType.TEC, epoch, ionex_map)
+                if i % 10 == 0:
+                    builder.add_comment("thread {} map {}".format(k, i))
+
+        def observe():
+            while not done.is_set():
+                counts.append(len(builder.snapshot().maps[IonexMapType.TEC])
+                              if len(builder) else 0)
+
+        observer = threading.Thread(target=observe)
+        observer.start()
+        threads = [threading.Thread(target=produce, args=(k,))
+                   for k in range(threads_number)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        observer.join()
+
+        snapshot = builder.snapshot()
+        maps = snapshot.maps[IonexMapType.TEC]
+        assert len(maps) == threads_number * per_thread
+        assert list(maps) == sorted(maps)
+        assert len(snapshot.header["COMMENT"]) == threads_number * 5
+        # maps are never removed, so snapshots never go back
+        assert counts == sorted(counts)
+
+    def test_header_changes_applied_once(self, ionex_map):
+        builder = ConcurrentIonexBuilder()
+        calls = list()
+
+        def change(ionex_file, text):
+            calls.append(text)
+            ionex_file.add_comment(text)
+
+        builder.update_header(change, "first")
+        builder.add_map(IonexMapType.TEC, START, ionex_map)
+        builder.snapshot()
+        builder.update_header(change, "second")
+        for _ in range(3):
+            snapshot = builder.snapshot()
+        assert calls == ["first", "second"]
+        assert len(snapshot.header["COMMENT"]) == 2
+
+    def test_failed_header_change(self, ionex_map, caplog):
+        builder = ConcurrentIonexBuilder()
+        builder.add_comment("first")
+        builder.set_label("EXPONENT", [12345678])
+        builder.set_label("INTERVAL", [3600])
+        builder.add_map(IonexMapType.TEC, START, ionex_map)
+        # bad change is dropped, other changes are applied
+        snapshot = builder.snapshot()
+        assert "is dropped" in caplog.text
+        assert "EXPONENT" not in snapshot.header
+        assert "INTERVAL" in snapshot.header
+        builder.add_comment("second")
+        snapshot = builder.snapshot()
+        assert len(snapshot.header["COMMENT"]) == 2
+        snapshot.write(io.BytesIO())
+
+    def test_wrong_shards(self):
+        with pytest.raises(ValueError):
+            ConcurrentIonexBuilder(shards=0)
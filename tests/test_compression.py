@@ -0,0 +1,145 @@
+import pytest
+import gzip
+import io
+from datetime import datetime
+
+from ionex_formatter.compression import (
+    Compression,
+    ParallelGzipWriter,
+    UnsupportedCompressionError,
+    decompress_lzw,
+    open_input
+)
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.reader import IonexParseError, read_ionex
+from ionex_formatter.spatial import SpatialRange
+
+
+def compress_lzw(data, max_bits=16):
+    """
+    Compresses data like unix compress in block mode, table is cleared
+    when it is full.
+    """
+    table = {bytes((i,)): i for i in range(256)}
+    free, bits, position, start, value = 257, 9, 0, 0, 0
+
+    def emit(code, clear=False):
+        nonlocal bits, position, start, value
+        value |= code << position
+        position += bits
+        if clear or (bits < max_bits and free > (1 << bits) - 1):
+            group = bits * 8
+            position = start = start - (start - position) // group * group
+            bits = 9 if clear else bits + 1
+
+    current = b""
+    for byte in data:
+        candidate = current + bytes((byte,))
+        if candidate in table:
+            current = candidate
+            continue
+        emit(table[current])
+        if free < 1 << max_bits:
+            table[candidate] = free
+            free += 1
+        else:
+            emit(256, clear=True)
+            table = {bytes((i,)): i for i in range(256)}
+            free = 257
+        current = bytes((byte,))
+    if current:
+        emit(table[current])
+    return b"\x1f\x9d" + bytes((0x80 | max_bits,)) + \
+        value.to_bytes((position + 7) // 8, "little")
+
+
+class TestCompressedOutput():
+
+    @pytest.fixture
+    def ionex_file(self, map_data):
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        formatter.set_spatial_grid(
+            lat_range, lon_range, SpatialRange(450, 450, 0)
+        )
+        maps = dict()
+        for hour in range(3):
+            epoch = datetime(2010, 12, 28, hour)
+            ionex_map = IonexMap(lat_range, lon_range, 450, epoch)
+            ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+            maps[epoch] = ionex_map
+        formatter.set_maps(maps, IonexMapType.TEC)
+        return formatter
+
+    @pytest.fixture
+    def plain(self, ionex_file):
+        stream = io.BytesIO()
+        ionex_file.write(stream)
+        return stream.getvalue()
+
+    def test_plain_output(self, plain, map_lines):
+        text = plain.decode("ascii")
+        assert text.startswith("     1.0            I")
+        assert map_lines in text
+        assert text.rstrip().endswith("END OF FILE")
+        assert text.count("START OF TEC MAP") == 3
+
+    @pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+    def test_round_trip(self, ionex_file, plain, tmp_path, suffix):
+        path = tmp_path / ("mosg3620.10i" + suffix)
+        ionex_file.write(path, level=1)
+        assert path.read_bytes() != plain
+        with open_input(path) as stream:
+            assert stream.read() == plain
+        restored = read_ionex(path)
+        epoch = datetime(2010, 12, 28, 2)
+        assert restored.get_map_lines(IonexMapType.TEC, epoch) == \
+            ionex_file.get_map_lines(IonexMapType.TEC, epoch)
+
+    def test_parallel_gzip(self, ionex_file, plain):
+        stream = io.BytesIO()
+        ionex_file.write(stream, compression=Compression.GZIP, threads=4)
+        assert gzip.decompress(stream.getvalue()) == plain
+
+    def test_parallel_gzip_blocks(self):
+        data = b"".join(b"%5d" % (i % 997) for i in range(200000))
+        stream = io.BytesIO()
+        writer = ParallelGzipWriter(stream, threads=3, block_size=4096)
+        for start in range(0, len(data), 1000):
+            writer.write(data[start: start + 1000])
+        writer.close()
+        assert gzip.decompress(stream.getvalue()) == data
+        assert len(stream.getvalue()) < len(data) // 2
+
+    def test_unix_compress(self, ionex_file, plain, tmp_path):
+        with pytest.raises(UnsupportedCompressionError):
+            ionex_file.write(tmp_path / "mosg3620.10i.Z")
+        path = tmp_path / "mosg3620.10i.Z"
+        path.write_bytes(compress_lzw(plain))
+        with open_input(path) as stream:
+            assert stream.read() == plain
+        restored = read_ionex(path)
+        epoch = datetime(2010, 12, 28, 2)
+        assert restored.get_map_lines(IonexMapType.TEC, epoch) == \
+            ionex_file.get_map_lines(IonexMapType.TEC, epoch)
+
+    @pytest.mark.parametrize("max_bits", [10, 12, 16])
+    def test_lzw(self, plain, max_bits):
+        # small tables are cleared several times
+        data = plain + bytes(range(256)) * 20
+        assert decompress_lzw(compress_lzw(data, max_bits)) == data
+        assert decompress_lzw(b"\x1f\x9d\x90") == b""
+        with pytest.raises(ValueError):
+            decompress_lzw(b"\x1f\x9d\x90\xff\xff")
+
+    def test_truncated_map(self, plain, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+        lines = plain.decode("ascii").splitlines(keepends=True)
+        end = next(k for k, line in enumerate(lines)
+                   if "LAT/LON1/LON2/DLON/H" in line)
+        path.write_text("".join(lines[:end + 2]))
+        with pytest.raises(IonexParseError, match="Line {}:".format(end + 2)):
+            read_ionex(path)
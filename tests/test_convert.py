@@ -0,0 +1,96 @@
+import pytest
+import io
+from datetime import datetime
+
+from ionex_formatter.convert import (
+    ConversionError,
+    ConversionOptions,
+    convert_csv,
+    convert_grid,
+    infer_range,
+    output_name,
+    read_csv
+)
+from ionex_formatter.formatter import IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.reader import read_ionex
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestConvert():
+
+    def test_read_csv(self, make_csv):
+        records = read_csv(io.StringIO(make_csv()))
+        assert sorted(records) == [datetime(2010, 12, 28, 0),
+                                   datetime(2010, 12, 28, 1)]
+        assert records[datetime(2010, 12, 28, 0)][0] == (87.5, -180, 4.9)
+        with pytest.raises(ConversionError, match="Line 2"):
+            read_csv(io.StringIO("#\n2010 12 28 0 0 0 1 2\n"))
+        with pytest.raises(ConversionError, match="Line 1"):
+            read_csv(io.StringIO("2010 13 28 0 0 0 1 2 3\n"))
+
+    def test_infer_range(self):
+        lat_range = infer_range([87.5, 0.0, -87.5, 0.0], descending=True)
+        assert (lat_range.vmin, lat_range.vmax, lat_range.vstep) == \
+            (87.5, -87.5, -87.5)
+        lon_range = infer_range([-180, -175, 180])
+        assert lon_range.get_node_number() == 73
+        with pytest.raises(ConversionError):
+            infer_range([0, 2, 3.5])
+
+    def test_convert_csv(self, make_csv, map_lines, tmp_path):
+        ionex_file = convert_csv(io.StringIO(make_csv()))
+        epoch = datetime(2010, 12, 28, 0)
+        assert "\n".join(ionex_file.get_map_lines(IonexMapType.TEC,
+                                                  epoch)) == map_lines
+        assert output_name(ionex_file, ConversionOptions()) == "MOSG3620.10I"
+        path = tmp_path / "mosg3620.10i"
+        ionex_file.write(path)
+        restored = read_ionex(path)
+        assert len(restored.maps[IonexMapType.TEC]) == 2
+
+    def test_missing_nodes(self, map_data, make_csv):
+        data = [cell for cell in map_data if cell[1] != 0]
+        ionex_file = convert_csv(io.StringIO(make_csv([0], data)))
+        ionex_map = ionex_file.maps[IonexMapType.TEC][datetime(2010, 12, 28)]
+        assert ionex_map.get_cell(0.0, 0) == IonexMap.NO_VALUE
+        assert ionex_map.get_cell(0.0, 5) == 66
+
+    def test_off_grid(self, make_csv):
+        options = ConversionOptions(
+            lat_range=SpatialRange(87.5, -87.5, -87.5),
+            lon_range=SpatialRange(-180, 180, 10)
+        )
+        with pytest.raises(ConversionError):
+            convert_csv(io.StringIO(make_csv([0])), options)
+
+    def test_convert_grid(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        ionex_map = IonexMap(lat_range, lon_range, 450, datetime(2010, 12, 28))
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        rows = [[v / 10 for v in ionex_map.data[lat]]
+                for lat in lat_range.coordinates]
+        rows[1][0] = None
+        data = {
+            "lat": [87.5, -87.5, -87.5],
+            "lon": [-180, 180, 5],
+            "maps": [
+                {"epoch": "2010-12-28T00:00:00", "values": rows},
+                {"epoch": "2010-12-28T02:00:00",
+                 "values": [v for row in rows for v in row]},
+            ]
+        }
+        ionex_file = convert_grid(data)
+        maps = ionex_file.maps[IonexMapType.TEC]
+        assert len(maps) == 2
+        for converted in maps.values():
+            assert converted.get_cell(0.0, -180) == IonexMap.NO_VALUE
+            assert converted.data[87.5] == ionex_map.data[87.5]
+        assert ionex_file.header["INTERVAL"][0].startswith("  7200")
+
+        data["maps"][1]["values"] = rows[0]
+        with pytest.raises(ConversionError, match="do not match"):
+            convert_grid(data)
+        with pytest.raises(ConversionError):
+            convert_grid({"lat": [87.5, -87.5, -87.5], "maps": []})
@@ -0,0 +1,186 @@
+import pytest
+import json
+from datetime import datetime
+
+from ionex_formatter.diff import diff_archives, diff_files, main, pair_archives
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.reader import IonexReader
+from ionex_formatter.spatial import SpatialRange
+
+LAT_RANGE = SpatialRange(87.5, -87.5, -87.5)
+LON_RANGE = SpatialRange(-180, 180, 5)
+
+
+def make_file(map_data, hours, change=None, exponent=-1):
+    maps = dict()
+    for hour in hours:
+        epoch = datetime(2010, 12, 28, hour)
+        maps[epoch] = IonexMap(LAT_RANGE, LON_RANGE, 450, epoch)
+        maps[epoch].set_data(GridCell.get_list_from_csv(map_data))
+        if change is not None:
+            change(hour, maps[epoch])
+    ionex_file = IonexFile()
+    ionex_file.set_version_type_gnss()
+    ionex_file.set_epoch_range(min(maps), max(maps))
+    ionex_file.set_spatial_grid(LAT_RANGE, LON_RANGE,
+                                SpatialRange(450, 450, 0))
+    ionex_file.set_label("EXPONENT", [exponent])
+    ionex_file.set_maps(maps, IonexMapType.TEC)
+    return ionex_file
+
+
+class TestIndex():
+
+    def test_blocks(self, map_data, tmp_path):
+        path = tmp_path / "mosg3620.10i.gz"
+        make_file(map_data, range(3)).write(path)
+        reader = IonexReader(path)
+        index = reader.index()
+        assert index.exponent == -1
+        assert len(index.blocks) == 3
+        content = IonexReader(path).read()
+        epoch = datetime(2010, 12, 28, 1)
+        block = index.blocks[(IonexMapType.TEC, epoch)]
+        with open(tmp_path / "plain", "wb") as f:
+            make_file(map_data, range(3)).write(f)
+        data = (tmp_path / "plain").read_bytes()
+        ionex_map = reader.read_map(data[block.offset:
+                                         block.offset + block.size])
+        expected = content.maps[IonexMapType.TEC][epoch]
+        assert list(ionex_map.rows()) == list(expected.rows())
+
+
+class TestDiff():
+
+    def test_identical(self, map_data, tmp_path):
+        make_file(map_data, range(3)).write(tmp_path / "a.10i")
+        make_file(map_data, range(1, 4)).write(tmp_path / "b.10i.gz")
+        result = diff_files(tmp_path / "a.10i", tmp_path / "b.10i.gz")
+        # map indices in START OF TEC MAP lines differ, content is the same
+        assert result.identical == 2
+        assert result.only_first == [("TEC", datetime(2010, 12, 28, 0))]
+        assert result.only_second == [("TEC", datetime(2010, 12, 28, 3))]
+        cells = LAT_RANGE.get_node_number() * LON_RANGE.get_node_number()
+        # identical maps are counted as zero differences
+        assert result.maps[0].count == cells
+        assert result.cells["TEC"].count == [2] * cells
+        assert result.cells["TEC"].rms() == [0.0] * cells
+        summary = result.summary()
+        assert summary["maps"] == 2
+        assert summary["count"] == 2 * cells
+        assert summary["rms"] == 0.0
+
+    def test_differences(self, map_data, tmp_path):
+        def change(hour, ionex_map):
+            if hour == 1:
+                lat = LAT_RANGE.vmin
+                values = [v + 20 for v in ionex_map.data[lat]]
+                values[0] = IonexMap.NO_VALUE
+                ionex_map.set_values(lat, values)
+
+        make_file(map_data, range(3)).write(tmp_path / "a.10i")
+        make_file(map_data, range(3), change).write(tmp_path / "b.10i")
+        result = diff_files(tmp_path / "a.10i", tmp_path / "b.10i")
+        assert result.identical == 2
+        changed = result.maps[1]
+        assert not changed.identical
+        cells = LAT_RANGE.get_node_number() * LON_RANGE.get_node_number()
+        assert changed.missing_second == 1
+        assert changed.count == cells - 1
+        row = LON_RANGE.get_node_number() - 1
+        assert changed.bias == pytest.approx(2.0 * row / (cells - 1))
+        assert changed.max_abs == pytest.approx(2.0)
+        # totals include zero differences of identical maps
+        summary = result.summary()
+        assert summary["count"] == 3 * cells - 1
+        assert summary["bias"] == pytest.approx(2.0 * row / (3 * cells - 1))
+        assert summary["rms"] == pytest.approx(
+            (4.0 * row / (3 * cells - 1)) ** 0.5)
+        stats = result.cells["TEC"]
+        assert stats.count[0] == 2 and stats.count[1] == 3
+        assert stats.bias()[0] == 0.0
+        assert stats.bias()[1] == pytest.approx(2.0 / 3)
+        assert stats.bias()[row + 1] == 0.0
+        assert stats.rms()[1] == pytest.approx((4.0 / 3) ** 0.5)
+
+    def test_exponent(self, map_data, tmp_path):
+        def scale(hour, ionex_map):
+            for lat, values in list(ionex_map.data.items()):
+                ionex_map.set_values(lat, [v * 10 for v in values])
+
+        make_file(map_data, range(2)).write(tmp_path / "a.10i")
+        make_file(map_data, range(2), scale, exponent=-2).write(
+            tmp_path / "b.10i")
+        result = diff_files(tmp_path / "a.10i", tmp_path / "b.10i")
+        assert result.identical == 0
+        assert result.summary()["max_abs"] == pytest.approx(0.0)
+
+    def test_identical_with_missing_values(self, map_data, tmp_path):
+        def change(hour, ionex_map):
+            values = list(ionex_map.data[0.0])
+            values[2] = IonexMap.NO_VALUE
+            ionex_map.set_values(0.0, values)
+
+        make_file(map_data, range(2), change).write(tmp_path / "a.10i")
+        make_file(map_data, range(2), change).write(tmp_path / "b.10i")
+        result = diff_files(tmp_path / "a.10i", tmp_path / "b.10i")
+        assert result.identical == 2
+        row = LON_RANGE.get_node_number()
+        count = result.cells["TEC"].count
+        assert count[row + 2] == 0
+        assert count[row + 1] == count[row + 3] == 2
+        assert result.maps[0].count == 3 * row - 1
+
+    def test_grid_mismatch(self, map_data, tmp_path):
+        first = make_file(map_data, range(1))
+        first.write(tmp_path / "a.10i")
+        lon_range = SpatialRange(-180, 180, 10)
+        ionex_map = IonexMap(LAT_RANGE, lon_range, 450,
+                             datetime(2010, 12, 28))
+        for _, lat, _ in first.maps[IonexMapType.TEC][ionex_map.epoch].rows():
+            ionex_map.set_values(lat, [10] * lon_range.get_node_number())
+        ionex_file = IonexFile()
+        ionex_file.set_spatial_grid(LAT_RANGE, ionex_map.lon_range,
+                                    SpatialRange(450, 450, 0))
+        ionex_file.set_label("EXPONENT", [-1])
+        ionex_file.set_maps({datetime(2010, 12, 28): ionex_map},
+                            IonexMapType.TEC)
+        ionex_file.write(tmp_path / "b.10i")
+        with pytest.raises(ValueError):
+            diff_files(tmp_path / "a.10i", tmp_path / "b.10i")
+
+
+class TestArchives():
+
+    @pytest.fixture
+    def archives(self, map_data, tmp_path):
+        first, second = tmp_path / "first", tmp_path / "second"
+        first.mkdir()
+        second.mkdir()
+        for day in (362, 363, 364):
+            make_file(map_data, range(2)).write(
+                first / "mosg{}0.10i".format(day))
+        for day in (362, 363):
+            make_file(map_data, range(2)).write(
+                second / "MOSG{}0.10I.gz".format(day))
+        return first, second
+
+    def test_pairs(self, archives):
+        pairs = pair_archives(*archives)
+        assert [p.name for p, _ in pairs] == ["mosg3620.10i", "mosg3630.10i"]
+        assert pairs[0][1].name == "MOSG3620.10I.gz"
+        results = diff_archives(pairs, workers=2)
+        assert [r.identical for r in results] == [2, 2]
+        assert results[1].first == str(pairs[1][0])
+
+    def test_main(self, archives, capsys):
+        first, second = archives
+        assert main([str(first), str(second), "--workers", "1"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["identical"] == 2
+        assert main([str(first / "mosg3620.10i"),
+                     str(second / "MOSG3620.10I.gz"), "--maps"]) == 0
+        summary = json.loads(capsys.readouterr().out)
+        assert len(summary["per_map"]) == 2
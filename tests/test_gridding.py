@@ -0,0 +1,68 @@
+import math
+import pytest
+from datetime import datetime, timedelta
+
+from ionex_formatter.gridding import GridAccumulator
+from ionex_formatter.ionex_map import IonexMap
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestGridAccumulator():
+
+    @pytest.fixture
+    def accumulator(self):
+        return GridAccumulator(SpatialRange(10, -10, -10),
+                               SpatialRange(0, 20, 10),
+                               450,
+                               start=datetime(2010, 12, 28),
+                               interval=3600)
+
+    def test_mean_and_rms(self, accumulator):
+        epoch = datetime(2010, 12, 28, 1)
+        times = [epoch, epoch + timedelta(minutes=10), epoch]
+        accumulator.add(times, [0.0, 1.0, -2.0], [10, 12, 9],
+                        [10.0, 20.0, 30.0])
+        tec, rms = accumulator.get_maps(epoch)
+        assert tec.get_cell(0, 10) == 200
+        assert rms.get_cell(0, 10) == round(math.sqrt(200 / 3) * 10)
+        assert tec.get_cell(10, 0) == IonexMap.NO_VALUE
+
+    def test_chunks_equal_single_pass(self, accumulator):
+        epoch = datetime(2010, 12, 28)
+        values = [float(v * v % 17) for v in range(40)]
+        times = [epoch] * 40
+        lats = [0.0] * 40
+        lons = [20.0] * 40
+        accumulator.add(times, lats, lons, values)
+        single = accumulator.get_maps(epoch)
+        chunked = GridAccumulator(accumulator.lat_range,
+                                  accumulator.lon_range,
+                                  450, epoch, 3600, exponent=-3)
+        for start in range(0, 40, 7):
+            chunked.add(times[start: start + 7], lats[start: start + 7],
+                        lons[start: start + 7], values[start: start + 7])
+        tec, rms = chunked.get_maps(epoch)
+        mean = sum(values) / 40
+        std = math.sqrt(sum((v - mean) ** 2 for v in values) / 40)
+        assert tec.get_cell(0, 20) == round(mean * 1000)
+        assert rms.get_cell(0, 20) == round(std * 1000)
+        assert single[0].get_cell(0, 20) == round(mean * 10)
+
+    def test_drop_outside_grid(self, accumulator):
+        epoch = datetime(2010, 12, 28)
+        accepted = accumulator.add([epoch] * 3, [0, 16, 0], [0, 0, 26],
+                                   [1.0, 2.0, float("nan")])
+        assert accepted == 1
+
+    def test_pop_maps(self, accumulator):
+        epochs = [datetime(2010, 12, 28, h) for h in range(3)]
+        accumulator.add(epochs, [0] * 3, [0] * 3, [1.0, 2.0, 3.0])
+        tec, rms = accumulator.pop_maps(until=epochs[2])
+        assert sorted(tec) == epochs[:2]
+        assert sorted(rms) == epochs[:2]
+        assert accumulator.epochs == epochs[2:]
+        assert tec[epochs[1]].get_cell(0, 0) == 20
+
+    def test_length_mismatch(self, accumulator):
+        with pytest.raises(ValueError):
+            accumulator.add([datetime(2010, 12, 28)], [0, 0], [0], [1.0])
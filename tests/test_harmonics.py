@@ -0,0 +1,79 @@
+import math
+import pytest
+from datetime import datetime
+
+from ionex_formatter.harmonics import (
+    HarmonicCoefficients,
+    HarmonicMapSource,
+    HarmonicTables,
+    legendre
+)
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestHarmonics():
+
+    @pytest.fixture
+    def source(self):
+        return HarmonicMapSource(SpatialRange(87.5, -87.5, -2.5),
+                                 SpatialRange(-180, 180, 5), 450)
+
+    def test_legendre(self):
+        p = legendre(3, 30)
+        x, y = 0.5, math.sqrt(3) / 2
+        assert p[0][0] == 1
+        assert p[1][0] == pytest.approx(math.sqrt(3) * x)
+        assert p[1][1] == pytest.approx(math.sqrt(3) * y)
+        assert p[2][1] == pytest.approx(math.sqrt(15) * x * y)
+        assert p[3][0] == pytest.approx(math.sqrt(7) * (5 * x ** 3 - 3 * x) / 2)
+
+    def test_normalization(self):
+        # mean of squared normalized function over sphere is 1
+        lats = [-89.5 + k for k in range(180)]
+        total = sum(legendre(4, lat)[4][2] ** 2 * math.cos(math.radians(lat))
+                    for lat in lats)
+        weights = sum(math.cos(math.radians(lat)) for lat in lats)
+        assert total / weights == pytest.approx(2.0, rel=1e-3)
+
+    def test_tables_are_cached(self, source):
+        tables = HarmonicTables.get(source.lat_range, source.lon_range, 15)
+        assert HarmonicTables.get(SpatialRange(87.5, -87.5, -2.5),
+                                  SpatialRange(-180, 180, 5), 15) is tables
+
+    def test_evaluate(self, source):
+        coefficients = HarmonicCoefficients(
+            2, cos={(0, 0): 20.0, (2, 1): 3.0}, sin={(1, 1): 4.0}
+        )
+        epoch = datetime(2010, 12, 28)
+        ionex_map = source.get_map(epoch, coefficients)
+        for lat, lon in ((0.0, 0.0), (45.0, 90.0), (-30.0, -135.0)):
+            x = math.sin(math.radians(lat))
+            y = math.cos(math.radians(lat))
+            lam = math.radians(lon)
+            expected = 20.0 + \
+                3.0 * math.sqrt(15) * x * y * math.cos(lam) + \
+                4.0 * math.sqrt(3) * y * math.sin(lam)
+            assert ionex_map.get_cell(lat, lon) == round(expected * 10)
+
+    def test_sun_fixed(self):
+        source = HarmonicMapSource(SpatialRange(0, 0, 0),
+                                   SpatialRange(-180, 180, 15), 450,
+                                   sun_fixed=True)
+        coefficients = HarmonicCoefficients(1, cos={(1, 1): 10.0})
+        # maximum is at s = 0, that is at lon = 180 - 15 * UT
+        for hour in (0, 6, 12):
+            values = source.evaluate(coefficients, datetime(2010, 1, 1, hour))
+            lon = source.lon_range.coordinates[values.index(max(values))]
+            assert (lon - (180 - 15 * hour)) % 360 == 0
+
+    def test_iter_maps(self, source):
+        coefficients = {
+            datetime(2010, 12, 28, h): HarmonicCoefficients(
+                0, cos={(0, 0): float(h)}
+            )
+            for h in (2, 0, 1)
+        }
+        epochs = [epoch for epoch, _ in source.iter_maps(coefficients)]
+        assert epochs == sorted(coefficients)
+        maps = source.get_maps(coefficients)
+        assert maps[datetime(2010, 12, 28, 2)].get_cell(0, 0) == 20
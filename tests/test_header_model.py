@@ -0,0 +1,135 @@
+import pytest
+import copy
+import pickle
+from datetime import datetime
+
+from ionex_formatter.formatter import (
+    IonexFile,
+    NumericTokenTooBig,
+    UnknownLabelError
+)
+from ionex_formatter.header_model import IonexHeaderModel
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestHeaderModel():
+
+    @pytest.fixture
+    def model(self):
+        self.rendered = []
+
+        def render(label, kind, value):
+            self.rendered.append((label, value))
+            return ["{} {}".format(label, value)]
+
+        return IonexHeaderModel(render)
+
+    def test_render_on_set(self, model):
+        model.set("INTERVAL", [("values", 900)])
+        assert model.dirty == {"INTERVAL"}
+        assert self.rendered == [("INTERVAL", 900)]
+        assert model["INTERVAL"] == ["INTERVAL 900"]
+        assert model.dirty == set()
+        assert model["INTERVAL"] == ["INTERVAL 900"]
+        assert len(self.rendered) == 1
+
+    def test_append_renders_new_entry(self, model):
+        model.append("COMMENT", "text", "first")
+        model.render()
+        model.append("COMMENT", "text", "second")
+        assert model["COMMENT"] == ["COMMENT first", "COMMENT second"]
+        assert self.rendered == [("COMMENT", "first"), ("COMMENT", "second")]
+
+    def test_missing_label(self, model):
+        assert model["COMMENT"] == []
+        assert "COMMENT" not in model
+        model.set("COMMENT", [("text", "comment")])
+        model.remove("COMMENT")
+        assert "COMMENT" not in model
+        assert model["COMMENT"] == []
+
+    def test_read_only_lines(self, model):
+        model.set("COMMENT", [("text", "comment")])
+        with pytest.raises(TypeError):
+            model["COMMENT"].append("other")
+        with pytest.raises(TypeError):
+            model["INTERVAL"].append("other")
+        assert model["COMMENT"] == ["COMMENT comment"]
+        assert "INTERVAL" not in model
+
+
+class TestIonexFileHeaderEditing():
+
+    @pytest.fixture
+    def formatter(self):
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_description("Real-time maps")
+        formatter.add_comment("First comment")
+        formatter.set_epoch_range(datetime(2010, 12, 28),
+                                  datetime(2010, 12, 28, 1))
+        formatter.set_spatial_grid(SpatialRange(87.5, -87.5, -2.5),
+                                   SpatialRange(-180, 180, 5),
+                                   SpatialRange(450, 450, 0))
+        formatter.get_header_lines()
+        return formatter
+
+    def test_only_changed_labels_rendered(self, formatter, monkeypatch):
+        rendered = []
+        render = formatter._render_header_entry
+
+        def counting_render(label, kind, value):
+            rendered.append(label)
+            return render(label, kind, value)
+
+        monkeypatch.setattr(formatter.header, "_render_entry",
+                            counting_render)
+        formatter.set_epoch_range(datetime(2010, 12, 28),
+                                  datetime(2010, 12, 28, 2))
+        formatter.add_comment("Second comment")
+        lines = formatter.get_header_lines()
+        assert sorted(rendered) == [
+            "COMMENT", "EPOCH OF FIRST MAP", "EPOCH OF LAST MAP"
+        ]
+        assert len(formatter.header["EPOCH OF LAST MAP"]) == 1
+        assert formatter.header["EPOCH OF LAST MAP"][0].startswith(
+            "  2010    12    28     2     0     0"
+        )
+        assert len([line for line in lines if "COMMENT" in line]) == 2
+
+    def test_set_comment(self, formatter):
+        formatter.set_sites(["abmf", "zeck"])
+        assert len(formatter.header["COMMENT"]) == 2
+        formatter.set_comment(["Only comment"])
+        assert formatter.header["COMMENT"] == [
+            "Only comment".ljust(60) + "COMMENT".ljust(20)
+        ]
+
+    def test_set_label(self, formatter):
+        formatter.set_label("# OF MAPS IN FILE", [1])
+        formatter.set_label("# OF MAPS IN FILE", [2])
+        assert formatter.header["# OF MAPS IN FILE"] == [
+            "     2" + " " * 54 + "# OF MAPS IN FILE   "
+        ]
+        assert formatter.header.entries("# OF MAPS IN FILE") == \
+            [("values", [2])]
+        with pytest.raises(UnknownLabelError):
+            formatter.set_label("UNKNOWN", [2])
+
+    def test_error_on_set(self, formatter):
+        lines = formatter.get_header_lines()
+        with pytest.raises(NumericTokenTooBig):
+            formatter.set_label("EXPONENT", [12345678])
+        with pytest.raises(NumericTokenTooBig):
+            formatter.update_label("INTERVAL", [12345678])
+        assert "EXPONENT" not in formatter.header
+        assert formatter.get_header_lines() == lines
+
+    def test_copy(self, formatter):
+        lines = formatter.get_header_lines()
+        for restored in (copy.deepcopy(formatter),
+                         pickle.loads(pickle.dumps(formatter))):
+            assert restored.get_header_lines() == lines
+            restored.add_comment("Only in copy")
+            assert len(restored.header["COMMENT"]) == 2
+            assert len(formatter.header["COMMENT"]) == 1
@@ -0,0 +1,74 @@
+import pytest
+from datetime import datetime
+
+from ionex_formatter.formatter import IonexFile, NumericTokenTooBig
+from ionex_formatter.header_template import HeaderTemplate
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestHeaderTemplate():
+
+    def fill_static(self, formatter: IonexFile) -> IonexFile:
+        formatter.set_version_type_gnss()
+        formatter.set_description("Global ionosphere maps")
+        formatter.add_comment("TEC values in 0.1 TECU")
+        formatter.update_label("INTERVAL", [900])
+        formatter.set_spatial_grid(SpatialRange(87.5, -87.5, -2.5),
+                                   SpatialRange(-180, 180, 5),
+                                   SpatialRange(450, 450, 0))
+        formatter.update_label("EXPONENT", [-1])
+        return formatter
+
+    @pytest.fixture
+    def template(self):
+        formatter = self.fill_static(IonexFile())
+        formatter.update_label(
+            "PGM / RUN BY / DATE", ["ionex_formatter", "MOS", "placeholder"]
+        )
+        return HeaderTemplate(formatter)
+
+    def test_stamp_matches_formatter(self, template):
+        first = datetime(2010, 12, 28)
+        last = datetime(2010, 12, 28, 23, 45)
+        comments = ["Rapid product", "Generated by batch run"]
+        stamped = template.stamp(first_epoch=first,
+                                 last_epoch=last,
+                                 maps_number=96,
+                                 date="28-DEC-10 23:59",
+                                 comments=comments)
+
+        formatter = self.fill_static(IonexFile())
+        formatter.update_label(
+            "PGM / RUN BY / DATE",
+            ["ionex_formatter", "MOS", "28-DEC-10 23:59"]
+        )
+        formatter.set_epoch_range(first, last)
+        formatter.update_label("# OF MAPS IN FILE", [96])
+        formatter.add_comment(comments)
+        assert stamped == formatter.get_header_lines()
+
+    def test_template_unchanged(self, template):
+        lines = list(template.lines)
+        template.stamp(first_epoch=datetime(2010, 12, 28), maps_number=1,
+                       comments="one more comment")
+        assert template.lines == lines
+
+    def test_stamp_for_maps(self, template):
+        maps = {datetime(2010, 12, 28, h): None for h in (3, 1, 2)}
+        stamped = template.stamp_for_maps(maps)
+        index = template.slots["EPOCH OF FIRST MAP"]
+        assert stamped[index].startswith("  2010    12    28     1     0")
+        index = template.slots["# OF MAPS IN FILE"]
+        assert stamped[index].startswith("     3    ")
+
+    def test_field_offset(self, template):
+        stamped = template.stamp(maps_number=42, comments=["a", "b"])
+        text = "\n".join(stamped) + "\n"
+        offset = template.field_offset("# OF MAPS IN FILE", comment_lines=2)
+        assert text[offset: offset + 6] == "    42"
+
+    def test_too_long_value(self, template):
+        with pytest.raises(NumericTokenTooBig):
+            template.stamp(maps_number=1234567)
+        with pytest.raises(NumericTokenTooBig):
+            template.stamp(date="date that is too long for slot")
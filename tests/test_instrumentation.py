@@ -0,0 +1,146 @@
+import pytest
+import asyncio
+import io
+import json
+from datetime import datetime
+
+from ionex_formatter.async_writer import AsyncIonexWriter
+from ionex_formatter.convert import convert_csv
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.instrumentation import Instrumentation
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestInstrumentation():
+
+    @pytest.fixture
+    def ionex_file(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        maps = dict()
+        for hour in range(4):
+            epoch = datetime(2010, 12, 28, hour)
+            ionex_map = IonexMap(lat_range, lon_range, 450, epoch)
+            ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+            maps[epoch] = ionex_map
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_epoch_range(datetime(2010, 12, 28, 0),
+                                  datetime(2010, 12, 28, 3))
+        formatter.set_maps(maps, IonexMapType.TEC)
+        return formatter
+
+    def test_disabled_by_default(self, ionex_file):
+        assert ionex_file.instrumentation is None
+        stream = io.BytesIO()
+        ionex_file.write(stream)
+        assert stream.getvalue().endswith(b"END OF FILE" + b" " * 9 + b"\n")
+
+    def test_counters(self, ionex_file):
+        expected = io.BytesIO()
+        ionex_file.write(expected)
+
+        instrumentation = Instrumentation()
+        ionex_file.instrumentation = instrumentation
+        stream = io.BytesIO()
+        ionex_file.write(stream)
+        assert stream.getvalue() == expected.getvalue()
+
+        stats = instrumentation.stats
+        assert stats.stages["header"].calls == 1
+        assert stats.stages["encode"].calls == 4
+        # header, 4 maps and END OF FILE
+        assert stats.stages["write"].calls == 6
+        assert stats.maps_encoded == 4
+        assert stats.values_encoded == 4 * 3 * 73
+        assert stats.bytes_written == len(expected.getvalue())
+        assert stats.lines_written == expected.getvalue().count(b"\n")
+        assert stats.seconds_per_map > 0
+        summary = json.loads(json.dumps(stats.summary()))
+        assert summary["counters"]["maps"] == 4
+        assert instrumentation.events == []
+
+    def test_hooks_and_stage(self):
+        calls = list()
+        instrumentation = Instrumentation()
+        instrumentation.add_hook(
+            lambda stage, seconds, counters: calls.append((stage, counters))
+        )
+        with instrumentation.stage("ingest") as counters:
+            counters["values"] = 10
+        assert calls == [("ingest", {"values": 10})]
+        assert instrumentation.stats.values_encoded == 10
+
+        with pytest.raises(RuntimeError):
+            with instrumentation.stage("set_data"):
+                raise RuntimeError
+        assert instrumentation.stats.stages["set_data"].calls == 1
+
+    def test_set_data(self, map_data):
+        instrumentation = Instrumentation()
+        ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                             SpatialRange(-180, 180, 5), 450,
+                             datetime(2010, 12, 28))
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        ionex_map.instrumentation = instrumentation
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        assert instrumentation.stats.stages["set_data"].calls == 1
+        assert instrumentation.stats.counters["cells"] == len(map_data)
+
+    def test_header_entries(self):
+        instrumentation = Instrumentation()
+        formatter = IonexFile()
+        formatter.instrumentation = instrumentation
+        formatter.set_version_type_gnss()
+        formatter.set_label("EXPONENT", [-1])
+        stats = instrumentation.stats
+        assert stats.stages["header_entry"].calls == 2
+        assert stats.counters["header_lines"] == 2
+        formatter.get_header_lines()
+        assert stats.stages["header_entry"].calls == 2
+        assert stats.stages["header"].calls == 1
+
+    def test_converter(self, make_csv):
+        instrumentation = Instrumentation(trace=True)
+        ionex_file = convert_csv(io.StringIO(make_csv()),
+                                 instrumentation=instrumentation)
+        assert ionex_file.instrumentation is instrumentation
+        ionex_file.write(io.BytesIO())
+        stats = instrumentation.stats
+        assert stats.stages["ingest"].calls == 1
+        assert stats.counters["records"] == 2 * 3 * 73
+        assert stats.stages["header_entry"].calls > 0
+        assert stats.maps_encoded == 2
+        assert instrumentation.events[0]["name"] == "ingest"
+
+    def test_trace(self, ionex_file, tmp_path):
+        instrumentation = Instrumentation(trace=True)
+        ionex_file.instrumentation = instrumentation
+        ionex_file.write(io.BytesIO())
+        path = tmp_path / "trace.json"
+        instrumentation.dump_trace(path)
+        events = json.loads(path.read_text())["traceEvents"]
+        assert len(events) == 11
+        assert {event["ph"] for event in events} == {"X"}
+        assert [e["name"] for e in events[:3]] == ["header", "write", "encode"]
+        for first, second in zip(events, events[1:]):
+            assert first["ts"] <= second["ts"]
+            assert first["dur"] >= 0
+
+    def test_async_writer(self, ionex_file):
+        instrumentation = Instrumentation()
+        ionex_file.instrumentation = instrumentation
+        maps = ionex_file.maps[IonexMapType.TEC]
+        stream = io.BytesIO()
+
+        async def produce():
+            async with AsyncIonexWriter(ionex_file, stream) as writer:
+                for epoch, ionex_map in maps.items():
+                    await writer.add_map(epoch, ionex_map)
+
+        asyncio.run(produce())
+        stats = instrumentation.stats
+        assert stats.maps_encoded == 4
+        assert stats.stages["write"].calls == 6
+        assert stats.bytes_written == len(stream.getvalue())
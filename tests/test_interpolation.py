@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime
+
+from ionex_formatter.interpolation import (
+    GridIndex,
+    GridInterpolator,
+    InterpolationMethod,
+    great_circle_distance,
+    unit_vector
+)
+from ionex_formatter.ionex_map import IonexMap
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestGridInterpolator():
+
+    @pytest.fixture
+    def ranges(self):
+        return SpatialRange(80, -80, -10), SpatialRange(-180, 180, 10)
+
+    def test_distance(self):
+        a = unit_vector(0, 0)
+        b = unit_vector(0, 90)
+        assert great_circle_distance(a, b) == pytest.approx(10007.5, 0.01)
+
+    def test_index_is_shared(self, ranges):
+        lat_range, lon_range = ranges
+        index = GridIndex.get(lat_range, lon_range)
+        assert GridIndex.get(SpatialRange(80, -80, -10),
+                             SpatialRange(-180, 180, 10)) is index
+        assert GridInterpolator(*ranges).index is index
+
+    def test_rings(self):
+        assert GridIndex.ring(0) == [(0, 0, 0)]
+        assert len(GridIndex.ring(1)) == 26
+        assert len(GridIndex.ring(2)) == 98
+
+    def test_nearest(self, ranges):
+        interpolator = GridInterpolator(*ranges,
+                                        method=InterpolationMethod.NEAREST)
+        ionex_map = interpolator.interpolate([0, 50], [0, 100], [10, 20],
+                                             450, datetime(2010, 12, 28))
+        assert ionex_map.get_cell(0, 0) == 10
+        assert ionex_map.get_cell(10, 20) == 10
+        assert ionex_map.get_cell(60, 100) == 20
+        assert ionex_map.get_cell(0, 180) == ionex_map.get_cell(0, -180)
+
+    def test_idw(self, ranges):
+        interpolator = GridInterpolator(*ranges, neighbours=2)
+        values = interpolator.interpolate_values([0, 0], [-5, 5], [10, 30])
+        ionex_map_values = dict(zip(
+            [(lat, lon) for lat in ranges[0].coordinates
+             for lon in ranges[1].coordinates],
+            values
+        ))
+        assert ionex_map_values[(0, 0)] == 20
+        assert 10 < ionex_map_values[(0, -10)] < 20
+
+    def test_matches_brute_force(self, ranges):
+        lats = [(k * 37) % 160 - 80 + 0.3 for k in range(60)]
+        lons = [(k * 71) % 360 - 180 + 0.7 for k in range(60)]
+        values = [k * 10 for k in range(60)]
+        interpolator = GridInterpolator(*ranges, neighbours=3)
+        result = interpolator.interpolate_values(lats, lons, values)
+        points = [unit_vector(a, b) for a, b in zip(lats, lons)]
+        index = interpolator.index
+        for node in range(len(index.vectors)):
+            vector = index.vectors[node]
+            nearest = sorted(
+                (great_circle_distance(vector, p), v)
+                for p, v in zip(points, values)
+            )[:3]
+            weights = [d ** -2 for d, _ in nearest]
+            expected = sum(w * v for w, (_, v) in zip(weights, nearest))
+            assert result[node] == round(expected / sum(weights))
+
+    def test_mask(self, ranges):
+        interpolator = GridInterpolator(*ranges, max_distance=1500)
+        ionex_map = interpolator.interpolate([0], [0], [10], 450,
+                                             datetime(2010, 12, 28))
+        assert ionex_map.get_cell(0, 10) == 10
+        assert ionex_map.get_cell(50, 100) == IonexMap.NO_VALUE
+
+    def test_no_observations(self, ranges):
+        with pytest.raises(ValueError):
+            GridInterpolator(*ranges).interpolate_values([], [], [])
@@ -61,4 +61,24 @@ class TestIoneHeaderFormat:
             corrupted_descrition = json.dump(corrupted_descrition, f)
         header = IonexHeader_V_1_1()
         with pytest.raises(TypeError):
-            header.load_descriptions(corrupted_descrition_path)
\ No newline at end of file
+            header.load_descriptions(corrupted_descrition_path)
+
+class TestLazyDescriptions:
+
+    def test_construction_does_not_read_files(self, tmp_path, monkeypatch):
+        header = IonexHeader_V_1_1()
+        header.HEADER_DESCRIPTIONS = None
+        monkeypatch.chdir(tmp_path)
+        header = IonexHeader_V_1_1()
+        assert header._descriptions is None
+        assert "COMMENT" in header.HEADER_DESCRIPTIONS
+        assert header._descriptions is not None
+
+    def test_corrupted_file_keeps_descriptions(self, tmp_path):
+        header = IonexHeader_V_1_1()
+        corrupted_descrition_path = tmp_path / "corrupted_descriptions.json"
+        with open(corrupted_descrition_path, "w") as f:
+            json.dump({"COMMENT": "comment"}, f)
+        with pytest.raises(FormatDescriptionLabelMissing):
+            header.init_fields(corrupted_descrition_path)
+        assert "END OF FILE" in header.HEADER_DESCRIPTIONS
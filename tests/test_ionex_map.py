@@ -64,3 +64,20 @@ class TestDatetimeFormatting:
         ) 
         with pytest.raises(LongitudeCellIsNotSet):
             ionex_map.set_data(cells)
+
+    def test_inexact_coordinates(self):
+        lat_range = SpatialRange(2.5, -2.5, -2.5)
+        lon_range = SpatialRange(0, 0.3, 0.1)
+        data = [
+            (2.5 - 2.5 * k, 0.1 * j, 10 * k + j)
+            for k in range(3) for j in reversed(range(4))
+        ]
+        ionex_map = IonexMap(lat_range=lat_range,
+                             lon_range=lon_range,
+                             height=450,
+                             epoch=datetime(2010, 12, 28)
+        )
+        ionex_map.set_data(GridCell.get_list_from_csv(data))
+        assert list(ionex_map.data.keys()) == [2.5, 0.0, -2.5]
+        assert ionex_map.data[0.0] == [10, 11, 12, 13]
+        assert ionex_map.get_cell(0.1 + 0.2 - 0.3, 0.1 + 0.2) == 13
@@ -0,0 +1,111 @@
+import pytest
+import gzip
+import hashlib
+import io
+from datetime import datetime
+
+from ionex_formatter.compression import Compression
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.manifest import (
+    Manifest,
+    manifest_path,
+    write_with_manifest
+)
+from ionex_formatter.spatial import SpatialRange
+from ionex_formatter.watch import convert_file
+
+
+class TestManifest():
+
+    @pytest.fixture
+    def ionex_file(self, map_data):
+        lat_range = SpatialRange(87.5, -87.5, -87.5)
+        lon_range = SpatialRange(-180, 180, 5)
+        maps = dict()
+        for hour in range(3):
+            epoch = datetime(2010, 12, 28, hour)
+            maps[epoch] = IonexMap(lat_range, lon_range, 450, epoch)
+            maps[epoch].set_data(GridCell.get_list_from_csv(map_data))
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_epoch_range(datetime(2010, 12, 28, 0),
+                                  datetime(2010, 12, 28, 2))
+        formatter.set_maps(maps, IonexMapType.TEC)
+        return formatter
+
+    def test_uncompressed(self, ionex_file, tmp_path):
+        path = tmp_path / "mosg3620.10i"
+        manifest = write_with_manifest(ionex_file, path)
+        data = path.read_bytes()
+        assert manifest.name == "mosg3620.10i"
+        assert manifest.compression == "none"
+        assert manifest.size == manifest.content_size == len(data)
+        assert manifest.digests["md5"] == hashlib.md5(data).hexdigest()
+        assert manifest.digests == manifest.content_digests
+        assert manifest.maps == {"TEC": 3}
+        assert manifest.first_epoch == "2010-12-28T00:00:00"
+        assert manifest.last_epoch == "2010-12-28T02:00:00"
+        assert manifest.grid == {"lat": [87.5, -87.5, -87.5],
+                                 "lon": [-180, 180, 5],
+                                 "height": [450, 450, 0]}
+
+    def test_compressed(self, ionex_file, tmp_path):
+        path = tmp_path / "mosg3620.10i.gz"
+        manifest = write_with_manifest(ionex_file, path,
+                                       algorithms=("sha256",))
+        stored = path.read_bytes()
+        content = gzip.decompress(stored)
+        assert manifest.compression == "gzip"
+        assert manifest.size == len(stored)
+        assert manifest.content_size == len(content)
+        assert manifest.digests == {
+            "sha256": hashlib.sha256(stored).hexdigest()
+        }
+        assert manifest.content_digests == {
+            "sha256": hashlib.sha256(content).hexdigest()
+        }
+        expected = io.BytesIO()
+        ionex_file.write(expected)
+        assert content == expected.getvalue()
+
+    @pytest.mark.parametrize("suffix", [".gz", ""])
+    def test_separate_algorithms(self, ionex_file, tmp_path, suffix):
+        path = tmp_path / ("mosg3620.10i" + suffix)
+        manifest = write_with_manifest(ionex_file, path,
+                                       algorithms=("md5",),
+                                       content_algorithms=("sha256",))
+        content = path.read_bytes()
+        if suffix:
+            content = gzip.decompress(content)
+        assert manifest.digests == {
+            "md5": hashlib.md5(path.read_bytes()).hexdigest()
+        }
+        assert manifest.content_digests == {
+            "sha256": hashlib.sha256(content).hexdigest()
+        }
+        # empty set skips hashing of stream
+        manifest = write_with_manifest(ionex_file, path, content_algorithms=())
+        assert manifest.content_digests == {}
+        assert manifest.content_size == len(content)
+        assert set(manifest.digests) == {"md5", "sha256"}
+
+    def test_stream_target(self, ionex_file):
+        stream = io.BytesIO()
+        manifest = write_with_manifest(ionex_file, stream, Compression.BZIP2)
+        assert manifest.name is None
+        assert manifest.size == len(stream.getvalue())
+        assert manifest.content_size > manifest.size
+
+    def test_sidecar(self, tmp_path, make_csv):
+        source = tmp_path / "data.csv"
+        source.write_text(make_csv())
+        path = convert_file(source, tmp_path, compression=Compression.GZIP,
+                            manifest=True)
+        sidecar = manifest_path(path)
+        assert sidecar.name == "MOSG3620.10I.gz.manifest.json"
+        manifest = Manifest.load(sidecar)
+        assert manifest.name == path.name
+        assert manifest.digests["sha256"] == \
+            hashlib.sha256(path.read_bytes()).hexdigest()
+        assert manifest.maps == {"TEC": 2}
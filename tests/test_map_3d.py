@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime
+
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap3D, GridCell
+from ionex_formatter.reader import read_ionex
+from ionex_formatter.spatial import SpatialRange
+from ionex_formatter.validation import IssueKind
+
+
+class TestIonexMap3D():
+
+    @pytest.fixture
+    def ranges(self):
+        return (SpatialRange(87.5, -87.5, -87.5),
+                SpatialRange(-180, 180, 5),
+                SpatialRange(200, 400, 100))
+
+    @pytest.fixture
+    def ionex_map(self, ranges, map_data):
+        lat_range, lon_range, height_range = ranges
+        ionex_map = IonexMap3D(lat_range, lon_range, height_range,
+                               datetime(2010, 12, 28))
+        for k, height in enumerate(height_range.coordinates):
+            cells = GridCell.get_list_from_csv(
+                [(lat, lon, val + k) for lat, lon, val in map_data]
+            )
+            ionex_map.set_data(height, cells)
+        return ionex_map
+
+    def test_shape(self, ionex_map):
+        assert ionex_map.shape == (3, 3, 73)
+        assert len(ionex_map.values) == 3 * 3 * 73
+
+    def test_get_cell(self, ionex_map):
+        assert ionex_map.get_cell(200, 87.5, -165) == 49
+        assert ionex_map.get_cell(400, -87.5, 160) == 129
+
+    def test_wrong_values_number(self, ranges):
+        with pytest.raises(ValueError):
+            IonexMap3D(*ranges, datetime(2010, 12, 28), values=[1, 2, 3])
+
+    def test_set_layer(self, ranges):
+        ionex_map = IonexMap3D(*ranges, datetime(2010, 12, 28))
+        ionex_map.set_layer(300, list(range(3 * 73)))
+        assert ionex_map.get_cell(300, 0, -180) == 73
+        assert ionex_map.get_cell(200, 0, -180) == IonexMap3D.NO_VALUE
+
+    def test_map_lines(self, ionex_map, map_lines):
+        formatter = IonexFile()
+        lines = formatter.format_map(IonexMapType.TEC, 1,
+                                     ionex_map.epoch, ionex_map)
+        grid = [line for line in lines if line.endswith("LAT/LON1/LON2/DLON/H")]
+        assert len(grid) == 9
+        assert grid[0].startswith("    87.5-180.0 180.0   5.0 200.0")
+        assert grid[-1].startswith("   -87.5-180.0 180.0   5.0 400.0")
+        # the first height is the same as 2-dimensional map
+        assert "\n".join(lines[:20] + lines[-1:]) == \
+            map_lines.replace("450.0", "200.0")
+
+    def test_validate(self, ionex_map):
+        formatter = IonexFile()
+        formatter.set_maps({ionex_map.epoch: ionex_map}, IonexMapType.TEC)
+        assert formatter.validate().ok
+        ionex_map.values[5] = 100000
+        report = formatter.validate()
+        assert report.summary() == {IssueKind.OVERFLOW: 1}
+
+    def test_write_read(self, ionex_map, ranges, tmp_path):
+        lat_range, lon_range, height_range = ranges
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_map_dimension(3)
+        formatter.set_spatial_grid(lat_range, lon_range, height_range)
+        formatter.set_maps({ionex_map.epoch: ionex_map}, IonexMapType.TEC)
+        path = tmp_path / "mosg3620.10i"
+        formatter.write(path)
+        result = read_ionex(path).maps[IonexMapType.TEC][ionex_map.epoch]
+        assert isinstance(result, IonexMap3D)
+        assert result.values == ionex_map.values
+
+    def test_wrong_dimension(self):
+        with pytest.raises(ValueError):
+            IonexFile().set_map_dimension(4)
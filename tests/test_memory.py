@@ -0,0 +1,103 @@
+import pytest
+from datetime import datetime, timedelta
+
+from ionex_formatter.formatter import IonexMapType
+from ionex_formatter.ionex_map import IonexMap
+from ionex_formatter.memory import deep_sizeof, file_footprint, measure_memory
+
+# memory budgets in bytes per grid node, list of values takes 8 bytes per
+# node plus ints that are not cached by interpreter
+BUILD_PEAK_PER_NODE = 120
+MAP_PER_NODE = 24
+# streaming write keeps lines, joined text and encoded bytes of one map
+WRITE_PEAK_PER_BLOCK = 5
+WRITE_RETAINED = 100_000
+
+START = datetime(2010, 12, 28)
+
+
+class TestMemoryBudget():
+
+    @pytest.mark.parametrize("grid", ["5x2.5", "1x1"])
+    def test_build_map(self, grid, grid_ranges, grid_cells):
+        lat_range, lon_range = grid_ranges(grid)
+        cells = grid_cells(lat_range, lon_range)
+
+        def build():
+            ionex_map = IonexMap(lat_range, lon_range, 450, START)
+            ionex_map.set_data(cells)
+            return ionex_map
+
+        ionex_map, usage = measure_memory(build)
+        nodes = len(cells)
+        assert usage.peak < BUILD_PEAK_PER_NODE * nodes
+        assert usage.retained < MAP_PER_NODE * nodes
+        assert deep_sizeof(ionex_map) < MAP_PER_NODE * nodes
+
+    def test_hold_epochs(self, grid_ranges, grid_cells, make_ionex_file):
+        lat_range, lon_range = grid_ranges("5x2.5")
+        cells = grid_cells(lat_range, lon_range)
+        epochs = [START + timedelta(hours=k) for k in range(24)]
+
+        def build():
+            maps = dict()
+            for epoch in epochs:
+                maps[epoch] = IonexMap(lat_range, lon_range, 450, epoch)
+                maps[epoch].set_data(cells)
+            ionex_file = make_ionex_file("5x2.5", len(epochs), False)
+            ionex_file.set_maps(maps, IonexMapType.TEC)
+            return ionex_file
+
+        ionex_file, usage = measure_memory(build)
+        budget = MAP_PER_NODE * len(cells) * len(epochs)
+        assert usage.retained < budget
+        footprint = file_footprint(ionex_file)
+        assert footprint["TEC"] < budget
+        assert footprint["header"] < 50_000
+
+    @pytest.mark.parametrize("grid", ["5x2.5", "1x1"])
+    def test_streaming_write(self, grid, make_ionex_file, counting_sink):
+        ionex_file = make_ionex_file(grid, 2)
+        ionex_map = next(iter(ionex_file.maps[IonexMapType.TEC].values()))
+        block = sum(
+            len(line) + 1
+            for line in ionex_file.format_map(IonexMapType.TEC, 1, START,
+                                              ionex_map)
+        )
+        sink = counting_sink()
+        _, usage = measure_memory(lambda: ionex_file.write(sink))
+        assert usage.peak < WRITE_PEAK_PER_BLOCK * block
+        assert usage.retained < WRITE_RETAINED
+
+    def test_streaming_write_does_not_grow(self, make_ionex_file,
+                                           counting_sink):
+        peaks = list()
+        for epochs in (2, 8):
+            ionex_file = make_ionex_file("5x2.5", epochs)
+            ionex_file.write(counting_sink())
+            _, usage = measure_memory(
+                lambda: ionex_file.write(counting_sink())
+            )
+            peaks.append(usage.peak)
+        assert peaks[1] < peaks[0] * 1.2
+
+
+class TestFootprint():
+
+    def test_deep_sizeof(self, grid_ranges):
+        values = [1000 + k for k in range(100)]
+        size = deep_sizeof(values)
+        assert size >= 100 * 28
+        # shared objects are counted once
+        assert deep_sizeof([values, values]) < size + 100
+        lat_range, lon_range = grid_ranges("5x2.5")
+        ionex_map = IonexMap(lat_range, lon_range, 450, START)
+        assert deep_sizeof(ionex_map) < deep_sizeof(lat_range.coordinates)
+
+    def test_file_footprint(self, make_ionex_file):
+        ionex_file = make_ionex_file("5x2.5", 24)
+        footprint = file_footprint(ionex_file)
+        assert set(footprint) == {"header", "TEC"}
+        # the same map is set for every epoch
+        ionex_map = next(iter(ionex_file.maps[IonexMapType.TEC].values()))
+        assert footprint["TEC"] < deep_sizeof(ionex_map) + 24 * 200
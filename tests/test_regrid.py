@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime
+
+from ionex_formatter.ionex_map import IonexMap, IonexMap3D
+from ionex_formatter.regrid import (
+    GridCoverageError,
+    Regridder,
+    RegridWeights,
+    axis_weights
+)
+from ionex_formatter.spatial import SpatialRange
+
+
+def make_map(lat_range, lon_range, function):
+    ionex_map = IonexMap(lat_range, lon_range, 450, datetime(2010, 12, 28))
+    for lat in lat_range.coordinates:
+        ionex_map.set_values(
+            lat, [function(lat, lon) for lon in lon_range.coordinates]
+        )
+    return ionex_map
+
+
+class TestRegrid():
+
+    def test_block_average_weights(self):
+        rows = axis_weights(SpatialRange(0, 10, 1), SpatialRange(0, 10, 5))
+        assert rows[1] == [(3, 0.2), (4, 0.2), (5, 0.2), (6, 0.2), (7, 0.2)]
+        assert [k for k, _ in rows[0]] == [0, 1, 2]
+        # nodes on the block edge have half weight
+        rows = axis_weights(SpatialRange(0, 10, 0.5), SpatialRange(0, 10, 2))
+        assert [k for k, _ in rows[1]] == [2, 3, 4, 5, 6]
+        assert rows[1][0][1] == pytest.approx(0.125)
+        assert rows[1][2][1] == pytest.approx(0.25)
+
+    def test_bilinear_weights(self):
+        rows = axis_weights(SpatialRange(10, -10, -10),
+                            SpatialRange(10, -10, -2.5))
+        assert rows[0] == [(0, 1.0)]
+        assert rows[1] == [(0, 0.75), (1, 0.25)]
+
+    def test_coarsen(self):
+        fine = make_map(SpatialRange(10, -10, -1), SpatialRange(-20, 20, 1),
+                        lambda lat, lon: round(10 * lat + lon) + 1000)
+        regridder = Regridder(SpatialRange(10, -10, -5),
+                              SpatialRange(-20, 20, 10))
+        coarse = regridder.regrid(fine)
+        # linear field is kept by symmetric block average
+        assert coarse.get_cell(5, 10) == 1060
+        assert coarse.get_cell(0, -20) != IonexMap.NO_VALUE
+
+    def test_dateline(self):
+        rows = axis_weights(SpatialRange(-180, 180, 5),
+                            SpatialRange(-180, 180, 10), period=360)
+        # block of the first node takes nodes on both sides of dateline
+        assert sorted(k for k, _ in rows[0]) == [0, 1, 71]
+        assert rows[-1] == rows[0]
+        assert sum(w for _, w in rows[0]) == pytest.approx(1.0)
+        # regional grid does not wrap
+        rows = axis_weights(SpatialRange(-20, 20, 1),
+                            SpatialRange(-20, 20, 10), period=360)
+        assert [k for k, _ in rows[0]] == [0, 1, 2, 3, 4, 5]
+
+        fine = make_map(SpatialRange(10, -10, -5),
+                        SpatialRange(-180, 180, 5),
+                        lambda lat, lon: 200 if lon > 170 else 100)
+        coarse = Regridder(SpatialRange(10, -10, -5),
+                           SpatialRange(-180, 180, 10)).regrid(fine)
+        assert coarse.get_cell(0, -180) == coarse.get_cell(0, 180) == 125
+
+    def test_refine(self):
+        coarse = make_map(SpatialRange(10, -10, -10), SpatialRange(0, 20, 10),
+                          lambda lat, lon: 10 * lat + lon + 500)
+        regridder = Regridder(SpatialRange(10, -10, -2.5),
+                              SpatialRange(0, 20, 5))
+        fine = regridder.regrid(coarse)
+        assert fine.get_cell(2.5, 5) == 530
+        assert fine.get_cell(-7.5, 15) == 440
+
+    def test_no_value_skipped(self):
+        coarse = make_map(SpatialRange(10, -10, -10), SpatialRange(0, 20, 10),
+                          lambda lat, lon: 100)
+        coarse.data[10.0][0] = IonexMap.NO_VALUE
+        regridder = Regridder(SpatialRange(10, -10, -5),
+                              SpatialRange(0, 20, 5))
+        fine = regridder.regrid(coarse)
+        assert fine.get_cell(10, 0) == IonexMap.NO_VALUE
+        assert fine.get_cell(5, 5) == 100
+
+    def test_weights_are_cached(self):
+        source = (SpatialRange(10, -10, -10), SpatialRange(0, 20, 10))
+        target = (SpatialRange(10, -10, -5), SpatialRange(0, 20, 5))
+        assert RegridWeights.get(*source, *target) is \
+            RegridWeights.get(*source, *target)
+
+    def test_outside_source(self):
+        coarse = make_map(SpatialRange(10, -10, -10), SpatialRange(0, 20, 10),
+                          lambda lat, lon: 100)
+        regridder = Regridder(SpatialRange(20, -20, -5),
+                              SpatialRange(0, 20, 5))
+        with pytest.raises(GridCoverageError):
+            regridder.regrid(coarse)
+
+    def test_regrid_maps_3d(self):
+        lat_range = SpatialRange(10, -10, -10)
+        lon_range = SpatialRange(0, 20, 10)
+        epoch = datetime(2010, 12, 28)
+        ionex_map = IonexMap3D(lat_range, lon_range,
+                               SpatialRange(200, 300, 100), epoch,
+                               values=[100] * 9 + [200] * 9)
+        regridder = Regridder(SpatialRange(10, -10, -5),
+                              SpatialRange(0, 20, 5))
+        result = regridder.regrid_maps({epoch: ionex_map})[epoch]
+        assert result.shape == (2, 5, 5)
+        assert result.get_cell(300, 5, 15) == 200
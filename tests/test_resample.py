@@ -0,0 +1,108 @@
+import pytest
+from datetime import datetime, timedelta
+
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap
+from ionex_formatter.resample import (
+    ResampleMethod,
+    TemporalResampler,
+    resample_file
+)
+from ionex_formatter.spatial import SpatialRange
+
+
+def make_map(epoch, function):
+    lat_range = SpatialRange(10, -10, -10)
+    lon_range = SpatialRange(-180, 180, 15)
+    ionex_map = IonexMap(lat_range, lon_range, 450, epoch)
+    for lat in lat_range.coordinates:
+        ionex_map.set_values(
+            lat, [function(lat, lon) for lon in lon_range.coordinates]
+        )
+    return ionex_map
+
+
+class TestTemporalResampler():
+
+    @pytest.fixture
+    def maps(self):
+        start = datetime(2010, 12, 28)
+        minutes = [0, 50, 130, 180]
+        return {
+            start + timedelta(minutes=m): make_map(
+                start + timedelta(minutes=m), lambda lat, lon, m=m: 10 * m
+            )
+            for m in minutes
+        }
+
+    def test_epochs(self, maps):
+        resampler = TemporalResampler(3600)
+        assert resampler.epochs(maps) == [
+            datetime(2010, 12, 28, h) for h in range(4)
+        ]
+
+    def test_linear(self, maps):
+        result = TemporalResampler(3600).resample(maps)
+        assert result[datetime(2010, 12, 28, 1)].get_cell(0, 0) == 600
+        assert result[datetime(2010, 12, 28, 2)].get_cell(0, 0) == 1200
+
+    def test_nearest(self, maps):
+        resampler = TemporalResampler(3600, ResampleMethod.NEAREST)
+        result = resampler.resample(maps)
+        assert result[datetime(2010, 12, 28, 1)].get_cell(0, 0) == 500
+        assert result[datetime(2010, 12, 28, 2)].get_cell(0, 0) == 1300
+
+    def test_rotation(self):
+        # feature fixed to the Sun moves 15 degrees to the west per hour
+        start = datetime(2010, 12, 28)
+        maps = {
+            start: make_map(start, lambda lat, lon: 100 if lon == 0 else 0),
+            start + timedelta(hours=2): make_map(
+                start + timedelta(hours=2),
+                lambda lat, lon: 100 if lon == -30 else 0
+            ),
+        }
+        middle = start + timedelta(hours=1)
+        linear = TemporalResampler(3600).resample(maps)[middle]
+        rotated = TemporalResampler(
+            3600, ResampleMethod.ROTATION
+        ).resample(maps)[middle]
+        assert linear.get_cell(0, -15) == 0
+        assert rotated.get_cell(0, -15) == 100
+        assert rotated.get_cell(0, 0) == 0
+
+    def test_no_value(self, maps):
+        first = min(maps)
+        maps[first].data[0.0][0] = IonexMap.NO_VALUE
+        result = TemporalResampler(1800).resample(maps)
+        assert result[first + timedelta(minutes=30)].get_cell(0, -180) == \
+            IonexMap.NO_VALUE
+
+    def test_out_of_range(self, maps):
+        resampler = TemporalResampler(3600, end=datetime(2010, 12, 28, 5))
+        with pytest.raises(ValueError):
+            resampler.resample(maps)
+
+    def test_resample_file(self, maps):
+        ionex_file = IonexFile()
+        ionex_file.set_maps(maps, IonexMapType.TEC)
+        resample_file(ionex_file, 1800)
+        assert len(ionex_file.maps[IonexMapType.TEC]) == 7
+        assert ionex_file.header["INTERVAL"][0].startswith("  1800")
+        assert ionex_file.header["# OF MAPS IN FILE"][0].startswith("     7")
+        assert ionex_file.header["EPOCH OF LAST MAP"][0].startswith(
+            "  2010    12    28     3     0     0"
+        )
+
+    def test_tec_epochs(self, maps):
+        # epochs are taken from TEC maps whatever type is set first
+        ionex_file = IonexFile()
+        earlier = datetime(2010, 12, 27, 23)
+        rms = {earlier: make_map(earlier, lambda lat, lon: 5), **maps}
+        ionex_file.set_maps(rms, IonexMapType.RMS)
+        ionex_file.set_maps(maps, IonexMapType.TEC)
+        resample_file(ionex_file, 1800)
+        assert len(ionex_file.maps[IonexMapType.TEC]) == 7
+        assert list(ionex_file.maps[IonexMapType.RMS]) == \
+            list(ionex_file.maps[IonexMapType.TEC])
+        assert ionex_file.header["# OF MAPS IN FILE"][0].startswith("     7")
@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime, timedelta
+
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.naming import (
+    FileNameFieldError,
+    get_file_name,
+    hour_letter
+)
+from ionex_formatter.reader import read_ionex
+from ionex_formatter.rolling import (
+    EpochOrderError,
+    RollingIonexWriter,
+    SegmentPeriod
+)
+from ionex_formatter.spatial import SpatialRange
+
+
+class TestFileName():
+
+    def test_daily(self):
+        name = get_file_name("mos", datetime(2010, 12, 28))
+        assert name == "MOSG3620.10I"
+
+    def test_hourly(self):
+        epoch = datetime(2009, 1, 1, 23)
+        name = get_file_name("cod", epoch, "e", hour_letter(epoch.hour))
+        assert name == "CODE001X.09I"
+
+    def test_wrong_fields(self):
+        with pytest.raises(FileNameFieldError):
+            get_file_name("mosc", datetime(2010, 12, 28))
+        with pytest.raises(ValueError):
+            hour_letter(24)
+
+
+class TestRollingWriter():
+
+    @pytest.fixture
+    def ionex_map(self, map_data):
+        ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                             SpatialRange(-180, 180, 5),
+                             450,
+                             datetime(2010, 12, 28))
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        return ionex_map
+
+    @pytest.fixture
+    def ionex_file(self):
+        formatter = IonexFile()
+        formatter.set_version_type_gnss()
+        formatter.set_description("Rolling test")
+        formatter.set_spatial_grid(SpatialRange(87.5, -87.5, -87.5),
+                                   SpatialRange(-180, 180, 5),
+                                   SpatialRange(450, 450, 0))
+        formatter.update_label("INTERVAL", [900])
+        return formatter
+
+    def test_hourly_segments(self, ionex_file, ionex_map, tmp_path):
+        finished = []
+        start = datetime(2010, 12, 28, 22, 30)
+        epochs = [start + timedelta(minutes=15 * i) for i in range(7)]
+        with RollingIonexWriter(ionex_file, tmp_path, "mos",
+                                on_segment=finished.append) as writer:
+            for epoch in epochs:
+                writer.add_map(epoch, ionex_map)
+            assert len(finished) == 2
+            assert len(list(tmp_path.glob(".*.tmp"))) == 1
+        names = [p.name for p in finished]
+        assert names == ["MOSG362W.10I", "MOSG362X.10I", "MOSG363A.10I"]
+        assert list(tmp_path.glob(".*.tmp")) == []
+
+        restored = read_ionex(tmp_path / "MOSG362X.10I")
+        maps = restored.maps[IonexMapType.TEC]
+        assert sorted(maps) == epochs[2:6]
+        text = (tmp_path / "MOSG362X.10I").read_text()
+        assert "  2010    12    28    23     0     0" \
+               "                        EPOCH OF FIRST MAP" in text
+        assert "  2010    12    28    23    45     0" \
+               "                        EPOCH OF LAST MAP" in text
+        assert "     4" + " " * 54 + "# OF MAPS IN FILE" in text
+
+    def test_same_as_single_file(self, ionex_file, ionex_map, tmp_path):
+        epochs = [datetime(2010, 12, 28, h) for h in range(0, 24, 6)]
+        with RollingIonexWriter(ionex_file, tmp_path, "mos",
+                                period=SegmentPeriod.DAY) as writer:
+            for epoch in epochs:
+                writer.add_map(epoch, ionex_map)
+        ionex_file.set_epoch_range(epochs[0], epochs[-1])
+        ionex_file.update_label("# OF MAPS IN FILE", [len(epochs)])
+        ionex_file.set_maps({e: ionex_map for e in epochs},
+                            IonexMapType.TEC)
+        expected = tmp_path / "expected"
+        ionex_file.write(expected)
+        assert (tmp_path / "MOSG3620.10I").read_bytes() == \
+            expected.read_bytes()
+
+    def test_unordered(self, ionex_file, ionex_map, tmp_path):
+        with pytest.raises(EpochOrderError):
+            with RollingIonexWriter(ionex_file, tmp_path, "mos") as writer:
+                writer.add_map(datetime(2010, 12, 28, 1), ionex_map)
+                writer.add_map(datetime(2010, 12, 28, 0), ionex_map)
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,168 @@
+import pytest
+import gzip
+import http.client
+import io
+import json
+import socket
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from ionex_formatter.convert import (
+    ConversionError,
+    ConversionOptions,
+    convert_csv
+)
+from ionex_formatter.service import ConversionService
+
+
+class TestConversionService():
+
+    @pytest.fixture
+    def service(self):
+        service = ConversionService(workers=2)
+        service.start()
+        yield service
+        service.stop()
+
+    def request(self, service, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection(*service.address, timeout=10)
+        try:
+            connection.request(method, path, body, headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_convert_csv(self, service, make_csv):
+        text = make_csv()
+        response, body = self.request(service, "POST", "/convert?center=abc",
+                                      text.encode(),
+                                      {"Content-Type": "text/csv"})
+        assert response.status == 200
+        assert response.getheader("Content-Type") == \
+            "text/plain; charset=ascii"
+        assert int(response.getheader("Content-Length")) == len(body)
+        assert "ABCG3620.10I" in response.getheader("Content-Disposition")
+        expected = io.BytesIO()
+        convert_csv(io.StringIO(text)).write(expected)
+        # header differs only by date of file creation
+        lines = body.decode().splitlines()
+        expected_lines = expected.getvalue().decode().splitlines()
+        assert len(lines) == len(expected_lines)
+        assert lines[3:] == expected_lines[3:]
+
+    def test_convert_json_gzip(self, service):
+        data = {
+            "lat": [10, 0, -10],
+            "lon": [0, 10, 10],
+            "maps": [{"epoch": "2010-12-28T00:00:00",
+                      "values": [[1.0, 2.0], [3.0, None]]}]
+        }
+        response, body = self.request(
+            service, "POST", "/convert?compression=gzip",
+            json.dumps(data).encode(),
+            {"Content-Type": "application/json"}
+        )
+        assert response.status == 200
+        assert response.getheader("Content-Disposition").endswith('.gz"')
+        assert response.getheader("Content-Type") == "application/gzip"
+        text = gzip.decompress(body).decode()
+        assert "   10   20" in text
+        assert "   30  999" in text
+        assert text.rstrip().endswith("END OF FILE")
+
+    def test_errors(self, service):
+        response, body = self.request(service, "POST", "/convert",
+                                      b"2010 12 28 0 0 0 1 2\n")
+        assert response.status == 400
+        assert "Line 1" in json.loads(body)["error"]
+        response, _ = self.request(service, "POST", "/other", b"")
+        assert response.status == 404
+        response, body = self.request(service, "GET", "/health")
+        assert response.status == 200
+        assert json.loads(body)["failed"] == 1
+
+    def test_exponent(self, service, make_csv):
+        for exponent in ("-400", "400"):
+            response, body = self.request(
+                service, "POST", "/convert?exponent=" + exponent,
+                make_csv().encode()
+            )
+            assert response.status == 400
+            assert "Exponent" in json.loads(body)["error"]
+        with pytest.raises(ConversionError):
+            ConversionOptions(exponent=-400)
+        response, _ = self.request(service, "POST", "/convert",
+                                   b"2010 12 28 0 0 0 0 0 inf\n")
+        assert response.status == 400
+
+    def test_broken_pool(self, service, make_csv):
+        class BrokenExecutor():
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool())
+                return future
+
+            def shutdown(self, *args, **kwargs):
+                pass
+
+        service.executor.shutdown()
+        service.executor = BrokenExecutor()
+        response, _ = self.request(service, "POST", "/convert",
+                                   make_csv().encode())
+        assert response.status == 503
+        assert response.getheader("Retry-After") == "1"
+        # pool is replaced
+        response, _ = self.request(service, "POST", "/convert",
+                                   make_csv().encode())
+        assert response.status == 200
+
+    def test_rejected_body_is_not_read(self):
+        service = ConversionService(workers=1, max_requests=1)
+        service.slots.acquire()
+        service.start()
+        try:
+            # body is never sent, server answers without waiting for it
+            with socket.create_connection(service.address, timeout=5) as s:
+                s.sendall(b"POST /convert HTTP/1.1\r\n"
+                          b"Host: localhost\r\n"
+                          b"Content-Length: 1000000\r\n\r\n")
+                response = s.recv(1024)
+            assert response.startswith(b"HTTP/1.1 503")
+        finally:
+            service.stop()
+
+    def test_concurrency_limit(self, make_csv):
+        service = ConversionService(workers=1, max_requests=1)
+        # occupy the only request slot
+        service.slots.acquire()
+        service.start()
+        try:
+            response, _ = self.request(service, "POST", "/convert",
+                                       make_csv().encode())
+            assert response.status == 503
+            assert response.getheader("Retry-After") == "1"
+            service.slots.release()
+            response, _ = self.request(service, "POST", "/convert",
+                                       make_csv().encode())
+            assert response.status == 200
+            assert service.stats()["rejected"] == 1
+        finally:
+            service.stop()
+
+    def test_parallel_requests(self, service, make_csv):
+        text = make_csv().encode()
+        statuses = list()
+
+        def run():
+            response, _ = self.request(service, "POST", "/convert", text)
+            statuses.append(response.status)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [200] * 4
+        assert service.stats()["converted"] == 4
@@ -0,0 +1,100 @@
+import pytest
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ionex_formatter.formatter import IonexFile, IonexMapType
+from ionex_formatter.ionex_map import IonexMap, IonexMap3D, GridCell
+from ionex_formatter.shared_map import SharedIonexMap, SharedMapDescriptor
+from ionex_formatter.spatial import SpatialRange
+
+EPOCH = datetime(2010, 12, 28)
+
+
+def produce(hour: int) -> SharedMapDescriptor:
+    lat_range = SpatialRange(87.5, -87.5, -2.5)
+    lon_range = SpatialRange(-180, 180, 5)
+    shared_map = SharedIonexMap.create(lat_range, lon_range,
+                                       EPOCH.replace(hour=hour), 450)
+    for i, lat in enumerate(lat_range.coordinates):
+        shared_map.set_values(lat, [hour * 100 + i] * 73)
+    return shared_map.handoff()
+
+
+class TestSharedIonexMap():
+
+    @pytest.fixture
+    def ranges(self):
+        return SpatialRange(87.5, -87.5, -87.5), SpatialRange(-180, 180, 5)
+
+    def test_format_from_shared_memory(self, ranges, map_data, map_lines):
+        lat_range, lon_range = ranges
+        ionex_map = IonexMap(lat_range, lon_range, 450, EPOCH)
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        shared_map = SharedIonexMap.create(lat_range, lon_range, EPOCH, 450)
+        try:
+            for _, lat, values in ionex_map.rows():
+                shared_map.set_values(lat, values)
+            assert shared_map.shape == (1, 3, 73)
+            formatter = IonexFile()
+            lines = formatter.format_map(IonexMapType.TEC, 1, EPOCH,
+                                         shared_map)
+            assert "\n".join(lines) == map_lines
+            copy = shared_map.to_map()
+            assert isinstance(copy, IonexMap)
+            assert copy.data == ionex_map.data
+        finally:
+            shared_map.release()
+
+    def test_handoff_and_attach(self, ranges):
+        lat_range, lon_range = ranges
+        shared_map = SharedIonexMap.create(lat_range, lon_range, EPOCH, 450)
+        shared_map.set_values(0.0, list(range(73)))
+        descriptor = shared_map.handoff()
+        assert len(pickle.dumps(descriptor)) < 500
+        with SharedIonexMap.attach(descriptor) as attached:
+            # rows are views of shared memory
+            assert isinstance(next(attached.rows())[2], memoryview)
+            rows = [(h, lat, v.tolist()) for h, lat, v in attached.rows()]
+            assert rows[1] == (450, 0.0, list(range(73)))
+            assert rows[0][2] == [IonexMap.NO_VALUE] * 73
+            assert attached.epoch == EPOCH
+
+    def test_3d(self, ranges):
+        lat_range, lon_range = ranges
+        heights = SpatialRange(200, 400, 200)
+        with SharedIonexMap.create(lat_range, lon_range, EPOCH,
+                                   heights) as shared_map:
+            shared_map.set_values(0.0, [7] * 73, height=400)
+            copy = shared_map.to_map()
+            assert isinstance(copy, IonexMap3D)
+            assert copy.get_cell(400, 0.0, 5) == 7
+            assert copy.get_cell(200, 0.0, 5) == IonexMap.NO_VALUE
+            formatter = IonexFile()
+            assert formatter.format_map(IonexMapType.TEC, 1, EPOCH,
+                                        shared_map) == \
+                formatter.format_map(IonexMapType.TEC, 1, EPOCH, copy)
+
+    def test_wrong_values(self, ranges):
+        lat_range, lon_range = ranges
+        with SharedIonexMap.create(lat_range, lon_range, EPOCH,
+                                   450) as shared_map:
+            with pytest.raises(ValueError):
+                shared_map.set_values(0.0, [1, 2, 3])
+            descriptor = shared_map.descriptor
+            wrong = SharedMapDescriptor(
+                descriptor.name, (1, 3, 72), descriptor.dtype, EPOCH,
+                descriptor.lat, descriptor.lon, descriptor.height
+            )
+            with pytest.raises(ValueError):
+                SharedIonexMap.attach(wrong)
+
+    def test_producer_processes(self):
+        with ProcessPoolExecutor(2) as executor:
+            descriptors = list(executor.map(produce, range(3)))
+        for hour, descriptor in enumerate(descriptors):
+            with SharedIonexMap.attach(descriptor) as shared_map:
+                assert shared_map.epoch.hour == hour
+                rows = [v.tolist() for _, _, v in shared_map.rows()]
+                assert len(rows) == 71
+                assert rows[-1] == [hour * 100 + 70] * 73
@@ -2,7 +2,8 @@ import pytest
 from ionex_formatter.spatial import SpatialRange
 from ionex_formatter.spatial import (NonIntegerStepCountError,
                                      FiniteRangeZeroStepError,
-                                     DecimalDigitReduceAccuracyError)
+                                     DecimalDigitReduceAccuracyError,
+                                     OffGridCoordinateError)
 
 class TestSpatialGridDimensions():
     
@@ -91,5 +92,51 @@ class TestSpatialGridDimensions():
             SpatialRange(0.125, 1.0, 0.125, decimal=2)
 
 
+class TestSpatialRangeNodes():
 
+    def test_fractional_step_node_number(self):
+        rng = SpatialRange(87.5, -87.5, -2.5)
+        assert rng.get_node_number() == 71
+        rng = SpatialRange(0.0, 0.3, 0.1)
+        assert rng.get_node_number() == 4
 
+    def test_coordinates(self):
+        rng = SpatialRange(0.0, 0.3, 0.1)
+        assert rng.coordinates == (0.0, 0.1, 0.2, 0.3)
+        assert rng.coordinates is rng.coordinates
+
+    def test_index(self):
+        rng = SpatialRange(87.5, -87.5, -2.5)
+        assert rng.index(87.5) == 0
+        assert rng.index(-87.5) == 70
+        assert rng.index(0.1 + 0.2 - 0.3) == 35
+
+    def test_index_off_grid_raises(self):
+        rng = SpatialRange(-180, 180, 5)
+        with pytest.raises(OffGridCoordinateError):
+            rng.index(2.0)
+        with pytest.raises(OffGridCoordinateError):
+            rng.index(185.0)
+
+    def test_index_tolerance(self):
+        rng = SpatialRange(-180, 180, 5)
+        assert rng.index(5.04, tolerance=0.05) == 37
+
+    def test_indices(self):
+        rng = SpatialRange(-180, 180, 5)
+        assert rng.indices([-180.0, 2.0, 180.0, 190.0]) == [0, None, 72, None]
+
+    def test_snap(self):
+        rng = SpatialRange(0.0, 0.3, 0.1)
+        assert rng.snap(0.1 + 0.2) == 0.3
+
+    def test_zero_step_index(self):
+        rng = SpatialRange(450.0, 450.0, 0.0)
+        assert rng.index(450.0) == 0
+        assert rng.indices([450.0, 400.0]) == [0, None]
+
+    def test_equality(self):
+        assert SpatialRange(-180, 180, 5) == SpatialRange(-180.0, 180.0, 5.0)
+        assert SpatialRange(-180, 180, 5) != SpatialRange(-180, 180, 2.5)
+        assert len({SpatialRange(-180, 180, 5),
+                    SpatialRange(-180.0, 180.0, 5.0)}) == 1
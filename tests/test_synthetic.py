@@ -0,0 +1,94 @@
+import io
+import pytest
+from datetime import datetime
+
+from ionex_formatter.formatter import IonexMapType
+from ionex_formatter.reader import read_ionex
+from ionex_formatter.spatial import SpatialRange
+from ionex_formatter.synthetic import (
+    EpochSchedule,
+    Storm,
+    SyntheticGenerator,
+    SyntheticTecModel,
+    main
+)
+
+
+class TestSyntheticGenerator():
+
+    @pytest.fixture
+    def schedule(self):
+        return EpochSchedule(datetime(2010, 12, 28), 3600, 4)
+
+    def make(self, schedule, seed=1, model=None):
+        return SyntheticGenerator(SpatialRange(87.5, -87.5, -2.5),
+                                  SpatialRange(-180, 180, 5),
+                                  schedule, model, seed)
+
+    def test_reproducible(self, schedule):
+        first = [v for _, v in self.make(schedule).iter_epochs()]
+        second = [v for _, v in self.make(schedule).iter_epochs()]
+        other = [v for _, v in self.make(schedule, seed=2).iter_epochs()]
+        assert first == second
+        assert first != other
+
+    def test_chunks_do_not_change_values(self, schedule):
+        generator = self.make(schedule)
+        small = [v for c in generator.iter_chunks(1000) for v in c[3]]
+        large = [v for c in generator.iter_chunks(10 ** 6) for v in c[3]]
+        assert small == large
+        assert len(small) == 4 * 71 * 73
+        assert max(len(c[3]) for c in generator.iter_chunks(1000)) == 1000
+
+    def test_plausible_values(self, schedule):
+        model = SyntheticTecModel(noise=0)
+        values = dict(self.make(schedule, model=model).iter_epochs())
+        epoch = datetime(2010, 12, 28)
+        assert min(values[epoch]) >= 0
+        assert max(values[epoch]) < 200
+        # daytime (14 LT at 150W at 0 UT) is higher than night at 0E
+        generator = self.make(schedule, model=model)
+        lon_nodes = 73
+        equator = 35 * lon_nodes
+        day = values[epoch][equator + generator.lon_range.index(-150)]
+        night = values[epoch][equator + generator.lon_range.index(0)]
+        assert day > 3 * night
+
+    def test_storm(self, schedule):
+        quiet = SyntheticTecModel(noise=0)
+        storm = SyntheticTecModel(
+            noise=0, storms=[Storm(datetime(2010, 12, 28), 4, 50)]
+        )
+        quiet_values = dict(self.make(schedule, model=quiet).iter_epochs())
+        storm_values = dict(self.make(schedule, model=storm).iter_epochs())
+        epoch = datetime(2010, 12, 28, 2)
+        assert sum(storm_values[epoch]) > sum(quiet_values[epoch])
+
+    def test_maps_match_values(self, schedule):
+        generator = self.make(schedule)
+        values = dict(generator.iter_epochs())
+        for epoch, ionex_map in generator.iter_maps(exponent=-1):
+            assert ionex_map.get_cell(0, 0) == \
+                round(values[epoch][35 * 73 + 36] * 10)
+
+    def test_csv(self, schedule):
+        stream = io.StringIO()
+        count = self.make(schedule).write_csv(stream, 500)
+        lines = stream.getvalue().splitlines()
+        assert count == len(lines) - 1 == 4 * 71 * 73
+        assert lines[1].split()[:8] == [
+            "2010", "12", "28", "0", "0", "0", "87.5", "-180.0"
+        ]
+
+    def test_ionex(self, schedule, tmp_path):
+        path = tmp_path / "synth.10i"
+        self.make(schedule).write_ionex(path)
+        ionex = read_ionex(path)
+        assert len(ionex.maps[IonexMapType.TEC]) == 4
+        assert ionex.header["INTERVAL"][0].startswith("  3600")
+
+    def test_cli(self, tmp_path):
+        path = tmp_path / "synth.csv"
+        assert main(["--count", "2", "--lat", "10", "-10", "-10",
+                     "--lon", "0", "10", "5", "--out", str(path)]) == 0
+        assert len(path.read_text().splitlines()) == 1 + 2 * 3 * 3
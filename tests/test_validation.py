@@ -0,0 +1,166 @@
+import pytest
+from datetime import datetime, timedelta
+
+from ionex_formatter.formatter import (
+    IonexFile,
+    IonexMapType,
+    NumericTokenTooBig,
+    VerificationLevel
+)
+from ionex_formatter.ionex_map import IonexMap, GridCell
+from ionex_formatter.spatial import SpatialRange
+from ionex_formatter.validation import (
+    IssueKind,
+    MapStackValidator,
+    MapValidationError
+)
+
+
+class TestMapStackValidator():
+
+    @pytest.fixture
+    def validator(self):
+        return MapStackValidator(SpatialRange(87.5, -87.5, -87.5),
+                                 SpatialRange(-180, 180, 5),
+                                 interval=900)
+
+    @pytest.fixture
+    def cells(self, map_data):
+        start = datetime(2010, 12, 28)
+        return {
+            start + timedelta(minutes=15 * i): 
+                GridCell.get_list_from_csv(map_data)
+            for i in range(4)
+        }
+
+    def test_valid(self, validator, cells):
+        report = validator.validate_cells(cells)
+        assert report.ok
+        report.raise_for_issues()
+
+    def test_all_issues_reported(self, validator, cells, map_data):
+        epochs = sorted(cells)
+        first, second, third, fourth = [cells[e] for e in epochs]
+        first[0].val = 100000
+        first[1].val = float("nan")
+        first[2].val = 12.5
+        del second[5]
+        second.append(GridCell.get_list_from_csv([(0.0, 0, 1)])[0])
+        third[7].lon = 2.5
+        cells[epochs[-1] + timedelta(hours=1)] = cells.pop(epochs[-1])
+        report = validator.validate_cells(cells)
+        assert report.summary() == {
+            IssueKind.OVERFLOW: 1,
+            IssueKind.NOT_FINITE: 1,
+            IssueKind.NOT_INTEGER: 1,
+            IssueKind.MISSING_NODE: 2,
+            IssueKind.DUPLICATE_NODE: 1,
+            IssueKind.OFF_GRID: 1,
+            IssueKind.EPOCH_GAP: 1,
+        }
+        off_grid = report.by_kind(IssueKind.OFF_GRID)[0]
+        assert (off_grid.lat, off_grid.lon) == (87.5, 2.5)
+        missing = {(i.lat, i.lon) for i in report.by_kind(IssueKind.MISSING_NODE)}
+        assert missing == {(87.5, -155.0), (87.5, -145.0)}
+        with pytest.raises(MapValidationError):
+            report.raise_for_issues()
+
+    def test_validate_maps(self, cells):
+        formatter = IonexFile()
+        maps = dict()
+        for epoch, epoch_cells in cells.items():
+            ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                                 SpatialRange(-180, 180, 5), 450, epoch)
+            ionex_map.set_data(epoch_cells)
+            maps[epoch] = ionex_map
+        formatter.set_maps(maps, IonexMapType.TEC)
+        assert formatter.validate().ok
+        maps[sorted(maps)[1]].data[0.0][3] = -10000
+        del maps[sorted(maps)[2]].data[87.5]
+        report = formatter.validate(interval=900)
+        assert report.summary() == {
+            IssueKind.OVERFLOW: 1,
+            IssueKind.MISSING_NODE: 1,
+        }
+
+    def test_integral_floats(self, validator, cells):
+        epochs = sorted(cells)
+        cells[epochs[0]][0].val = 5.0
+        report = validator.validate_cells(cells)
+        assert report.summary() == {IssueKind.NOT_INTEGER: 1}
+        assert report.by_kind(IssueKind.NOT_INTEGER)[0].value == 5.0
+
+    def test_header_grid(self, cells):
+        formatter = IonexFile()
+        formatter.set_spatial_grid(SpatialRange(87.5, -87.5, -87.5),
+                                   SpatialRange(-180, 180, 5),
+                                   SpatialRange(450, 450, 0))
+        maps = dict()
+        for epoch, epoch_cells in cells.items():
+            ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                                 SpatialRange(-180, 180, 5), 450, epoch)
+            ionex_map.set_data(epoch_cells)
+            maps[epoch] = ionex_map
+        formatter.set_maps(maps, IonexMapType.TEC)
+        assert formatter.validate().ok
+        # the first map differs from header, others match it
+        first = min(maps)
+        lon_range = SpatialRange(-180, 180, 10)
+        maps[first] = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                               lon_range, 450, first)
+        for lat in (87.5, 0.0, -87.5):
+            maps[first].set_values(lat, [10] * lon_range.get_node_number())
+        report = formatter.validate()
+        assert report.summary() == {IssueKind.MISSING_NODE: 3}
+        assert {i.epoch for i in report.issues} == {first}
+
+    def test_written_float_map(self, cells):
+        formatter = IonexFile()
+        epoch = min(cells)
+        ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                             SpatialRange(-180, 180, 5), 450, epoch)
+        ionex_map.set_data(cells[epoch])
+        ionex_map.data[0.0][0] = 5.0
+        formatter.set_maps({epoch: ionex_map}, IonexMapType.TEC)
+        assert not formatter.validate().ok
+        with pytest.raises(ValueError):
+            formatter.get_map_lines(IonexMapType.TEC, epoch)
+
+
+class TestVerificationLevels():
+
+    @pytest.fixture
+    def formatter(self, map_data):
+        epoch = datetime(2010, 12, 28)
+        ionex_map = IonexMap(SpatialRange(87.5, -87.5, -87.5),
+                             SpatialRange(-180, 180, 5), 450, epoch)
+        ionex_map.set_data(GridCell.get_list_from_csv(map_data))
+        formatter = IonexFile()
+        formatter.set_maps({epoch: ionex_map}, IonexMapType.TEC)
+        return formatter
+
+    @pytest.mark.parametrize("level", list(VerificationLevel))
+    def test_same_output(self, formatter, map_lines, level):
+        formatter.verification = level
+        lines = formatter.get_map_lines(IonexMapType.TEC, 
+                                        datetime(2010, 12, 28))
+        assert "\n".join(lines) == map_lines
+
+    def test_fast_overflow(self, formatter):
+        epoch = datetime(2010, 12, 28)
+        formatter.maps[IonexMapType.TEC][epoch].data[0.0][0] = 123456
+        formatter.verification = VerificationLevel.FAST
+        with pytest.raises(NumericTokenTooBig):
+            formatter.get_map_lines(IonexMapType.TEC, epoch)
+        formatter.verification = VerificationLevel.OFF
+        lines = formatter.get_map_lines(IonexMapType.TEC, epoch)
+        assert len(lines[9]) > 80
+
+    @pytest.mark.parametrize("level", [VerificationLevel.STRICT,
+                                       VerificationLevel.FAST])
+    def test_float_values(self, formatter, level):
+        epoch = datetime(2010, 12, 28)
+        formatter.maps[IonexMapType.TEC][epoch].data[0.0][0] = 12.7
+        formatter.verification = level
+        with pytest.raises(ValueError):
+            formatter.get_map_lines(IonexMapType.TEC, epoch)
@@ -0,0 +1,191 @@
+import pytest
+import json
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from ionex_formatter.__main__ import main
+from ionex_formatter.convert import ConversionError, ConversionOptions
+from ionex_formatter.formatter import IonexMapType
+from ionex_formatter.reader import read_ionex
+from ionex_formatter.watch import (
+    STATE_FILE,
+    DirectoryWatcher,
+    convert_file,
+    write_atomic
+)
+
+
+class ManualExecutor(Executor):
+    """
+    Runs submitted tasks only when run_all is called.
+    """
+
+    def __init__(self):
+        self.tasks = list()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.tasks.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        tasks, self.tasks = self.tasks, list()
+        for future, fn, args in tasks:
+            future.set_result(fn(*args))
+
+
+class TestDirectoryWatcher():
+
+    @pytest.fixture
+    def dirs(self, tmp_path):
+        spool = tmp_path / "spool"
+        spool.mkdir()
+        return spool, tmp_path / "maps"
+
+    def test_convert_file(self, dirs, make_csv):
+        spool, out = dirs
+        out.mkdir()
+        source = spool / "data.csv"
+        source.write_text(make_csv())
+        path = convert_file(source, out, ConversionOptions(center="abc"))
+        assert path.name == "ABCG3620.10I"
+        assert len(read_ionex(path).maps) == 1
+        # only output is left in directory
+        assert os.listdir(out) == ["ABCG3620.10I"]
+
+    def test_watch(self, dirs, make_csv):
+        spool, out = dirs
+        (spool / "day1.csv").write_text(make_csv())
+        (spool / "broken.csv").write_text("2010 12 28\n")
+        (spool / "notes.txt").write_text("ignored")
+        watcher = DirectoryWatcher(spool, out, interval=0,
+                                   executor=ThreadPoolExecutor(2))
+        # the first poll only remembers files
+        assert watcher.poll() == []
+        futures = watcher.poll()
+        assert len(futures) == 2
+        watcher.wait()
+        assert (out / "MOSG3620.10I").exists()
+        state = json.loads((out / STATE_FILE).read_text())
+        assert state["day1.csv"]["output"] == str(out / "MOSG3620.10I")
+        assert "Line 1" in state["broken.csv"]["error"]
+
+        # finished inputs are not converted again after restart
+        restarted = DirectoryWatcher(spool, out, interval=0,
+                                     executor=ThreadPoolExecutor(1))
+        assert restarted.poll() == [] and restarted.poll() == []
+
+        # changed input is converted again
+        (spool / "broken.csv").write_text(make_csv([5]))
+        restarted.poll()
+        assert len(restarted.poll()) == 1
+        restarted.wait()
+        assert restarted.state["broken.csv"].error is None
+        # output of other input of the same day is not overwritten
+        assert restarted.state["broken.csv"].output == \
+            str(out / "MOSG3621.10I")
+        assert len(read_ionex(out / "MOSG3620.10I").maps[
+            IonexMapType.TEC]) == 2
+
+        # changed input replaces its own output
+        (spool / "day1.csv").write_text(make_csv([1]))
+        restarted.poll()
+        assert len(restarted.poll()) == 1
+        restarted.wait()
+        assert restarted.state["day1.csv"].output == str(out / "MOSG3620.10I")
+        assert len(read_ionex(out / "MOSG3620.10I").maps[
+            IonexMapType.TEC]) == 1
+
+    def test_changing_file_is_not_taken(self, dirs, make_csv):
+        spool, out = dirs
+        source = spool / "data.csv"
+        source.write_text(make_csv([0]))
+        watcher = DirectoryWatcher(spool, out, interval=0,
+                                   executor=ThreadPoolExecutor(1))
+        watcher.poll()
+        source.write_text(make_csv([0, 1]))
+        assert watcher.poll() == []
+        assert len(watcher.poll()) == 1
+
+    def test_bounded_queue(self, dirs, make_csv):
+        spool, out = dirs
+        for k in range(5):
+            (spool / "data{}.csv".format(k)).write_text(make_csv())
+        executor = ManualExecutor()
+        watcher = DirectoryWatcher(spool, out, workers=1, interval=0,
+                                   executor=executor)
+        watcher.poll()
+        assert len(watcher.poll()) == 2
+        assert watcher.poll() == []
+        for expected in (2, 1):
+            executor.run_all()
+            assert len(watcher.poll()) == expected
+        executor.run_all()
+        assert len(watcher.state) == 5
+        outputs = {state.output for state in watcher.state.values()}
+        assert outputs == {str(out / "MOSG362{}.10I".format(k))
+                           for k in range(5)}
+
+    def test_file_indices_taken(self, dirs, make_csv):
+        spool, out = dirs
+        out.mkdir()
+        source = spool / "data.csv"
+        source.write_text(make_csv())
+        for k in range(10):
+            convert_file(source, out, exclusive=True)
+        with pytest.raises(ConversionError):
+            convert_file(source, out, exclusive=True)
+        assert len(os.listdir(out)) == 10
+
+    def test_without_hard_links(self, tmp_path, monkeypatch):
+        def link(*args):
+            raise PermissionError("Operation not permitted")
+
+        monkeypatch.setattr(os, "link", link)
+        path = tmp_path / "out.txt"
+        write_atomic(path, lambda temp: open(temp, "w").write("first"),
+                     overwrite=False)
+        assert path.read_text() == "first"
+        with pytest.raises(FileExistsError):
+            write_atomic(path, lambda temp: open(temp, "w").write("second"),
+                         overwrite=False)
+        assert path.read_text() == "first"
+        assert os.listdir(tmp_path) == ["out.txt"]
+
+    def test_stale_output(self, dirs, make_csv):
+        spool, out = dirs
+        source = spool / "data.csv"
+        source.write_text(make_csv())
+        watcher = DirectoryWatcher(spool, out, interval=0,
+                                   executor=ThreadPoolExecutor(1))
+        watcher.run(polls=2)
+        watcher.wait()
+        assert (out / "MOSG3620.10I").exists()
+
+        # failed conversion keeps output of input
+        source.write_text("2010 12 28\n")
+        watcher.run(polls=2)
+        watcher.wait()
+        assert watcher.state["data.csv"].error is not None
+        assert watcher.state["data.csv"].output == str(out / "MOSG3620.10I")
+
+        # input moved to the next day, output of previous day is removed
+        source.write_text(make_csv().replace("2010 12 28", "2010 12 29"))
+        watcher.run(polls=2)
+        watcher.wait()
+        assert watcher.state["data.csv"].output == str(out / "MOSG3630.10I")
+        assert sorted(os.listdir(out)) == [STATE_FILE, "MOSG3630.10I"]
+
+    def test_cli(self, dirs, make_csv, capsys):
+        spool, out = dirs
+        source = spool / "data.csv"
+        source.write_text(make_csv())
+        assert main(["--in", str(source), "--out", str(out),
+                     "--compression", "gzip"]) == 0
+        assert (out / "MOSG3620.10I.gz").exists()
+        assert capsys.readouterr().out.strip().endswith("MOSG3620.10I.gz")
+
+        assert main(["--watch", str(spool), "--out", str(out / "watch"),
+                     "--once", "--interval", "0", "--workers", "1",
+                     "--center", "xyz"]) == 0
+        assert (out / "watch" / "XYZG3620.10I").exists()